@@ -465,9 +465,43 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Cache backend. Multi-process deployments should point this at Redis so catalog
+# version bumps and rate-limit counters are shared by every worker.
+REDIS_CACHE_URL = _env_first('REDIS_CACHE_URL', 'CACHE_URL')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'rukkie'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'rukkie-default',
+        }
+    }
+
 # Celery / background task settings
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
+# Periodic jobs for `celery -A Rukkie beat` (seconds between runs).
+CELERY_BEAT_SCHEDULE = {
+    'refresh-product-rankings': {
+        'task': 'store.tasks.refresh_product_rankings_task',
+        'schedule': float(os.environ.get('STORE_RANKINGS_REFRESH_SECONDS', '3600')),
+    },
+    'update-related-products': {
+        'task': 'store.tasks.update_related_products_task',
+        'schedule': float(os.environ.get('STORE_RELATED_REFRESH_SECONDS', '3600')),
+    },
+    'prune-search-events': {
+        'task': 'store.tasks.prune_search_events_task',
+        'schedule': 86400.0,
+    },
+}
 
 # Image metadata auto-apply confidence threshold (0.0 - 1.0)
 STORE_AUTO_APPLY_CONFIDENCE = float(os.environ.get('STORE_AUTO_APPLY_CONFIDENCE', '0.85'))
@@ -476,6 +510,52 @@ STORE_AUTO_APPLY_CONFIDENCE = float(os.environ.get('STORE_AUTO_APPLY_CONFIDENCE'
 STORE_METADATA_ASYNC = _env_bool('STORE_METADATA_ASYNC', not DEBUG)
 # Toggle use of external vision API (optional)
 STORE_USE_EXTERNAL_VISION = _env_bool('STORE_USE_EXTERNAL_VISION', False)
+# Catalog listing page size (keyset pagination); clients may request up to the max.
+STORE_PRODUCT_PAGE_SIZE = _env_int('STORE_PRODUCT_PAGE_SIZE', 48)
+STORE_PRODUCT_MAX_PAGE_SIZE = _env_int('STORE_PRODUCT_MAX_PAGE_SIZE', 100)
+# Product review listing page size (keyset pagination) and the client-requestable max.
+STORE_REVIEWS_PAGE_SIZE = _env_int('STORE_REVIEWS_PAGE_SIZE', 10)
+STORE_REVIEWS_MAX_PAGE_SIZE = _env_int('STORE_REVIEWS_MAX_PAGE_SIZE', 50)
+# Hard cap on products per /api/products/bulk/ request.
+STORE_PRODUCT_BULK_MAX_ITEMS = _env_int('STORE_PRODUCT_BULK_MAX_ITEMS', 50)
+# Lower edges of the price facet buckets; the last bucket is open-ended.
+STORE_FACET_PRICE_BUCKETS = (0, 10, 25, 50, 100, 250)
+# Seconds to keep versioned catalog responses (0 disables the response cache).
+STORE_CATALOG_CACHE_TTL = _env_int('STORE_CATALOG_CACHE_TTL', 300)
+# Seconds a prebuilt home payload may live (it is keyed by catalog version anyway).
+STORE_HOME_PAYLOAD_TTL = _env_int('STORE_HOME_PAYLOAD_TTL', 86400)
+# "Frequently bought together": neighbours kept per product, minimum shared paid
+# orders for a pair to count, how long the watermark waits for a pending order,
+# and how long a passed-over pending order is still checked for a late payment.
+STORE_RELATED_PRODUCTS_LIMIT = _env_int('STORE_RELATED_PRODUCTS_LIMIT', 12)
+STORE_RELATED_MIN_CO_ORDERS = _env_int('STORE_RELATED_MIN_CO_ORDERS', 2)
+STORE_RELATED_SETTLE_HOURS = _env_int('STORE_RELATED_SETTLE_HOURS', 24)
+STORE_RELATED_LATE_PAYMENT_DAYS = _env_int('STORE_RELATED_LATE_PAYMENT_DAYS', 30)
+# Search typeahead index (per worker process): how often to look for catalog
+# changes, and how often to rebuild from scratch so hard deletes drop out.
+STORE_SUGGEST_CHECK_SECONDS = _env_int('STORE_SUGGEST_CHECK_SECONDS', 5)
+STORE_SUGGEST_REBUILD_SECONDS = _env_int('STORE_SUGGEST_REBUILD_SECONDS', 900)
+# "Did you mean": maximum edits per corrected word, and whether zero-result
+# searches are re-run with the correction (per request: `?autocorrect=1|0`).
+STORE_SPELLING_MAX_EDIT_DISTANCE = _env_int('STORE_SPELLING_MAX_EDIT_DISTANCE', 2)
+STORE_SEARCH_AUTOCORRECT = _env_bool('STORE_SEARCH_AUTOCORRECT', False)
+# Extra search synonym groups on top of store/search_expansion.py's defaults,
+# e.g. [('lip balm', 'chapstick')] or ['candle,votive'].
+STORE_SEARCH_SYNONYMS = []
+# Search analytics: buffered in-process and bulk-written by a background thread
+# every N seconds (0 = no thread; the test runner flushes explicitly).
+STORE_SEARCH_ANALYTICS_ENABLED = _env_bool('STORE_SEARCH_ANALYTICS_ENABLED', True)
+STORE_SEARCH_ANALYTICS_FLUSH_SECONDS = _env_int(
+    'STORE_SEARCH_ANALYTICS_FLUSH_SECONDS', 0 if 'test' in sys.argv[1:2] else 5
+)
+STORE_SEARCH_ANALYTICS_BUFFER_SIZE = _env_int('STORE_SEARCH_ANALYTICS_BUFFER_SIZE', 5000)
+STORE_SEARCH_ANALYTICS_RETENTION_DAYS = _env_int('STORE_SEARCH_ANALYTICS_RETENTION_DAYS', 90)
+# Anonymous carts in the (shared) cache until checkout or login instead of the
+# cart tables; only safe when every worker sees the same cache.
+STORE_CART_CACHE_ANONYMOUS = _env_bool('STORE_CART_CACHE_ANONYMOUS', bool(REDIS_CACHE_URL))
+STORE_CART_CACHE_TTL_SECONDS = _env_int('STORE_CART_CACHE_TTL_SECONDS', 60 * 60 * 24 * 30)
+# Hard cap on operations per /api/cart/batch/ request.
+STORE_CART_BATCH_MAX_OPERATIONS = _env_int('STORE_CART_BATCH_MAX_OPERATIONS', 100)
 
 LOGGING = {
     'version': 1,
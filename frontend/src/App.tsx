@@ -10,8 +10,7 @@ import { AuthProvider } from "@/context/AuthContext";
 import ProtectedRoute from "@/components/ProtectedRoute";
 import { ChatBot } from "@/components/chat/ChatBot";
 import ScrollToTop from "@/components/ScrollToTop";
-import { prefetchProductsPage, fetchFeaturedProducts, fetchHomeContent } from "@/data/products";
-import { fetchJSON } from "@/lib/api";
+import { fetchHomeContent } from "@/data/products";
 import Index from "./pages/Index";
 import Products from "./pages/Products";
 import ProductDetail from "./pages/ProductDetail";
@@ -55,12 +54,6 @@ const applyStorefrontTheme = (theme?: string | null) => {
 };
 
 const AppShell = () => {
-  useEffect(() => {
-    prefetchProductsPage();
-    void fetchFeaturedProducts();
-    void fetchHomeContent();
-  }, []);
-
   useEffect(() => {
     try {
       const cached = localStorage.getItem(STOREFRONT_THEME_STORAGE_KEY);
@@ -71,11 +64,12 @@ const AppShell = () => {
       // Ignore storage errors.
     }
 
+    // The theme ships in the prebuilt home payload the landing page needs anyway.
     let isMounted = true;
-    void fetchJSON("/api/storefront/theme/")
-      .then((payload: any) => {
-        if (!isMounted) return;
-        applyStorefrontTheme(payload?.theme);
+    void fetchHomeContent()
+      .then((content) => {
+        if (!isMounted || content.theme === null) return;
+        applyStorefrontTheme(content.theme);
       })
       .catch(() => {
         // Keep current UI stable; fail quietly.
@@ -3,7 +3,7 @@ import { Link } from "react-router-dom";
 import { Clock, ArrowRight, Zap } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { ProductCard } from "@/components/products/ProductCard";
-import { fetchProducts } from "@/data/products";
+import { fetchHomeContent } from "@/data/products";
 import { ScrollAnimation } from "@/hooks/useScrollAnimation";
 
 export const FlashSaleSection = () => {
@@ -63,7 +63,7 @@ export const FlashSaleSection = () => {
     };
     const load = async () => {
       try {
-        const list = await fetchProducts();
+        const { flashSaleProducts: list } = await fetchHomeContent();
         if (!mounted) return;
         const items = Array.isArray(list) ? list : [];
         setFlashSaleProducts(shuffle(items.filter(isFlashSaleProduct)));
@@ -47,7 +47,8 @@ function normalizeImageUrl(value: any): string {
 }
 
 function normalizeProductForCart(product: any): Product {
-  const images = Array.isArray(product?.images) ? product.images : [];
+  // Cart lines carry compact product cards: a single `image_url` instead of `images`.
+  const images = Array.isArray(product?.images) ? product.images : (product?.image_url ? [product.image_url] : []);
   const mappedImages = images.map((img: any) => normalizeImageUrl(img)).filter(Boolean);
 
   return {
@@ -71,11 +72,6 @@ function mapCartItems(data: any): CartItem[] {
   }));
 }
 
-function findBackendCartItemByProductId(cart: any, productId: string) {
-  const rows = Array.isArray(cart?.items) ? cart.items : [];
-  return rows.find((i: any) => String(i?.product?.id ?? "") === String(productId));
-}
-
 export const CartProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
   const [items, setItems] = useState<CartItem[]>([]);
 
@@ -109,21 +105,22 @@ export const CartProvider: React.FC<{ children: React.ReactNode }> = ({ children
     }
   }, [refreshCart]);
 
+  // Quantity changes go through the batch endpoint, which returns the updated cart in one round-trip.
+  const applyCartOperations = useCallback(async (operations: Array<Record<string, unknown>>) => {
+    const data = await fetchJSON('/api/cart/batch/', { method: 'POST', body: JSON.stringify({ operations }) });
+    setItems(mapCartItems(data));
+    return data;
+  }, []);
+
   const removeFromCart = useCallback(async (productId: string) => {
+    const removed = items.find((item) => String(item.product.id) === String(productId));
     try {
-      const cart = await fetchJSON('/api/cart/');
-      const item = findBackendCartItemByProductId(cart, productId);
-      if (!item) {
-        await refreshCart();
-        return;
-      }
-      await fetchJSON('/api/cart/remove/', { method: 'POST', body: JSON.stringify({ item_id: item.id }) });
-      await refreshCart();
-      toast.info(`Removed ${item.product.name} from cart`);
+      await applyCartOperations([{ op: 'remove', product_id: productId }]);
+      if (removed) toast.info(`Removed ${removed.product.name} from cart`);
     } catch (e:any) {
       toast.error(e.message || 'Could not remove from cart');
     }
-  }, [refreshCart]);
+  }, [items, applyCartOperations]);
 
   const updateQuantity = useCallback(async (productId: string, quantity: number) => {
     if (quantity < 1) {
@@ -131,18 +128,11 @@ export const CartProvider: React.FC<{ children: React.ReactNode }> = ({ children
       return;
     }
     try {
-      const cart = await fetchJSON('/api/cart/');
-      const item = findBackendCartItemByProductId(cart, productId);
-      if (!item) {
-        await refreshCart();
-        return;
-      }
-      await fetchJSON('/api/cart/update/', { method: 'POST', body: JSON.stringify({ item_id: item.id, quantity }) });
-      await refreshCart();
+      await applyCartOperations([{ op: 'set', product_id: productId, quantity }]);
     } catch (e:any) {
       toast.error(e.message || 'Could not update quantity');
     }
-  }, [refreshCart, removeFromCart]);
+  }, [applyCartOperations, removeFromCart]);
 
   const clearCart = useCallback(async () => {
     try {
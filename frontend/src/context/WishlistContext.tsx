@@ -3,6 +3,7 @@ import { Product } from "@/types/product";
 import { toast } from "sonner";
 import { useAuth } from '@/context/AuthContext';
 import { fetchJSON } from "@/lib/api";
+import { fetchProductsBySlugs } from "@/data/products";
 
 interface WishlistContextType {
   items: Product[];
@@ -45,7 +46,9 @@ function normalizeImageUrl(value: any): string {
 }
 
 function normalizeWishlistProduct(product: any): Product {
-  const images = Array.isArray(product?.images) ? product.images.map((img: any) => normalizeImageUrl(img)).filter(Boolean) : [];
+  // API wishlists carry product cards: a single `image_url` instead of `images`.
+  const rawImages = Array.isArray(product?.images) ? product.images : (product?.image_url ? [product.image_url] : []);
+  const images = rawImages.map((img: any) => normalizeImageUrl(img)).filter(Boolean);
   return {
     ...product,
     id: String(product?.id ?? ""),
@@ -55,6 +58,7 @@ function normalizeWishlistProduct(product: any): Product {
     isDigital: !!product?.is_digital || !!product?.isDigital,
     isFeatured: !!product?.is_featured || !!product?.isFeatured,
     isFlashSale: !!product?.is_flash_sale || !!product?.isFlashSale,
+    inStock: product?.in_stock !== undefined ? !!product.in_stock : product?.inStock !== false,
     images: images.length ? images : [WISHLIST_PLACEHOLDER_IMAGE],
     category:
       product?.category ||
@@ -102,7 +106,14 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
           if (mounted) setItems([]);
         }
       } else {
-        setItems(readLocalWishlist());
+        const local = readLocalWishlist();
+        setItems(local);
+        // Guest wishlists are stored snapshots; refresh prices and stock in one bulk request.
+        const slugs = local.map((p) => p.slug).filter(Boolean);
+        if (!slugs.length) return;
+        const fresh = new Map((await fetchProductsBySlugs(slugs)).map((p) => [p.slug, p]));
+        if (!mounted) return;
+        setItems(local.map((p) => (fresh.has(p.slug) ? normalizeWishlistProduct({ ...p, ...fresh.get(p.slug) }) : p)));
       }
     })();
     return () => { mounted = false };
@@ -87,11 +87,12 @@ function mapBackendProduct(p: any): Product {
     description: p.description || "",
     price: Number(p.price),
     originalPrice: p.original_price ? Number(p.original_price) : (p.originalPrice ? Number(p.originalPrice) : undefined),
-    images: mapImageArray(p.images),
+    // Card payloads (home, bulk) carry a single `image_url` instead of `images`.
+    images: mapImageArray(Array.isArray(p.images) && p.images.length ? p.images : (p.image_url ? [p.image_url] : [])),
     category: (p.categories && p.categories.length > 0) ? (p.categories[0].slug || p.categories[0].name) : (p.category || "uncategorized"),
     rating: p.rating || 0,
     reviewCount: p.review_count || p.reviewCount || 0,
-    inStock: p.stock ? p.stock > 0 : (p.inStock !== undefined ? p.inStock : true),
+    inStock: p.in_stock !== undefined ? !!p.in_stock : (p.stock ? p.stock > 0 : (p.inStock !== undefined ? p.inStock : true)),
     isDigital: !!p.is_digital || !!p.isDigital,
     isFeatured: !!p.is_featured || !!p.isFeatured,
     isFlashSale: !!p.is_flash_sale || !!p.isFlashSale,
@@ -373,8 +374,16 @@ let productsCache: Product[] | null = null;
 let productsPromise: Promise<Product[]> | null = null;
 let categoriesCache: Category[] | null = null;
 let categoriesPromise: Promise<Category[]> | null = null;
-let homeContentCache: { heroSlides: HeroSlide[]; categories: Category[] } | null = null;
-let homeContentPromise: Promise<{ heroSlides: HeroSlide[]; categories: Category[] }> | null = null;
+export type HomeContent = {
+  heroSlides: HeroSlide[];
+  categories: Category[];
+  featuredProducts: Product[];
+  flashSaleProducts: Product[];
+  theme: string | null;
+};
+
+let homeContentCache: HomeContent | null = null;
+let homeContentPromise: Promise<HomeContent> | null = null;
 let featuredProductsCache: Product[] | null = null;
 let featuredProductsPromise: Promise<Product[]> | null = null;
 const productBySlugCache = new Map<string, Product>();
@@ -383,6 +392,7 @@ const categoryProductsCache = new Map<string, Product[]>();
 const categoryProductsPromise = new Map<string, Promise<Product[]>>();
 const productListCache = new Map<string, Product[]>();
 const productListPromise = new Map<string, Promise<Product[]>>();
+const productListNext = new Map<string, string | null>();
 
 type FetchProductsOptions = {
   category?: string;
@@ -391,6 +401,11 @@ type FetchProductsOptions = {
   limit?: number;
 };
 
+export type ProductPage = {
+  products: Product[];
+  next: string | null;
+};
+
 function buildProductListCacheKey(options?: FetchProductsOptions): string {
   const params = new URLSearchParams();
   if (options?.category) params.set("category", options.category);
@@ -444,7 +459,19 @@ function applyFallbackProductFilters(rows: Product[], options?: FetchProductsOpt
   return result;
 }
 
-// API wrappers: attempt to fetch from backend; fall back to local data
+async function requestProductPage(url: string): Promise<ProductPage> {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error('network');
+  const data = await res.json();
+  const rows = Array.isArray(data) ? data : data.results || [];
+  return {
+    products: rows.map((p: any) => mapBackendProduct(p)),
+    next: !Array.isArray(data) && data.next ? data.next : null,
+  };
+}
+
+// API wrappers: attempt to fetch from backend; fall back to local data.
+// Listings return the first keyset page only; use fetchProductsPage to load more.
 export async function fetchProducts(options?: FetchProductsOptions): Promise<Product[]> {
   const cacheKey = buildProductListCacheKey(options);
   if (!options?.category && typeof options?.featured !== "boolean" && !options?.search) {
@@ -456,12 +483,10 @@ export async function fetchProducts(options?: FetchProductsOptions): Promise<Pro
 
   const pending = (async () => {
     try {
-      const res = await fetch(buildProductListUrl(options));
-      if (!res.ok) throw new Error('network');
-      const data = await res.json();
-      const items = Array.isArray(data) ? data : data.results || [];
-      const mapped = items.map((p: any) => mapBackendProduct(p));
+      const page = await requestProductPage(buildProductListUrl(options));
+      const mapped = page.products;
       productListCache.set(cacheKey, mapped);
+      productListNext.set(cacheKey, page.next);
       if (!options?.category && typeof options?.featured !== "boolean" && !options?.search) {
         productsCache = mapped;
       }
@@ -469,6 +494,7 @@ export async function fetchProducts(options?: FetchProductsOptions): Promise<Pro
     } catch (e) {
       const fallback = applyFallbackProductFilters(products, options);
       productListCache.set(cacheKey, fallback);
+      productListNext.set(cacheKey, null);
       if (!options?.category && typeof options?.featured !== "boolean" && !options?.search) {
         productsCache = fallback;
       }
@@ -488,6 +514,13 @@ export async function fetchProducts(options?: FetchProductsOptions): Promise<Pro
   return pending;
 }
 
+// Without a cursor this serves the cached first page; pass the previous page's `next` link to continue.
+export async function fetchProductsPage(options?: FetchProductsOptions, cursorUrl?: string | null): Promise<ProductPage> {
+  if (cursorUrl) return requestProductPage(cursorUrl);
+  const first = await fetchProducts(options);
+  return { products: first, next: productListNext.get(buildProductListCacheKey(options)) ?? null };
+}
+
 export async function fetchCategories(): Promise<Category[]> {
   if (categoriesCache) return categoriesCache;
   if (categoriesPromise) return categoriesPromise;
@@ -511,7 +544,8 @@ export async function fetchCategories(): Promise<Category[]> {
   return categoriesPromise;
 }
 
-export async function fetchHomeContent(): Promise<{ heroSlides: HeroSlide[]; categories: Category[] }> {
+// The landing page (slides, categories, featured and flash-sale cards, theme) is one prebuilt payload.
+export async function fetchHomeContent(): Promise<HomeContent> {
   if (homeContentCache) return homeContentCache;
   if (homeContentPromise) return homeContentPromise;
 
@@ -542,13 +576,25 @@ export async function fetchHomeContent(): Promise<{ heroSlides: HeroSlide[]; cat
 
     const homeCategories = (Array.isArray(data?.categories) ? data.categories : []).map((c: any) => mapCategoryItem(c));
 
+    const mapCards = (rows: any, flags: Partial<Product>) =>
+      (Array.isArray(rows) ? rows : []).map((p: any) => ({ ...mapBackendProduct(p), ...flags } as Product));
+
     homeContentCache = {
       heroSlides: heroSlides.length ? heroSlides : heroSlidesFallback,
       categories: homeCategories.length ? homeCategories : categories,
+      featuredProducts: mapCards(data?.featured_products, { isFeatured: true }),
+      flashSaleProducts: mapCards(data?.flash_sale_products, { isFlashSale: true }),
+      theme: typeof data?.theme === 'string' ? data.theme : null,
     };
     return homeContentCache;
   } catch (e) {
-    homeContentCache = { heroSlides: heroSlidesFallback, categories };
+    homeContentCache = {
+      heroSlides: heroSlidesFallback,
+      categories,
+      featuredProducts: getFeaturedProducts(),
+      flashSaleProducts: getFlashSaleProducts(),
+      theme: null,
+    };
     return homeContentCache;
   } finally {
     homeContentPromise = null;
@@ -564,7 +610,7 @@ export async function fetchFeaturedProducts(): Promise<Product[]> {
 
   featuredProductsPromise = (async () => {
   try {
-    featuredProductsCache = await fetchProducts({ featured: true });
+    featuredProductsCache = (await fetchHomeContent()).featuredProducts;
     return featuredProductsCache;
   } catch (e) {
     featuredProductsCache = getFeaturedProducts();
@@ -604,6 +650,35 @@ export async function fetchProductBySlug(slug: string): Promise<Product | undefi
   return pending;
 }
 
+const BULK_PRODUCTS_MAX = 50;
+
+export async function fetchProductsBySlugs(slugs: string[]): Promise<Product[]> {
+  const wanted = Array.from(new Set(slugs.map((slug) => String(slug || "").trim()).filter(Boolean)));
+  const missing = wanted.filter((slug) => !productBySlugCache.has(slug));
+
+  for (let start = 0; start < missing.length; start += BULK_PRODUCTS_MAX) {
+    const chunk = missing.slice(start, start + BULK_PRODUCTS_MAX);
+    try {
+      const res = await fetch(`/api/products/bulk/?slugs=${chunk.map(encodeURIComponent).join(",")}`);
+      if (!res.ok) throw new Error('network');
+      const data = await res.json();
+      for (const p of data.results || []) {
+        const mapped: Product = mapBackendProduct(p);
+        productBySlugCache.set(mapped.slug, mapped);
+      }
+    } catch (e) {
+      for (const slug of chunk) {
+        const fallback = getProductBySlug(slug);
+        if (fallback) productBySlugCache.set(slug, fallback);
+      }
+    }
+  }
+
+  return wanted
+    .map((slug) => productBySlugCache.get(slug))
+    .filter((p): p is Product => Boolean(p));
+}
+
 export async function fetchProductsByCategory(slug: string): Promise<Product[]> {
   if (categoryProductsCache.has(slug)) return categoryProductsCache.get(slug) || [];
   if (categoryProductsPromise.has(slug)) return categoryProductsPromise.get(slug) || [];
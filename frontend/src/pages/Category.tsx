@@ -2,7 +2,7 @@ import { useEffect, useState } from "react";
 import { useParams, Link } from "react-router-dom";
 import { Layout } from "@/components/layout/Layout";
 import { ProductCard } from "@/components/products/ProductCard";
-import { fetchProductsByCategory } from "@/data/products";
+import { fetchProductsPage } from "@/data/products";
 import { Button } from "@/components/ui/button";
 
 const CategoryPage = () => {
@@ -10,25 +10,46 @@ const CategoryPage = () => {
   const [products, setProducts] = useState<any[] | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     let mounted = true;
     setLoading(true);
     setError(null);
+    setNextPage(null);
     if (!slug) {
       setProducts([]);
       setLoading(false);
       return;
     }
-    fetchProductsByCategory(slug).then((list) => {
+    fetchProductsPage({ category: slug }).then((page) => {
       if (!mounted) return;
-      setProducts(list || []);
+      setProducts(page.products);
+      setNextPage(page.next);
     }).catch((e) => {
       setError('Failed to load products');
     }).finally(() => { if (mounted) setLoading(false); });
     return () => { mounted = false; };
   }, [slug]);
 
+  const loadMoreProducts = async () => {
+    if (!nextPage || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchProductsPage(undefined, nextPage);
+      setProducts((prev) => {
+        const seen = new Set((prev || []).map((p) => p.id));
+        return [...(prev || []), ...page.products.filter((p) => !seen.has(p.id))];
+      });
+      setNextPage(page.next);
+    } catch {
+      setError('Failed to load more products');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <Layout>
       <div className="container mx-auto px-4 py-12">
@@ -56,6 +77,14 @@ const CategoryPage = () => {
             ))}
           </div>
         )}
+
+        {!loading && nextPage && (
+          <div className="mt-10 flex justify-center">
+            <Button variant="outline" onClick={loadMoreProducts} loading={loadingMore} loadingText="Loading...">
+              Load more products
+            </Button>
+          </div>
+        )}
       </div>
     </Layout>
   );
@@ -28,6 +28,20 @@ import { Input } from "@/components/ui/input";
 import { Textarea } from "@/components/ui/textarea";
 import { Label } from "@/components/ui/label";
 import { advanceImageFallback } from "@/lib/imageFallback";
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
+
+const reviewSortOptions = [
+  { value: "newest", label: "Newest" },
+  { value: "highest", label: "Highest rated" },
+  { value: "lowest", label: "Lowest rated" },
+  { value: "oldest", label: "Oldest" },
+];
+
+type ReviewSummary = {
+  average: string;
+  count: number;
+  histogram: Record<string, number>;
+};
 
 const ProductDetail = () => {
   const fallbackImage = "data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 400 400'%3E%3Crect width='400' height='400' fill='%23f1f1f1'/%3E%3Ctext x='50%25' y='50%25' fill='%23777' font-size='24' text-anchor='middle' dominant-baseline='middle'%3ENo Image%3C/text%3E%3C/svg%3E";
@@ -44,6 +58,11 @@ const ProductDetail = () => {
   const [relatedProducts, setRelatedProducts] = useState<any[]>([]);
   const [reviews, setReviews] = useState<any[]>([]);
   const [reviewLoading, setReviewLoading] = useState(false);
+  const [reviewsNext, setReviewsNext] = useState<string | null>(null);
+  const [loadingMoreReviews, setLoadingMoreReviews] = useState(false);
+  const [reviewSummary, setReviewSummary] = useState<ReviewSummary | null>(null);
+  const [reviewSort, setReviewSort] = useState("newest");
+  const [reviewRatingFilter, setReviewRatingFilter] = useState<number | null>(null);
   const [submittingReview, setSubmittingReview] = useState(false);
   const [reviewForm, setReviewForm] = useState({
     reviewer_name: "",
@@ -78,7 +97,8 @@ const ProductDetail = () => {
 
         if (data.category) {
           try {
-            const list = await fetchProducts();
+            // One small category page is enough for four related cards.
+            const list = await fetchProducts({ category: data.category, limit: 5 });
             if (!mounted) return;
             const items = Array.isArray(list) ? list : [];
             setRelatedProducts(items.filter((p: any) => p.id !== data.id && p.category === data.category).slice(0, 4));
@@ -126,13 +146,18 @@ const ProductDetail = () => {
 
     const loadReviews = async () => {
       setReviewLoading(true);
+      const params = new URLSearchParams({ sort: reviewSort });
+      if (reviewRatingFilter) params.set("rating", String(reviewRatingFilter));
       try {
-        const rows = await fetchJSON(`/api/products/slug/${encodeURIComponent(slug)}/reviews/`);
+        const rows = await fetchJSON(`/api/products/slug/${encodeURIComponent(slug)}/reviews/?${params}`);
         if (!mounted) return;
-        setReviews(Array.isArray(rows) ? rows : []);
+        setReviews(Array.isArray(rows?.results) ? rows.results : []);
+        setReviewsNext(rows?.next || null);
+        setReviewSummary(rows?.summary || null);
       } catch {
         if (!mounted) return;
         setReviews([]);
+        setReviewsNext(null);
       } finally {
         if (mounted) setReviewLoading(false);
       }
@@ -140,7 +165,27 @@ const ProductDetail = () => {
 
     loadReviews();
     return () => { mounted = false; };
-  }, [slug]);
+  }, [slug, reviewSort, reviewRatingFilter]);
+
+  // Reviews are cursor-paginated: follow `next` one page at a time.
+  const loadMoreReviews = async () => {
+    if (!reviewsNext || loadingMoreReviews) return;
+    const requested = reviewsNext;
+    setLoadingMoreReviews(true);
+    try {
+      const rows = await fetchJSON(requested);
+      const page = Array.isArray(rows?.results) ? rows.results : [];
+      setReviews((prev) => {
+        const seen = new Set(prev.map((review) => review.id));
+        return [...prev, ...page.filter((review: any) => !seen.has(review.id))];
+      });
+      setReviewsNext((current) => (current === requested ? rows?.next || null : current));
+    } catch (err: any) {
+      toast.error(err?.message || "Could not load more reviews");
+    } finally {
+      setLoadingMoreReviews(false);
+    }
+  };
   
   const { addToCart } = useCart();
   const { addToWishlist, removeFromWishlist, isInWishlist } = useWishlist();
@@ -225,6 +270,13 @@ const ProductDetail = () => {
         body: JSON.stringify(payload),
       });
       setReviews((prev) => [created, ...prev]);
+      setReviewSummary((prev) => {
+        const stars = String(Number(created?.rating || payload.rating));
+        const histogram = { ...(prev?.histogram || {}), [stars]: Number(prev?.histogram?.[stars] || 0) + 1 };
+        const count = Number(prev?.count || 0) + 1;
+        const weighted = Object.entries(histogram).reduce((sum, [key, value]) => sum + Number(key) * Number(value), 0);
+        return { average: (weighted / count).toFixed(2), count, histogram };
+      });
       setReviewForm({
         reviewer_name: "",
         reviewer_email: "",
@@ -521,13 +573,70 @@ const ProductDetail = () => {
 
             <TabsContent value="reviews" className="pt-6">
               <div className="space-y-8">
+                {reviewSummary && reviewSummary.count > 0 && (
+                  <div className="rounded-lg border border-border p-4 space-y-2">
+                    <p className="font-medium text-foreground">
+                      {reviewSummary.average} out of 5 ({reviewSummary.count} reviews)
+                    </p>
+                    {[5, 4, 3, 2, 1].map((stars) => {
+                      const count = Number(reviewSummary.histogram?.[String(stars)] || 0);
+                      const percent = Math.round((count / reviewSummary.count) * 100);
+                      const active = reviewRatingFilter === stars;
+                      return (
+                        <button
+                          key={stars}
+                          type="button"
+                          onClick={() => setReviewRatingFilter(active ? null : stars)}
+                          aria-pressed={active}
+                          className={cn(
+                            "flex w-full items-center gap-3 text-sm",
+                            active ? "font-medium text-foreground" : "text-muted-foreground hover:text-foreground"
+                          )}
+                        >
+                          <span className="w-12 text-left">{stars} star</span>
+                          <span className="h-2 flex-1 overflow-hidden rounded-full bg-muted">
+                            <span className="block h-full bg-yellow-400" style={{ width: `${percent}%` }} />
+                          </span>
+                          <span className="w-10 text-right">{count}</span>
+                        </button>
+                      );
+                    })}
+                  </div>
+                )}
+
                 <div className="space-y-4">
+                  <div className="flex flex-wrap items-center justify-between gap-3">
+                    <p className="text-sm text-muted-foreground">
+                      {reviewRatingFilter ? (
+                        <>
+                          Showing {reviewRatingFilter}-star reviews.{" "}
+                          <button type="button" className="underline" onClick={() => setReviewRatingFilter(null)}>
+                            Show all
+                          </button>
+                        </>
+                      ) : null}
+                    </p>
+                    <Select value={reviewSort} onValueChange={setReviewSort}>
+                      <SelectTrigger className="w-[180px]">
+                        <SelectValue placeholder="Sort reviews" />
+                      </SelectTrigger>
+                      <SelectContent>
+                        {reviewSortOptions.map((option) => (
+                          <SelectItem key={option.value} value={option.value}>
+                            {option.label}
+                          </SelectItem>
+                        ))}
+                      </SelectContent>
+                    </Select>
+                  </div>
                   {reviewLoading && (
                     <p className="text-muted-foreground">Loading reviews...</p>
                   )}
                   {!reviewLoading && reviews.length === 0 && (
                     <p className="text-muted-foreground">
-                      No reviews yet. Be the first to review this product.
+                      {reviewRatingFilter
+                        ? "No reviews with this rating yet."
+                        : "No reviews yet. Be the first to review this product."}
                     </p>
                   )}
                   {reviews.map((review) => (
@@ -556,6 +665,17 @@ const ProductDetail = () => {
                       <p className="text-sm text-muted-foreground">{review.comment}</p>
                     </div>
                   ))}
+                  {!reviewLoading && reviewsNext && (
+                    <Button
+                      variant="outline"
+                      type="button"
+                      onClick={loadMoreReviews}
+                      loading={loadingMoreReviews}
+                      loadingText="Loading..."
+                    >
+                      Load more reviews
+                    </Button>
+                  )}
                 </div>
 
                 <form onSubmit={handleReviewSubmit} className="rounded-lg border border-border p-4 space-y-4">
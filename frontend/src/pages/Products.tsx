@@ -8,7 +8,7 @@ import { Input } from "@/components/ui/input";
 import { Checkbox } from "@/components/ui/checkbox";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Sheet, SheetContent, SheetHeader, SheetTitle, SheetTrigger } from "@/components/ui/sheet";
-import { fetchProducts, fetchCategories } from "@/data/products";
+import { fetchProductsPage, fetchCategories } from "@/data/products";
 import { Category } from "@/types/product";
 import { cn } from "@/lib/utils";
 
@@ -39,6 +39,8 @@ const Products = () => {
   const [isSearching, setIsSearching] = useState(false);
 
   const [products, setProducts] = useState([] as any[]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [allCategories, setAllCategories] = useState<Category[]>([]);
 
   useEffect(() => {
@@ -56,19 +58,40 @@ const Products = () => {
     let mounted = true;
     const loadProducts = async () => {
       try {
-        const list = await fetchProducts({
+        const page = await fetchProductsPage({
           category: selectedCategory || undefined,
           search: selectedQuery || undefined,
         });
-        if (mounted) setProducts(Array.isArray(list) ? list : []);
+        if (!mounted) return;
+        setProducts(page.products);
+        setNextPage(page.next);
       } catch {
-        if (mounted) setProducts([]);
+        if (!mounted) return;
+        setProducts([]);
+        setNextPage(null);
       }
     };
     loadProducts();
     return () => { mounted = false; };
   }, [selectedCategory, selectedQuery]);
 
+  const loadMoreProducts = async () => {
+    if (!nextPage || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchProductsPage(undefined, nextPage);
+      setProducts((prev) => {
+        const seen = new Set(prev.map((p) => p.id));
+        return [...prev, ...page.products.filter((p) => !seen.has(p.id))];
+      });
+      setNextPage(page.next);
+    } catch {
+      // Keep the loaded rows; the button stays so the user can retry.
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filteredProducts = useMemo(() => {
     let result = [...products];
 
@@ -364,6 +387,14 @@ const Products = () => {
                 </Button>
               </div>
             )}
+
+            {nextPage && (
+              <div className="mt-10 flex justify-center">
+                <Button variant="outline" onClick={loadMoreProducts} loading={loadingMore} loadingText="Loading...">
+                  Load more products
+                </Button>
+              </div>
+            )}
           </div>
         </div>
       </div>
@@ -31,11 +31,17 @@ import uuid
 from .models import (
 	Category, Product, ProductImage, Cart, CartItem,
 	HomeHeroSlide, PendingMetadata, ShippingMethod, Address, Order, OrderItem, PaymentTransaction, ProductReview,
-	Wishlist, Page, ContactMessage, NewsletterSubscription, AssistantPolicy, UserNotification, UserMailboxMessage
+	Wishlist, Page, ContactMessage, NewsletterSubscription, AssistantPolicy, UserNotification, UserMailboxMessage,
+	SearchEvent,
 )
 from .media_layout import normalize_slug, ensure_category_media_structure, category_media_paths
 from .tasks import analyze_and_apply_image
 from .email_react import get_public_site_url, render_react_email_html
+from .catalog_cache import bump_catalog_version
+from .search_analytics import search_report
+from .image_urls import resolve_image_url
+from .category_counters import set_products_active
+from .review_stats import set_reviews_approved
 
 logger = logging.getLogger(__name__)
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.svg', '.avif'}
@@ -594,15 +600,10 @@ class CategoryAdmin(admin.ModelAdmin):
 	list_filter = ('is_active', 'parent')
 	readonly_fields = ('image_preview', 'media_folder_hint')
 
-	def get_queryset(self, request):
-		qs = super().get_queryset(request)
-		return qs.annotate(product_count=Count('products', filter=Q(products__is_active=True)))
-
 	def image_preview(self, obj):
 		if obj and getattr(obj, 'image', None):
-			try:
-				url = obj.image.url
-			except Exception:
+			url = resolve_image_url(obj.image)
+			if not url:
 				return 'Image unavailable'
 			return format_html(
 				'<img src="{}" style="width:56px;height:56px;object-fit:cover;border-radius:8px;" />',
@@ -625,8 +626,9 @@ class CategoryAdmin(admin.ModelAdmin):
 	media_folder_hint.short_description = 'Media folders'
 
 	def product_count_display(self, obj):
-		return getattr(obj, 'product_count', 0)
+		return obj.active_product_count
 	product_count_display.short_description = 'Products'
+	product_count_display.admin_order_field = 'active_product_count'
 
 	def products_link(self, obj):
 		url = f"{reverse('admin:store_product_changelist')}?categories__id__exact={obj.id}"
@@ -775,6 +777,7 @@ class ProductAdmin(admin.ModelAdmin):
 	search_fields = ('name', 'slug', 'description')
 	inlines = [ProductImageInline]
 	prepopulated_fields = {'slug': ('name',)}
+	readonly_fields = ('primary_image_url', 'image_variants')
 	actions = [
 		'generate_metadata_from_images',
 		'mark_selected_active',
@@ -1052,42 +1055,50 @@ class ProductAdmin(admin.ModelAdmin):
 	generate_metadata_from_images.short_description = 'Generate metadata from product images'
 
 	def mark_selected_active(self, request, queryset):
-		updated = queryset.update(is_active=True)
+		updated = set_products_active(queryset, True)
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) marked as active.")
 	mark_selected_active.short_description = 'Mark selected products as Active'
 
 	def mark_selected_inactive(self, request, queryset):
-		updated = queryset.update(is_active=False)
+		updated = set_products_active(queryset, False)
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) marked as inactive.")
 	mark_selected_inactive.short_description = 'Mark selected products as Inactive'
 
 	def mark_selected_featured(self, request, queryset):
-		updated = queryset.update(is_featured=True)
+		updated = queryset.update(is_featured=True, updated_at=timezone.now())
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) marked as featured.")
 	mark_selected_featured.short_description = 'Mark selected products as Featured'
 
 	def mark_selected_not_featured(self, request, queryset):
-		updated = queryset.update(is_featured=False)
+		updated = queryset.update(is_featured=False, updated_at=timezone.now())
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) removed from featured.")
 	mark_selected_not_featured.short_description = 'Remove selected products from Featured'
 
 	def mark_selected_flash_sale(self, request, queryset):
-		updated = queryset.update(is_flash_sale=True)
+		updated = queryset.update(is_flash_sale=True, updated_at=timezone.now())
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) marked as flash sale.")
 	mark_selected_flash_sale.short_description = 'Mark selected products as Flash Sale'
 
 	def mark_selected_not_flash_sale(self, request, queryset):
-		updated = queryset.update(is_flash_sale=False)
+		updated = queryset.update(is_flash_sale=False, updated_at=timezone.now())
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) removed from flash sale.")
 	mark_selected_not_flash_sale.short_description = 'Remove selected products from Flash Sale'
 
 	def mark_selected_digital(self, request, queryset):
-		updated = queryset.update(is_digital=True)
+		updated = queryset.update(is_digital=True, updated_at=timezone.now())
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) marked as digital.")
 	mark_selected_digital.short_description = 'Mark selected products as Digital'
 
 	def mark_selected_not_digital(self, request, queryset):
-		updated = queryset.update(is_digital=False)
+		updated = queryset.update(is_digital=False, updated_at=timezone.now())
+		bump_catalog_version()
 		self.message_user(request, f"{updated} product(s) marked as non-digital.")
 	mark_selected_not_digital.short_description = 'Mark selected products as Non-Digital'
 
@@ -1103,6 +1114,17 @@ class ProductReviewAdmin(admin.ModelAdmin):
 	list_display = ('product', 'reviewer_name', 'rating', 'is_approved', 'created_at')
 	list_filter = ('is_approved', 'rating', 'created_at')
 	search_fields = ('product__name', 'reviewer_name', 'reviewer_email', 'comment')
+	actions = ('approve_selected_reviews', 'unapprove_selected_reviews')
+
+	def approve_selected_reviews(self, request, queryset):
+		updated = set_reviews_approved(queryset, True)
+		self.message_user(request, f"{updated} review(s) approved.")
+	approve_selected_reviews.short_description = 'Approve selected reviews'
+
+	def unapprove_selected_reviews(self, request, queryset):
+		updated = set_reviews_approved(queryset, False)
+		self.message_user(request, f"{updated} review(s) unapproved.")
+	unapprove_selected_reviews.short_description = 'Unapprove selected reviews'
 
 
 @admin.register(PendingMetadata)
@@ -1583,6 +1605,53 @@ class UserMailboxMessageAdmin(admin.ModelAdmin):
 	list_filter = ('category', 'is_read', 'created_at')
 	search_fields = ('user__username', 'subject', 'body')
 	readonly_fields = ('created_at', 'updated_at', 'read_at')
+
+
+@admin.register(SearchEvent)
+class SearchEventAdmin(admin.ModelAdmin):
+	list_display = ('query', 'source', 'result_count', 'latency_ms', 'created_at')
+	list_filter = ('source', 'created_at')
+	search_fields = ('query',)
+	change_list_template = 'admin/store/searchevent/change_list.html'
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def get_urls(self):
+		urls = super().get_urls()
+		custom_urls = [
+			path(
+				'report/',
+				self.admin_site.admin_view(self.search_report_view),
+				name='store_searchevent_report',
+			),
+		]
+		return custom_urls + urls
+
+	def search_report_view(self, request):
+		if not self.has_view_permission(request):
+			return redirect('admin:login')
+
+		try:
+			days = max(1, min(int(request.GET.get('days') or 7), 365))
+		except (TypeError, ValueError):
+			days = 7
+		source = str(request.GET.get('source') or '').strip()
+		if source not in dict(SearchEvent.SOURCE_CHOICES):
+			source = ''
+		context = {
+			**self.admin_site.each_context(request),
+			'title': 'Search Report',
+			'opts': self.model._meta,
+			'has_view_permission': self.has_view_permission(request),
+			'report': search_report(days=days, source=source or None),
+			'day_options': (1, 7, 30, 90),
+			'source_choices': SearchEvent.SOURCE_CHOICES,
+		}
+		return TemplateResponse(request, 'admin/store/searchevent/search_report.html', context)
 def _flutterwave_secret_present():
 	return bool(str(getattr(settings, 'FLUTTERWAVE_SECRET_KEY', '') or '').strip())
 
@@ -0,0 +1,335 @@
+"""
+Cache-backed carts for anonymous visitors.
+
+Looking at an empty cart never writes anything: without a cart the views answer
+with a virtual empty cart, so crawlers and window-shoppers leave no `Cart` rows
+or sessions behind. With `STORE_CART_CACHE_ANONYMOUS` on, an anonymous
+visitor's lines ({product_id: quantity}) live in the cache under a random token
+kept in their session; the token is session data, so it survives the session
+key rotation at login. The lines become `Cart`/`CartItem` rows only at checkout
+(`materialize_session_cart`) or login (`merge_session_cart_into_user`, run by
+the `user_logged_in` receiver). Item ids in a cached cart are product ids.
+
+The cache must be shared by every worker (Redis), which is why the setting
+defaults to on only when `REDIS_CACHE_URL` is configured.
+
+`cart_display_queryset` renders a cart in three queries however many lines it
+has: the cart with its total summed in SQL, its items joined to the card columns
+of their products (primary image URLs are denormalized onto the product), and
+the products' categories.
+"""
+import logging
+import secrets
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Prefetch
+
+from .models import Cart, CartItem, Category, Product, cart_total_expression
+
+logger = logging.getLogger(__name__)
+
+SESSION_CART_TOKEN_KEY = 'cart_token'
+SESSION_CART_CACHE_PREFIX = 'store:cart:'
+
+
+def session_cart_enabled(request) -> bool:
+    """True when this request's cart lives in the cache rather than the cart tables."""
+    if not getattr(settings, 'STORE_CART_CACHE_ANONYMOUS', False):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Carts already written to the tables (checkout, or before the cache store) stay there.
+    return not request.session.get('cart_id')
+
+
+def _cart_product_columns():
+    from .serializers import CartProductSerializer
+
+    return CartProductSerializer.required_columns(CartProductSerializer.resolve_field_names())
+
+
+def _categories_prefetch(prefix=''):
+    return Prefetch(f'{prefix}categories', queryset=Category.objects.only('id', 'name'))
+
+
+def cart_product_queryset():
+    """Products with just what `CartProductSerializer` renders."""
+    return Product.objects.only(*_cart_product_columns()).prefetch_related(_categories_prefetch())
+
+
+def cart_display_queryset():
+    """Carts annotated with `items_total` and their items, products and categories prefetched."""
+    product_columns = [f'product__{column}' for column in _cart_product_columns()]
+    items = (
+        CartItem.objects.select_related('product')
+        .only('id', 'cart', 'quantity', 'product', *product_columns)
+        .prefetch_related(_categories_prefetch('product__'))
+        .order_by('id')
+    )
+    return Cart.objects.annotate(items_total=cart_total_expression('items__')).prefetch_related(
+        Prefetch('items', queryset=items)
+    )
+
+
+# One statement: insert the line or add to it, but only while the result fits
+# in stock. SQLite needs the SELECT's WHERE to parse the upsert unambiguously.
+CART_ADD_UPSERT_SQL = """
+INSERT INTO {item} (cart_id, product_id, quantity)
+SELECT %s, p.id, %s FROM {product} p
+WHERE p.id = %s AND (p.is_digital OR p.stock >= %s)
+ON CONFLICT (cart_id, product_id) DO UPDATE
+SET quantity = {item}.quantity + excluded.quantity
+WHERE (
+    SELECT p.is_digital OR p.stock >= {item}.quantity + excluded.quantity
+    FROM {product} p WHERE p.id = excluded.product_id
+)
+RETURNING quantity
+"""
+
+
+def add_cart_quantity(cart_id, product_id, quantity):
+    """Add `quantity` to a cart line in one round-trip; the new quantity, or None when stock is short."""
+    if connection.vendor in ('postgresql', 'sqlite'):
+        sql = CART_ADD_UPSERT_SQL.format(
+            item=connection.ops.quote_name(CartItem._meta.db_table),
+            product=connection.ops.quote_name(Product._meta.db_table),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [cart_id, quantity, product_id, quantity])
+            row = cursor.fetchone()
+        return row[0] if row else None
+    with transaction.atomic():
+        product = Product.objects.select_for_update().only('id', 'is_digital', 'stock').get(pk=product_id)
+        item = CartItem.objects.select_for_update().filter(cart_id=cart_id, product_id=product_id).first()
+        next_qty = quantity + (item.quantity if item else 0)
+        if not product.is_digital and next_qty > product.stock:
+            return None
+        if item:
+            item.quantity = next_qty
+            item.save(update_fields=['quantity'])
+        else:
+            CartItem.objects.create(cart_id=cart_id, product_id=product_id, quantity=next_qty)
+        return next_qty
+
+
+CART_BATCH_OPERATIONS = ('add', 'set', 'remove', 'clear')
+
+
+class CartBatchError(Exception):
+    """A rejected batch; `payload` is the 400 response body."""
+
+    def __init__(self, payload):
+        super().__init__(payload.get('error'))
+        self.payload = payload
+
+
+def parse_cart_operations(raw_operations, max_operations):
+    """[(op, product_id, quantity)] from a batch request body, or CartBatchError."""
+    if not isinstance(raw_operations, list) or not raw_operations:
+        raise CartBatchError({'error': 'operations_required', 'detail': 'Provide a non-empty operations list.'})
+    if len(raw_operations) > max_operations:
+        raise CartBatchError({
+            'error': 'too_many_operations',
+            'detail': f'At most {max_operations} operations can be applied at once.',
+        })
+    operations = []
+    for index, raw in enumerate(raw_operations):
+        op = str((raw or {}).get('op') or '').strip().lower() if isinstance(raw, dict) else ''
+        if op not in CART_BATCH_OPERATIONS:
+            raise CartBatchError({'error': 'invalid_operation', 'index': index})
+        if op == 'clear':
+            operations.append((op, None, 0))
+            continue
+        try:
+            product_id = int(raw.get('product_id'))
+            quantity = int(raw.get('quantity', 1 if op == 'add' else 0))
+        except (TypeError, ValueError):
+            raise CartBatchError({'error': 'invalid_operation', 'index': index})
+        if (op == 'add' and quantity <= 0) or quantity < 0:
+            raise CartBatchError({'error': 'invalid_quantity', 'index': index})
+        operations.append((op, product_id, quantity))
+    return operations
+
+
+def plan_cart_lines(lines, operations, products):
+    """
+    {product_id: quantity} after applying `operations` to `lines`.
+
+    `products` maps id -> Product for every product the operations name. Every
+    line an operation touched is checked against stock once, at its final
+    quantity, so a batch is accepted or rejected as a whole.
+    """
+    planned = dict(lines)
+    touched = {}
+    for index, (op, product_id, quantity) in enumerate(operations):
+        if op == 'clear':
+            planned.clear()
+            continue
+        if op == 'remove' or (op == 'set' and quantity == 0):
+            planned.pop(product_id, None)
+            continue
+        product = products.get(product_id)
+        if product is None:
+            raise CartBatchError({'error': 'product_not_found', 'index': index, 'product_id': product_id})
+        if not product.is_active:
+            raise CartBatchError({'error': 'product_inactive', 'index': index, 'product_id': product_id})
+        planned[product_id] = quantity + (planned.get(product_id, 0) if op == 'add' else 0)
+        touched[product_id] = index
+    for product_id, index in touched.items():
+        product = products[product_id]
+        if product_id in planned and not product.is_digital and planned[product_id] > product.stock:
+            raise CartBatchError({
+                'error': 'insufficient_stock',
+                'index': index,
+                'product_id': product_id,
+                'detail': f'Only {product.stock} item(s) available.',
+                'available_stock': product.stock,
+            })
+    return planned
+
+
+def _session_cart_ttl():
+    return int(getattr(settings, 'STORE_CART_CACHE_TTL_SECONDS', 60 * 60 * 24 * 30))
+
+
+class SessionCart:
+    def __init__(self, session):
+        self.session = session
+        self.token = session.get(SESSION_CART_TOKEN_KEY)
+        self.lines = self._load()
+
+    def __len__(self):
+        return len(self.lines)
+
+    def _cache_key(self):
+        return f'{SESSION_CART_CACHE_PREFIX}{self.token}'
+
+    def _load(self):
+        if not self.token:
+            return {}
+        stored = cache.get(self._cache_key()) or {}
+        return {int(product_id): int(quantity) for product_id, quantity in stored.items() if int(quantity) > 0}
+
+    def save(self):
+        if not self.lines:
+            if self.token:
+                cache.delete(self._cache_key())
+            return
+        if not self.token:
+            self.token = secrets.token_urlsafe(24)
+            self.session[SESSION_CART_TOKEN_KEY] = self.token
+        cache.set(self._cache_key(), self.lines, _session_cart_ttl())
+
+    def discard(self):
+        if self.token:
+            cache.delete(self._cache_key())
+            self.session.pop(SESSION_CART_TOKEN_KEY, None)
+            self.token = None
+        self.lines = {}
+
+    def quantity(self, product_id):
+        return self.lines.get(int(product_id), 0)
+
+    def set_quantity(self, product_id, quantity):
+        if quantity <= 0:
+            self.lines.pop(int(product_id), None)
+        else:
+            self.lines[int(product_id)] = int(quantity)
+        self.save()
+
+    def remove(self, product_id):
+        """Drop one line; False when the product was not in the cart."""
+        if self.lines.pop(int(product_id), None) is None:
+            return False
+        self.save()
+        return True
+
+    def clear(self):
+        removed = len(self.lines)
+        self.lines = {}
+        self.save()
+        return removed
+
+    def items(self):
+        """Unsaved `CartItem`s (id = product id) in the order lines were added; inactive products are left out."""
+        products = cart_product_queryset().filter(is_active=True).in_bulk(list(self.lines))
+        return [
+            CartItem(id=product_id, product=products[product_id], quantity=quantity)
+            for product_id, quantity in self.lines.items()
+            if product_id in products
+        ]
+
+
+def virtual_cart_payload(request, items=()):
+    """The `CartSerializer` shape for a cart that has no row."""
+    from .serializers import CartItemSerializer
+
+    items = list(items)
+    user = request.user
+    return {
+        'id': None,
+        'user': user.id if user.is_authenticated else None,
+        'session_key': request.session.session_key,
+        'items': CartItemSerializer(items, many=True, context={'request': request}).data,
+        'total': sum((item.subtotal for item in items), Decimal('0.00')),
+    }
+
+
+def _add_lines(cart, lines, cap_to_stock=False):
+    products = Product.objects.filter(is_active=True).in_bulk(list(lines))
+    existing = {item.product_id: item for item in cart.items.filter(product_id__in=list(products))}
+    for product_id, quantity in lines.items():
+        product = products.get(product_id)
+        if product is None:
+            continue
+        item = existing.get(product_id)
+        next_qty = quantity + (item.quantity if item else 0)
+        if cap_to_stock and not product.is_digital:
+            next_qty = min(next_qty, max(int(product.stock), 0))
+        if next_qty <= 0:
+            continue
+        if item:
+            item.quantity = next_qty
+            item.save(update_fields=['quantity'])
+        else:
+            CartItem.objects.create(cart=cart, product=product, quantity=next_qty)
+
+
+def materialize_session_cart(request):
+    """Write the visitor's cached cart to the cart tables for checkout; None when it is empty."""
+    session_cart = SessionCart(request.session)
+    if not session_cart.lines:
+        return None
+    if not request.session.session_key:
+        request.session.save()
+    with transaction.atomic():
+        cart = Cart.objects.create(session_key=request.session.session_key)
+        _add_lines(cart, session_cart.lines)
+    request.session['cart_id'] = cart.id
+    session_cart.discard()
+    logger.info('cart.materialize cart_id=%s items=%s', cart.id, cart.items.count())
+    return cart
+
+
+def merge_session_cart_into_user(request, user):
+    """Fold the cached cart into the user's cart at login (quantities add, capped at stock)."""
+    session = getattr(request, 'session', None)
+    if session is None or not session.get(SESSION_CART_TOKEN_KEY):
+        return None
+    session_cart = SessionCart(session)
+    if not session_cart.lines:
+        session_cart.discard()
+        return None
+    with transaction.atomic():
+        cart = Cart.objects.filter(id=session.get('cart_id'), user=user).first() if session.get('cart_id') else None
+        cart = cart or Cart.objects.filter(user=user).order_by('-updated_at').first()
+        if cart is None:
+            cart = Cart.objects.create(user=user, session_key=session.session_key)
+        _add_lines(cart, session_cart.lines, cap_to_stock=True)
+    session['cart_id'] = cart.id
+    logger.info('cart.merge user_id=%s cart_id=%s lines=%s', user.id, cart.id, len(session_cart))
+    session_cart.discard()
+    return cart
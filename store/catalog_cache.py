@@ -0,0 +1,257 @@
+"""
+Versioned response cache and conditional GET for public catalog reads.
+
+Cached payloads are keyed by host + path + normalized query params + the current
+catalog version. Any catalog write bumps the version (see `signals.py` and the
+bulk admin actions), which orphans every cached payload at once; stale entries
+simply age out via the TTL.
+
+The same version doubles as a strong ETag, so repeat visitors get `304 Not
+Modified` before the cache or serializers are touched. Non-catalog endpoints
+(pages, shipping) use `conditional_get` with their own cheap validators.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max
+from django.dispatch import Signal
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .models import Category, HomeHeroSlide, Product
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'store:catalog:version'
+CATALOG_MODIFIED_KEY = 'store:catalog:modified'
+CATALOG_CACHE_PREFIX = 'store:catalog:resp'
+CATALOG_CACHE_HEADER = 'X-Catalog-Cache'
+# Query params that never change the payload (analytics tags, cache busters).
+CATALOG_CACHE_IGNORED_PARAMS = {'_', 'fbclid', 'gclid'}
+CATALOG_CACHE_IGNORED_PARAM_PREFIXES = ('utm_',)
+
+# Sent after every version bump so derived artifacts (e.g. the home payload) can rebuild.
+catalog_version_bumped = Signal()
+
+
+def catalog_cache_ttl() -> int:
+    try:
+        return max(0, int(getattr(settings, 'STORE_CATALOG_CACHE_TTL', 300)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_catalog_version() -> int:
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter can never reuse an old version.
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return int(version or 0)
+
+
+def _latest_catalog_update() -> int:
+    stamps = [
+        model.objects.aggregate(latest=Max('updated_at'))['latest']
+        for model in (Product, Category, HomeHeroSlide)
+    ]
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return int(max(stamps).timestamp()) if stamps else int(time.time())
+
+
+def get_catalog_last_modified() -> int:
+    """Epoch seconds of the last catalog write, seeded from `updated_at` columns."""
+    modified = cache.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        cache.add(CATALOG_MODIFIED_KEY, _latest_catalog_update(), None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return int(modified or 0)
+
+
+def _incr_catalog_version():
+    try:
+        cache.set(CATALOG_MODIFIED_KEY, int(time.time()), None)
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        return get_catalog_version()
+    except Exception:
+        logger.exception('catalog_cache.version bump failed')
+        return None
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached catalog response.
+
+    Bumps immediately and again on commit, so a read racing an open transaction
+    cannot pin pre-commit data under the post-commit version.
+    """
+    _incr_catalog_version()
+    if connection.in_atomic_block:
+        transaction.on_commit(_incr_catalog_version)
+    catalog_version_bumped.send(sender=None)
+
+
+def _normalized_params(request):
+    items = []
+    for key, values in request.query_params.lists():
+        if key in CATALOG_CACHE_IGNORED_PARAMS or key.startswith(CATALOG_CACHE_IGNORED_PARAM_PREFIXES):
+            continue
+        cleaned = sorted(str(v).strip() for v in values if str(v).strip())
+        if cleaned:
+            items.append((key, cleaned))
+    return sorted(items)
+
+
+def _request_digest(request) -> str:
+    raw = '|'.join([
+        request.scheme,
+        request.get_host(),
+        request.path,
+        repr(_normalized_params(request)),
+    ])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def content_etag(*parts) -> str:
+    """Strong ETag from arbitrary validator parts (ids, timestamps, field values)."""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def not_modified_response(request, etag, last_modified):
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    django_request = getattr(request, '_request', request)
+    return get_conditional_response(django_request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if getattr(response, 'status_code', None) != 200:
+        return response
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Let browsers keep the body but always revalidate with the validators above.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def cached_catalog_response(request, namespace, build_response):
+    """
+    Answer `request` with 304, a cached payload, or `build_response()` (caching a 200).
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return build_response()
+
+    version = get_catalog_version()
+    digest = _request_digest(request)
+    etag = quote_etag(f'{namespace}-{version}-{digest[:16]}')
+    last_modified = get_catalog_last_modified()
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    ttl = catalog_cache_ttl()
+    if ttl <= 0:
+        return set_validators(build_response(), etag, last_modified)
+
+    key = f'{CATALOG_CACHE_PREFIX}:{namespace}:{version}:{digest}'
+    try:
+        cached = cache.get(key)
+    except Exception:
+        logger.exception('catalog_cache.get failed namespace=%s', namespace)
+        cached = None
+    if cached is not None:
+        response = Response(cached)
+        response[CATALOG_CACHE_HEADER] = 'hit'
+        return set_validators(response, etag, last_modified)
+
+    response = build_response()
+    if getattr(response, 'status_code', None) == 200 and hasattr(response, 'data'):
+        try:
+            cache.set(key, response.data, ttl)
+        except Exception:
+            logger.exception('catalog_cache.set failed namespace=%s', namespace)
+        response[CATALOG_CACHE_HEADER] = 'miss'
+    return set_validators(response, etag, last_modified)
+
+
+def cached_catalog_value(namespace, key_parts, build):
+    """Cache `build()` under the current catalog version and `key_parts` (any repr-able value)."""
+    ttl = catalog_cache_ttl()
+    if ttl <= 0:
+        return build()
+    digest = hashlib.sha1(repr(key_parts).encode('utf-8')).hexdigest()
+    key = f'{CATALOG_CACHE_PREFIX}:{namespace}:{get_catalog_version()}:{digest}'
+    try:
+        cached = cache.get(key)
+    except Exception:
+        logger.exception('catalog_cache.get failed namespace=%s', namespace)
+        cached = None
+    if cached is not None:
+        return cached
+    value = build()
+    try:
+        cache.set(key, value, ttl)
+    except Exception:
+        logger.exception('catalog_cache.set failed namespace=%s', namespace)
+    return value
+
+
+def catalog_cache(namespace):
+    """Decorator for DRF function views (apply below `@api_view`)."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            return cached_catalog_response(request, namespace, lambda: view_func(request, *args, **kwargs))
+        return wrapped
+    return decorator
+
+
+def conditional_get(validators):
+    """
+    Decorator for DRF function views (apply below `@api_view`).
+
+    `validators(request, *args, **kwargs)` returns `(etag, last_modified_epoch)`
+    from a cheap query; `(None, None)` skips conditional handling.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            etag, last_modified = validators(request, *args, **kwargs)
+            if etag is None and last_modified is None:
+                return view_func(request, *args, **kwargs)
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+            return set_validators(view_func(request, *args, **kwargs), etag, last_modified)
+        return wrapped
+    return decorator
+
+
+class CatalogCacheMixin:
+    """Caches `list` and `retrieve` on read-only catalog viewsets."""
+    catalog_cache_namespace = 'catalog'
+
+    def list(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            request,
+            f'{self.catalog_cache_namespace}:list',
+            lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            request,
+            f'{self.catalog_cache_namespace}:detail',
+            lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs),
+        )
@@ -0,0 +1,86 @@
+"""
+Denormalized `Category.active_product_count`.
+
+Counts are adjusted incrementally with `F()` updates from the signals in
+`signals.py` (membership changes, `Product.is_active` transitions, deletes) and
+from `set_products_active` for bulk admin actions. `recount_category_products`
+rebuilds them exactly; the `recount_category_products` command reports drift.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Category, Product
+
+CategoryMembership = Product.categories.through
+
+
+def adjust_category_counts(category_ids, delta):
+    """Add `delta` to each category's counter (never below zero)."""
+    ids = {int(pk) for pk in (category_ids or []) if pk}
+    if not ids or not delta:
+        return 0
+    return Category.objects.filter(id__in=ids).update(
+        active_product_count=Greatest(F('active_product_count') + delta, Value(0))
+    )
+
+
+def adjust_category_counts_by(counts, sign=1):
+    """Apply a {category_id: n} mapping, batching categories that share the same n."""
+    by_delta = {}
+    for category_id, n in (counts or {}).items():
+        if n:
+            by_delta.setdefault(n * sign, []).append(category_id)
+    for delta, category_ids in by_delta.items():
+        adjust_category_counts(category_ids, delta)
+
+
+def product_category_ids(product_ids):
+    return list(
+        CategoryMembership.objects.filter(product_id__in=product_ids).values_list('category_id', flat=True)
+    )
+
+
+def set_products_active(queryset, is_active):
+    """Bulk `is_active` update that keeps category counters in step. Returns rows updated."""
+    with transaction.atomic():
+        changing = list(queryset.exclude(is_active=is_active).values_list('id', flat=True))
+        updated = queryset.update(is_active=is_active, updated_at=timezone.now())
+        counts = Counter(product_category_ids(changing))
+        adjust_category_counts_by(counts, 1 if is_active else -1)
+    return updated
+
+
+def _active_count_subquery():
+    return Coalesce(
+        Subquery(
+            CategoryMembership.objects.filter(category_id=OuterRef('pk'), product__is_active=True)
+            .order_by()
+            .values('category_id')
+            .annotate(total=Count('product_id'))
+            .values('total')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def category_count_drift():
+    """[(category_id, stored, actual)] for categories whose counter is wrong."""
+    rows = (
+        Category.objects.annotate(actual=Count('products', filter=Q(products__is_active=True)))
+        .values_list('id', 'active_product_count', 'actual')
+        .order_by('id')
+    )
+    return [(pk, stored, actual) for pk, stored, actual in rows if stored != actual]
+
+
+def recount_category_products(category_ids=None):
+    """Recompute counters exactly in one UPDATE. Returns rows updated."""
+    qs = Category.objects.all()
+    if category_ids is not None:
+        qs = qs.filter(id__in=list(category_ids))
+    return qs.update(active_product_count=_active_count_subquery())
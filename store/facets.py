@@ -0,0 +1,100 @@
+"""
+Facet counts for catalog listings.
+
+Scalar facets (price buckets, availability, flash sale, digital/physical,
+rating bands) come from a single conditional aggregate over the filtered
+product ids; category counts from one grouped query over memberships. Callers
+cache the result per catalog version and normalized filter set.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Product
+
+# Params that narrow a listing; everything else (cursor, page size, view, fields, sort) does not change facets.
+FACET_FILTER_PARAMS = (
+    'q', 'search', 'category', 'featured', 'min_price', 'max_price', 'in_stock', 'rating_gte',
+    'tags', 'tags_mode', 'features', 'features_mode', 'benefits', 'benefits_mode',
+)
+RATING_BANDS = (4, 3, 2, 1)
+TRUTHY_VALUES = ('1', 'true', 'yes')
+# Digital products never run out; matches `ProductSerializer.get_in_stock`.
+IN_STOCK_Q = Q(is_digital=True) | Q(stock__gt=0)
+
+
+def parse_decimal(value):
+    try:
+        parsed = Decimal(str(value).strip())
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return parsed if parsed.is_finite() else None
+
+
+def price_bucket_edges():
+    edges = getattr(settings, 'STORE_FACET_PRICE_BUCKETS', (0, 10, 25, 50, 100, 250))
+    return sorted({Decimal(str(edge)) for edge in edges})
+
+
+def facet_filter_key(query_params):
+    """Normalized filter set, used as the facet cache key."""
+    items = []
+    for name in FACET_FILTER_PARAMS:
+        values = sorted(str(v).strip().lower() for v in query_params.getlist(name) if str(v).strip())
+        if values:
+            items.append((name, values))
+    return tuple(items)
+
+
+def _price_ranges():
+    edges = price_bucket_edges()
+    return [(low, edges[i + 1] if i + 1 < len(edges) else None) for i, low in enumerate(edges)]
+
+
+def product_facets(queryset):
+    products = Product.objects.filter(pk__in=queryset.order_by().values('pk'))
+
+    aggregates = {
+        'total': Count('id'),
+        'in_stock': Count('id', filter=IN_STOCK_Q),
+        'flash_sale': Count('id', filter=Q(is_flash_sale=True)),
+        'digital': Count('id', filter=Q(is_digital=True)),
+    }
+    price_ranges = _price_ranges()
+    for index, (low, high) in enumerate(price_ranges):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        aggregates[f'price_{index}'] = Count('id', filter=condition)
+    for band in RATING_BANDS:
+        aggregates[f'rating_{band}'] = Count('id', filter=Q(rating__gte=band))
+    counts = products.aggregate(**aggregates)
+
+    category_rows = (
+        Product.categories.through.objects.filter(product_id__in=products.values('pk'), category__is_active=True)
+        .values('category__slug', 'category__name')
+        .annotate(count=Count('product_id', distinct=True))
+        .order_by('-count', 'category__name')
+    )
+
+    total = counts['total']
+    return {
+        'total': total,
+        'categories': [
+            {'slug': row['category__slug'], 'name': row['category__name'], 'count': row['count']}
+            for row in category_rows
+        ],
+        'price': [
+            {
+                'min': str(low),
+                'max': str(high) if high is not None else None,
+                'count': counts[f'price_{index}'],
+            }
+            for index, (low, high) in enumerate(price_ranges)
+        ],
+        'availability': {'in_stock': counts['in_stock'], 'out_of_stock': total - counts['in_stock']},
+        'flash_sale': {'true': counts['flash_sale'], 'false': total - counts['flash_sale']},
+        'product_type': {'digital': counts['digital'], 'physical': total - counts['digital']},
+        'rating': [{'gte': band, 'count': counts[f'rating_{band}']} for band in RATING_BANDS],
+    }
@@ -0,0 +1,166 @@
+"""
+Prebuilt landing-page payload.
+
+Hero slides, categories, featured and flash-sale product cards and the storefront
+theme are rendered once per (catalog version, site base URL) into a single JSON
+blob in the cache. `home_content` answers with a 304 on a matching version ETag,
+or with one cache read otherwise. Catalog writes enqueue `warm_home_payload`
+when async tasks are enabled; without a worker the blob is rebuilt lazily on
+the first request after a change.
+
+Absolute URLs in the blob follow the request host, so a request that has to
+build its blob records that base URL; warm-ups rebuild every recorded base URL
+(or the configured public site URL before any request has been seen), so they
+write the keys requests actually read.
+"""
+import hashlib
+import logging
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.http import quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .catalog_cache import get_catalog_version, not_modified_response, set_validators
+from .email_react import get_public_site_url
+from .models import Category, HomeHeroSlide, Product
+from .serializers import CategorySerializer, HomeHeroSlideSerializer, ProductCardSerializer
+
+logger = logging.getLogger(__name__)
+
+HOME_PAYLOAD_PREFIX = 'store:home:payload'
+HOME_PAYLOAD_WARM_PENDING_KEY = 'store:home:warm-pending'
+HOME_PAYLOAD_BASE_URLS_KEY = 'store:home:base-urls'
+HOME_PAYLOAD_MAX_BASE_URLS = 8
+HOME_PAYLOAD_PRODUCT_LIMIT = 8
+# Coalesce bursts of catalog writes (CSV imports, bulk actions) into one rebuild.
+HOME_PAYLOAD_WARM_DELAY_SECONDS = 2
+
+
+class _BaseUrlRequest:
+    """Stand-in for `request` in serializer context: only absolutizes URLs."""
+
+    def __init__(self, base_url):
+        self.base_url = f"{str(base_url or '').rstrip('/')}/"
+
+    def build_absolute_uri(self, location='/'):
+        return urljoin(self.base_url, str(location or '/'))
+
+
+def home_payload_ttl() -> int:
+    try:
+        return max(60, int(getattr(settings, 'STORE_HOME_PAYLOAD_TTL', 86400)))
+    except (TypeError, ValueError):
+        return 86400
+
+
+def _base_url_digest(base_url) -> str:
+    return hashlib.sha1(str(base_url or '').encode('utf-8')).hexdigest()[:16]
+
+
+def home_payload_key(base_url, version) -> str:
+    return f'{HOME_PAYLOAD_PREFIX}:{version}:{_base_url_digest(base_url)}'
+
+
+def home_payload_etag(version, base_url) -> str:
+    return quote_etag(f'home-{version}-{_base_url_digest(base_url)}')
+
+
+def remember_home_payload_base_url(base_url):
+    """Record a base URL requests read, most recent first, for warm-ups."""
+    try:
+        known = [url for url in (cache.get(HOME_PAYLOAD_BASE_URLS_KEY) or []) if url != base_url]
+        cache.set(HOME_PAYLOAD_BASE_URLS_KEY, ([base_url] + known)[:HOME_PAYLOAD_MAX_BASE_URLS], None)
+    except Exception:
+        logger.exception('home_payload.remember_base_url failed')
+
+
+def home_payload_base_urls():
+    return list(cache.get(HOME_PAYLOAD_BASE_URLS_KEY) or []) or [get_public_site_url()]
+
+
+def build_home_payload(base_url) -> dict:
+    from .views import STOREFRONT_THEME_CHOICES, _get_storefront_theme_value
+
+    context = {'request': _BaseUrlRequest(base_url)}
+    hero_slides = HomeHeroSlide.objects.filter(is_active=True).order_by('sort_order', 'id')
+    categories = Category.objects.filter(is_active=True).order_by('name')
+    card_columns = ProductCardSerializer.required_columns(ProductCardSerializer.resolve_field_names())
+    cards = Product.objects.filter(is_active=True).only(*card_columns).order_by('-created_at', 'id')
+    return {
+        'hero_slides': HomeHeroSlideSerializer(hero_slides, many=True, context=context).data,
+        'categories': CategorySerializer(categories, many=True, context=context).data,
+        'featured_products': ProductCardSerializer(
+            cards.filter(is_featured=True)[:HOME_PAYLOAD_PRODUCT_LIMIT], many=True, context=context
+        ).data,
+        'flash_sale_products': ProductCardSerializer(
+            cards.filter(is_flash_sale=True)[:HOME_PAYLOAD_PRODUCT_LIMIT], many=True, context=context
+        ).data,
+        'theme': _get_storefront_theme_value(),
+        'available_themes': sorted(STOREFRONT_THEME_CHOICES),
+    }
+
+
+def get_home_payload_body(base_url, version=None, remember=False) -> bytes:
+    """Serialized payload for the version, built and stored on a cache miss."""
+    version = get_catalog_version() if version is None else version
+    key = home_payload_key(base_url, version)
+    try:
+        body = cache.get(key)
+    except Exception:
+        logger.exception('home_payload.get failed version=%s', version)
+        body = None
+    if body is None:
+        if remember:
+            remember_home_payload_base_url(base_url)
+        body = JSONRenderer().render(build_home_payload(base_url))
+        try:
+            cache.set(key, body, home_payload_ttl())
+        except Exception:
+            logger.exception('home_payload.set failed version=%s', version)
+    return body
+
+
+def home_payload_response(request):
+    version = get_catalog_version()
+    base_url = get_public_site_url(request)
+    etag = home_payload_etag(version, base_url)
+    not_modified = not_modified_response(request, etag, None)
+    if not_modified is not None:
+        return not_modified
+    body = get_home_payload_body(base_url, version, remember=True)
+    return set_validators(HttpResponse(body, content_type='application/json'), etag, None)
+
+
+def warm_home_payload(base_url=None):
+    """Build the current version's payloads that are not cached yet; True if any was built."""
+    cache.delete(HOME_PAYLOAD_WARM_PENDING_KEY)
+    version = get_catalog_version()
+    built = False
+    for url in ([base_url] if base_url else home_payload_base_urls()):
+        if cache.get(home_payload_key(url, version)) is not None:
+            continue
+        get_home_payload_body(url, version)
+        built = True
+    return built
+
+
+def schedule_home_payload_rebuild():
+    """Enqueue one warm-up task after commit when async tasks are enabled."""
+    if not getattr(settings, 'STORE_METADATA_ASYNC', False):
+        return
+    if not cache.add(HOME_PAYLOAD_WARM_PENDING_KEY, 1, 60):
+        return
+
+    def _enqueue():
+        try:
+            from .tasks import warm_home_payload_task
+            warm_home_payload_task.apply_async(countdown=HOME_PAYLOAD_WARM_DELAY_SECONDS)
+        except Exception:
+            cache.delete(HOME_PAYLOAD_WARM_PENDING_KEY)
+            logger.exception('home_payload.schedule failed')
+
+    transaction.on_commit(_enqueue)
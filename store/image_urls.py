@@ -0,0 +1,291 @@
+"""
+Image URL resolution shared by serializers, emails, admin previews and commands.
+
+`ImageUrlResolver` reads the Cloudinary configuration once and memoizes the
+request-independent URL of every stored image, keyed on (storage, name,
+upload_to). Only the final `build_absolute_uri` for relative URLs happens per
+request. The shared instance is rebuilt when media/Cloudinary settings change.
+"""
+import os
+from functools import lru_cache
+from urllib.parse import urlparse, quote, unquote
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+IMAGE_URL_CACHE_SIZE = 4096
+IMAGE_URL_SETTINGS = {'CLOUDINARY_STORAGE', 'MEDIA_URL', 'STORAGES', 'USE_CLOUDINARY_MEDIA'}
+
+
+def read_cloudinary_cloud_name() -> str:
+    """Cloud name from CLOUDINARY_STORAGE or CLOUDINARY_URL; '' when unset or a placeholder."""
+    def _clean_cloud_name(value: str) -> str:
+        candidate = str(value or '').strip()
+        if not candidate:
+            return ''
+        lowered = unquote(candidate).strip().lower()
+        if '<' in lowered or '>' in lowered:
+            return ''
+        if lowered in {'cloud_name', 'your_cloud_name', 'replace_me'}:
+            return ''
+        return candidate
+
+    storage_cfg = getattr(settings, 'CLOUDINARY_STORAGE', {}) or {}
+    cloud_name = _clean_cloud_name(storage_cfg.get('CLOUD_NAME'))
+    if cloud_name:
+        return cloud_name
+    cloudinary_url = str(os.environ.get('CLOUDINARY_URL') or '').strip().strip('"').strip("'")
+    if cloudinary_url.lower().startswith('cloudinary_url='):
+        cloudinary_url = cloudinary_url.split('=', 1)[1].strip().strip('"').strip("'")
+    if not cloudinary_url:
+        return ''
+    try:
+        parsed = urlparse(cloudinary_url)
+        if parsed.scheme == 'cloudinary':
+            return _clean_cloud_name(parsed.hostname)
+    except Exception:
+        return ''
+    return ''
+
+
+def _extract_cloudinary_public_id(path: str) -> str:
+    path = str(path or '').replace('\\', '/')
+    marker = '/image/upload/'
+    lowered = path.lower()
+    if marker in lowered:
+        idx = lowered.find(marker)
+        tail = path[idx + len(marker):].lstrip('/')
+    else:
+        segments = [seg for seg in path.split('/') if seg]
+        tail = '/'.join(segments[1:]) if len(segments) > 1 else ''
+
+    if tail.startswith('v') and '/' in tail:
+        version, remainder = tail.split('/', 1)
+        if version[1:].isdigit():
+            tail = remainder
+    return unquote(tail).lstrip('/')
+
+
+class ImageUrlResolver:
+    def __init__(self, cloud_name=None, cache_size=IMAGE_URL_CACHE_SIZE):
+        self.cloud_name = read_cloudinary_cloud_name() if cloud_name is None else str(cloud_name or '')
+        self.url_from_name = lru_cache(maxsize=cache_size)(self._build_url_from_name)
+        self._stored_url = lru_cache(maxsize=cache_size)(self._build_stored_url)
+
+    def cache_clear(self):
+        self.url_from_name.cache_clear()
+        self._stored_url.cache_clear()
+
+    def cache_info(self):
+        return {'url_from_name': self.url_from_name.cache_info(), 'stored_url': self._stored_url.cache_info()}
+
+    def normalize_delivery_url(self, url: str) -> str:
+        cleaned = str(url or '').strip()
+        if not cleaned:
+            return ''
+        try:
+            parsed = urlparse(cleaned)
+        except Exception:
+            return cleaned
+        if 'res.cloudinary.com' not in str(parsed.netloc or '').lower():
+            return cleaned
+
+        path = (parsed.path or '').replace('\\', '/')
+        # Keep delivered Cloudinary path as-is. We only normalize slashes and placeholders.
+        path_segments = [seg for seg in path.split('/') if seg]
+        current_cloud_name = unquote(path_segments[0]).strip() if path_segments else ''
+        cloud_name = self.cloud_name
+        is_placeholder_cloud = (
+            (not current_cloud_name)
+            or ('<' in current_cloud_name or '>' in current_cloud_name)
+            or (current_cloud_name.lower() in {'cloud_name', 'your_cloud_name', 'replace_me'})
+        )
+        if is_placeholder_cloud:
+            public_id = _extract_cloudinary_public_id(path)
+            if cloud_name and public_id:
+                return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(public_id, safe="/")}'
+            if public_id:
+                if public_id.startswith('media/'):
+                    public_id = public_id[len('media/'):]
+                return f'/media/{public_id}'
+            return ''
+
+        try:
+            return parsed._replace(path=path).geturl()
+        except Exception:
+            return cleaned
+
+    def _build_url_from_name(self, name: str, upload_prefix: str = '') -> str:
+        cleaned = str(name or '').strip().replace('\\', '/').lstrip('/')
+        prefix = str(upload_prefix or '').strip().replace('\\', '/').lstrip('/')
+        if prefix and not prefix.endswith('/'):
+            prefix = f'{prefix}/'
+        if not cleaned:
+            return ''
+        if cleaned.startswith('https:/') and not cleaned.startswith('https://'):
+            cleaned = cleaned.replace('https:/', 'https://', 1)
+        if cleaned.startswith('http:/') and not cleaned.startswith('http://'):
+            cleaned = cleaned.replace('http:/', 'http://', 1)
+        if cleaned.startswith('http://') or cleaned.startswith('https://') or cleaned.startswith('data:'):
+            if 'res.cloudinary.com/' in cleaned:
+                repaired = self.normalize_delivery_url(cleaned)
+                if repaired:
+                    cleaned = repaired
+                if cleaned.startswith('/'):
+                    return cleaned
+            # If a Cloudinary URL was stored without `/image/upload/`, normalize it.
+            if 'res.cloudinary.com/' in cleaned and '/image/upload/' not in cleaned:
+                try:
+                    parsed = urlparse(cleaned)
+                    parts = [p for p in parsed.path.split('/') if p]
+                    # /<cloud_name>/<public_id...>
+                    if len(parts) >= 2:
+                        cloud_name = parts[0]
+                        public_id = quote('/'.join(parts[1:]), safe='/')
+                        return f'{parsed.scheme}://{parsed.netloc}/{cloud_name}/image/upload/{public_id}'
+                except Exception:
+                    pass
+            return self.normalize_delivery_url(cleaned)
+        if cleaned.startswith('media/'):
+            cloud_name = self.cloud_name
+            media_relative = cleaned[len('media/'):]
+            if cloud_name and media_relative.startswith(('products/', 'categories/', 'hero/')):
+                return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(cleaned, safe="/")}'
+            return f'/{cleaned}'
+
+        if cleaned.startswith(('products/', 'categories/', 'hero/')):
+            cloud_name = self.cloud_name
+            if cloud_name:
+                return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(cleaned, safe="/")}'
+            return f'/media/{cleaned}'
+        if cleaned.startswith('res.cloudinary.com/'):
+            candidate = self.normalize_delivery_url(f'https://{cleaned}')
+            if candidate.startswith('/'):
+                return candidate
+            if candidate:
+                cleaned = candidate
+            candidate = f'https://{cleaned}'
+            if '/image/upload/' not in candidate:
+                try:
+                    parsed = urlparse(candidate)
+                    parts = [p for p in parsed.path.split('/') if p]
+                    if len(parts) >= 2:
+                        cloud_name = parts[0]
+                        public_id = quote('/'.join(parts[1:]), safe='/')
+                        return f'https://{parsed.netloc}/{cloud_name}/image/upload/{public_id}'
+                except Exception:
+                    pass
+            return candidate
+
+        # Cloudinary often stores a public_id in the field value; construct delivery URL.
+        if prefix and '/' not in cleaned and cleaned.lower().endswith(
+            ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.svg', '.avif')
+        ):
+            cleaned = f'{prefix}{cleaned}'
+        cloud_name = self.cloud_name
+        if cloud_name:
+            return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(cleaned, safe="/")}'
+        if prefix and '/' not in cleaned:
+            cleaned = f'{prefix}{cleaned}'
+        return f'/media/{cleaned}'
+
+    def _build_stored_url(self, storage, raw_name: str, upload_prefix: str) -> str:
+        raw_url = ''
+        try:
+            raw_url = str(storage.url(raw_name) or '').strip() if raw_name else ''
+        except Exception:
+            raw_url = ''
+
+        normalized_name = raw_name.replace('\\', '/').lstrip('/')
+
+        # For Cloudinary, use name-based fallback only when the URL is clearly
+        # placeholder/broken or misses the `media/` namespace present in stored name.
+        if (
+            raw_url.startswith(('http://', 'https://'))
+            and 'res.cloudinary.com/' in raw_url
+            and normalized_name
+        ):
+            name_based_url = self.url_from_name(
+                normalized_name, upload_prefix=upload_prefix
+            )
+            if name_based_url.startswith(('http://', 'https://')):
+                raw_lower = raw_url.lower()
+                needs_name_based_repair = (
+                    '<cloud_name>' in raw_lower
+                    or '%3ccloud_name%3e' in raw_lower
+                    or 'your_cloud_name' in raw_lower
+                )
+                if needs_name_based_repair:
+                    return name_based_url
+
+        # If storage returns another absolute URL, keep it unchanged.
+        if raw_url.startswith(('http://', 'https://')):
+            return raw_url
+
+        url = self.url_from_name(
+            raw_url, upload_prefix=upload_prefix
+        ) if raw_url else ''
+
+        if not url:
+            url = self.url_from_name(
+                normalized_name,
+                upload_prefix=upload_prefix
+            )
+        return url or ''
+
+    def stored_url(self, field_file) -> str:
+        """Request-independent URL for an image field value (relative for local media)."""
+        if not field_file:
+            return ''
+
+        upload_prefix = ''
+        try:
+            upload_prefix = str(
+                getattr(getattr(field_file, 'field', None), 'upload_to', '') or ''
+            ).strip()
+        except Exception:
+            upload_prefix = ''
+
+        raw_name = ''
+        try:
+            raw_name = str(getattr(field_file, 'name', '') or '').strip()
+        except Exception:
+            raw_name = ''
+
+        storage = getattr(field_file, 'storage', None)
+        if storage is None:
+            return ''
+        return self._stored_url(storage, raw_name, upload_prefix)
+
+    def resolve(self, field_file, request=None) -> str:
+        url = self.stored_url(field_file)
+        if request and url.startswith('/'):
+            return request.build_absolute_uri(url)
+        return url
+
+
+_resolver = None
+
+
+def get_image_url_resolver() -> ImageUrlResolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = ImageUrlResolver()
+    return _resolver
+
+
+def reset_image_url_resolver():
+    """Drop the shared resolver (e.g. after CLOUDINARY_URL changes at runtime)."""
+    global _resolver
+    _resolver = None
+
+
+def resolve_image_url(field_file, request=None) -> str:
+    return get_image_url_resolver().resolve(field_file, request)
+
+
+@receiver(setting_changed)
+def _reset_resolver_on_setting_changed(setting, **kwargs):
+    if setting in IMAGE_URL_SETTINGS:
+        reset_image_url_resolver()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.image_urls import ImageUrlResolver
+from store.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = "Measure per-call cost of image URL resolution, cold (no memoization) vs warm (memoized)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000, help="Resolve calls per run.")
+        parser.add_argument("--sample", type=int, default=200, help="Product images to cycle through.")
+
+    def handle(self, *args, **options):
+        iterations = max(1, int(options["iterations"]))
+        images = [row.image for row in ProductImage.objects.exclude(image="")[: max(1, int(options["sample"]))]]
+        if not images:
+            # Synthetic names keep the benchmark usable on an empty database.
+            field = ProductImage._meta.get_field("image")
+            images = [field.attr_class(ProductImage(), field, f"products/bench-{i}.jpg") for i in range(50)]
+
+        cold = ImageUrlResolver()
+        cold_seconds = self._run(lambda f: (cold.cache_clear(), cold.resolve(f)), images, iterations)
+        warm = ImageUrlResolver()
+        for field_file in images:
+            warm.resolve(field_file)
+        warm_seconds = self._run(warm.resolve, images, iterations)
+
+        self.stdout.write(f"images={len(images)} iterations={iterations} cloud_name={warm.cloud_name or '-'}")
+        self.stdout.write(f"cold: {cold_seconds / iterations * 1e6:.2f} us/call")
+        self.stdout.write(f"warm: {warm_seconds / iterations * 1e6:.2f} us/call")
+        if warm_seconds:
+            self.stdout.write(self.style.SUCCESS(f"speedup: {cold_seconds / warm_seconds:.1f}x"))
+
+    @staticmethod
+    def _run(resolve, images, iterations) -> float:
+        count = len(images)
+        started = time.perf_counter()
+        for i in range(iterations):
+            resolve(images[i % count])
+        return time.perf_counter() - started
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from store.recommendations import rebuild_related_products, update_related_products
+
+
+class Command(BaseCommand):
+    help = "Fold newly paid orders into the frequently-bought-together tables (incremental by order id)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Drop all co-purchase counts and recount every paid order.",
+        )
+        parser.add_argument(
+            "--batch-orders",
+            type=int,
+            default=500,
+            help="Order id range processed per transaction (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        runner = rebuild_related_products if options["full"] else update_related_products
+        summary = runner(batch_orders=options["batch_orders"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {summary['orders']} paid order(s); refreshed {summary['products']} product(s); "
+                f"watermark at order {summary['last_order_id']}."
+            )
+        )
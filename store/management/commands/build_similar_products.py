@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from store.similar_products import rebuild_similar_products
+
+
+class Command(BaseCommand):
+    help = "Rebuild TF-IDF text vectors and content-similar neighbour lists for the whole active catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=256,
+            help="Products scored and written per batch (default: 256).",
+        )
+
+    def handle(self, *args, **options):
+        summary = rebuild_similar_products(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt similar-product lists for {summary['products']} product(s)."))
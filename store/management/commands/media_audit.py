@@ -8,7 +8,7 @@ from django.core.management.base import BaseCommand
 
 from store.email_react import get_public_site_url
 from store.models import Category, HomeHeroSlide, ProductImage
-from store.serializers import _resolve_image_url
+from store.image_urls import resolve_image_url
 
 
 def _absolute_url(value: str) -> str:
@@ -87,7 +87,7 @@ class Command(BaseCommand):
                 kind="product",
                 object_id=row.pk,
                 label=product_name,
-                raw_url=_resolve_image_url(getattr(row, "image", None), request=None),
+                raw_url=resolve_image_url(getattr(row, "image", None), request=None),
                 timeout=timeout,
             )
 
@@ -100,7 +100,7 @@ class Command(BaseCommand):
                 kind="category",
                 object_id=row.pk,
                 label=row.name,
-                raw_url=_resolve_image_url(getattr(row, "image", None), request=None),
+                raw_url=resolve_image_url(getattr(row, "image", None), request=None),
                 timeout=timeout,
             )
 
@@ -113,7 +113,7 @@ class Command(BaseCommand):
                 kind="hero",
                 object_id=row.pk,
                 label=row.title,
-                raw_url=_resolve_image_url(getattr(row, "image", None), request=None),
+                raw_url=resolve_image_url(getattr(row, "image", None), request=None),
                 timeout=timeout,
             )
 
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from store.models import Product
+from store.search import refresh_search_documents, search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild product search documents (and the native full-text index that mirrors them)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Products refreshed per batch.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, int(options["batch_size"] or 500))
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+        refreshed = 0
+        for start in range(0, len(product_ids), batch_size):
+            refreshed += refresh_search_documents(product_ids[start:start + batch_size])
+        backend = search_backend() or "legacy icontains"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {len(product_ids)} product(s); refreshed {refreshed} search document(s). Backend: {backend}."
+            )
+        )
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.category_counters import category_count_drift, recount_category_products
+
+
+class Command(BaseCommand):
+    help = "Recount Category.active_product_count from product memberships, or report drift with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report categories whose stored counter is wrong; exit non-zero on drift.",
+        )
+
+    def handle(self, *args, **options):
+        drift = category_count_drift()
+        for category_id, stored, actual in drift:
+            self.stdout.write(f"category_id={category_id} stored={stored} actual={actual}")
+
+        if options["check"]:
+            if drift:
+                raise CommandError(f"{len(drift)} category counter(s) drifted.")
+            self.stdout.write(self.style.SUCCESS("All category counters match."))
+            return
+
+        updated = recount_category_products()
+        self.stdout.write(
+            self.style.SUCCESS(f"Recounted {updated} category counter(s); fixed {len(drift)} drifted value(s).")
+        )
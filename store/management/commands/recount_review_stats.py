@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.review_stats import recount_review_stats, review_stats_drift
+
+
+class Command(BaseCommand):
+    help = "Recount product rating histograms (and review_count/rating) from approved reviews, or report drift with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report products whose stored histogram is wrong; exit non-zero on drift.",
+        )
+
+    def handle(self, *args, **options):
+        drift = review_stats_drift()
+        for product_id, stored, actual in drift:
+            self.stdout.write(f"product_id={product_id} stored={list(stored)} actual={list(actual)}")
+
+        if options["check"]:
+            if drift:
+                raise CommandError(f"{len(drift)} product histogram(s) drifted.")
+            self.stdout.write(self.style.SUCCESS("All product rating histograms match."))
+            return
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All product rating histograms match; nothing to recount."))
+            return
+        updated = recount_review_stats(product_id for product_id, _stored, _actual in drift)
+        self.stdout.write(self.style.SUCCESS(f"Recounted {updated} drifted product histogram(s)."))
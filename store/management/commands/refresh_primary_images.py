@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.primary_images import refresh_all_primary_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-resolve every product's stored primary image URL and variants with the current media/Cloudinary "
+        "settings, or report stale products with --check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report how many products have a stale stored image; exit non-zero if any do.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            stale = refresh_all_primary_images(apply=False)
+            if stale:
+                raise CommandError(f"{stale} product primary image(s) are stale.")
+            self.stdout.write(self.style.SUCCESS("All stored primary images match."))
+            return
+
+        updated = refresh_all_primary_images()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {updated} product primary image(s)."))
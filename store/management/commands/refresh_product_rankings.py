@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from store.rankings import refresh_product_rankings
+
+
+class Command(BaseCommand):
+    help = "Recompute best-seller and trending rankings from paid orders."
+
+    def handle(self, *args, **options):
+        summary = refresh_product_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(f"Ranked {summary['products']} product(s) into {summary['rows']} ranking row(s).")
+        )
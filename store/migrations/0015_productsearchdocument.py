@@ -0,0 +1,130 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POSTGRES_FORWARD_SQL = [
+    """
+    ALTER TABLE store_productsearchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name_text, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(tags_text, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(category_text, '')), 'C')
+        || setweight(to_tsvector('simple', coalesce(description_text, '')), 'D')
+    ) STORED
+    """,
+    'CREATE INDEX store_productsearchdocument_vector_gin ON store_productsearchdocument USING GIN (search_vector)',
+]
+
+SQLITE_FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE store_product_fts USING fts5(
+        name_text, tags_text, category_text, description_text,
+        content='store_productsearchdocument', content_rowid='product_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER store_product_fts_ai AFTER INSERT ON store_productsearchdocument BEGIN
+        INSERT INTO store_product_fts(rowid, name_text, tags_text, category_text, description_text)
+        VALUES (new.product_id, new.name_text, new.tags_text, new.category_text, new.description_text);
+    END
+    """,
+    """
+    CREATE TRIGGER store_product_fts_ad AFTER DELETE ON store_productsearchdocument BEGIN
+        INSERT INTO store_product_fts(store_product_fts, rowid, name_text, tags_text, category_text, description_text)
+        VALUES ('delete', old.product_id, old.name_text, old.tags_text, old.category_text, old.description_text);
+    END
+    """,
+    """
+    CREATE TRIGGER store_product_fts_au AFTER UPDATE ON store_productsearchdocument BEGIN
+        INSERT INTO store_product_fts(store_product_fts, rowid, name_text, tags_text, category_text, description_text)
+        VALUES ('delete', old.product_id, old.name_text, old.tags_text, old.category_text, old.description_text);
+        INSERT INTO store_product_fts(rowid, name_text, tags_text, category_text, description_text)
+        VALUES (new.product_id, new.name_text, new.tags_text, new.category_text, new.description_text);
+    END
+    """,
+]
+
+SQLITE_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS store_product_fts_au',
+    'DROP TRIGGER IF EXISTS store_product_fts_ad',
+    'DROP TRIGGER IF EXISTS store_product_fts_ai',
+    'DROP TABLE IF EXISTS store_product_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for statement in POSTGRES_FORWARD_SQL:
+            schema_editor.execute(statement)
+    elif vendor == 'sqlite':
+        try:
+            for statement in SQLITE_FORWARD_SQL:
+                schema_editor.execute(statement)
+        except Exception:
+            # SQLite builds without FTS5 fall back to the legacy icontains search.
+            for statement in SQLITE_REVERSE_SQL:
+                schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS store_productsearchdocument_vector_gin')
+        schema_editor.execute('ALTER TABLE store_productsearchdocument DROP COLUMN IF EXISTS search_vector')
+    elif vendor == 'sqlite':
+        for statement in SQLITE_REVERSE_SQL:
+            schema_editor.execute(statement)
+
+
+def _join_text(values):
+    return ' '.join(str(v).strip() for v in (values or []) if str(v or '').strip())
+
+
+def backfill_search_documents(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    ProductSearchDocument = apps.get_model('store', 'ProductSearchDocument')
+    batch = []
+    for product in Product.objects.prefetch_related('categories').iterator(chunk_size=500):
+        categories = list(product.categories.all())
+        batch.append(ProductSearchDocument(
+            product_id=product.id,
+            name_text=_join_text([product.name, str(product.slug or '').replace('-', ' ')]),
+            tags_text=_join_text(product.tags if isinstance(product.tags, list) else []),
+            category_text=_join_text(
+                [c.name for c in categories] + [str(c.slug or '').replace('-', ' ') for c in categories]
+            ),
+            description_text=_join_text(
+                [product.description]
+                + (product.features if isinstance(product.features, list) else [])
+                + (product.benefits if isinstance(product.benefits, list) else [])
+            ),
+        ))
+        if len(batch) >= 500:
+            ProductSearchDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ProductSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_alter_category_image_alter_homeheroslide_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='store.product')),
+                ('name_text', models.TextField(blank=True)),
+                ('tags_text', models.TextField(blank=True)),
+                ('category_text', models.TextField(blank=True)),
+                ('description_text', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def _path(category_id, seen=()):
+        if category_id in paths:
+            return paths[category_id]
+        parent_id = parents.get(category_id)
+        if parent_id is None or parent_id in seen or parent_id not in parents:
+            paths[category_id] = f'/{category_id}/'
+        else:
+            paths[category_id] = f'{_path(parent_id, seen + (category_id,))}{category_id}/'
+        return paths[category_id]
+
+    for category_id in parents:
+        path = _path(category_id)
+        Category.objects.filter(pk=category_id).update(path=path, depth=path.count('/') - 2)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_product_primary_image_url_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def recount_active_products(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    counts = Category.objects.annotate(actual=Count('products', filter=Q(products__is_active=True)))
+    for category_id, actual in counts.values_list('id', 'actual'):
+        Category.objects.filter(pk=category_id).update(active_product_count=actual)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_category_path_depth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(recount_active_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_product_copurchase_related'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTextVector',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text_vector', serialize=False, to='store.product')),
+                ('weights', models.JSONField(blank=True, default=dict)),
+                ('text_hash', models.CharField(blank=True, max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='relatedproduct',
+            options={'ordering': ['product', 'kind', 'rank']},
+        ),
+        migrations.RemoveConstraint(
+            model_name='relatedproduct',
+            name='store_relatedproduct_product_rank_uniq',
+        ),
+        migrations.AddField(
+            model_name='relatedproduct',
+            name='kind',
+            field=models.CharField(choices=[('co_purchase', 'Frequently bought together'), ('content', 'Similar content')], default='co_purchase', max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedproduct',
+            constraint=models.UniqueConstraint(fields=('product', 'kind', 'rank'), name='store_relatedproduct_product_kind_rank_uniq'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0021_related_product_kind_text_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('bestseller_7d', 'Best sellers (7 days)'), ('bestseller_30d', 'Best sellers (30 days)'), ('trending', 'Trending')], max_length=20)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.category')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='store.product')),
+            ],
+            options={
+                'ordering': ['kind', 'category', 'rank'],
+                'indexes': [models.Index(fields=['kind', 'category', 'product'], name='store_ranking_lookup_idx'), models.Index(fields=['kind', 'category', 'rank'], name='store_ranking_rank_idx')],
+            },
+        ),
+    ]
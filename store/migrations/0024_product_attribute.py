@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+ATTRIBUTE_FIELDS = {'tags': 'tag', 'features': 'feature', 'benefits': 'benefit'}
+
+
+def create_json_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in ATTRIBUTE_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS store_product_{field}_gin '
+            f'ON store_product USING GIN ((lower({field}::text)::jsonb) jsonb_path_ops)'
+        )
+
+
+def drop_json_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in ATTRIBUTE_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS store_product_{field}_gin')
+
+
+def backfill_product_attributes(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    ProductAttribute = apps.get_model('store', 'ProductAttribute')
+    batch = []
+    for product in Product.objects.only('id', *ATTRIBUTE_FIELDS).iterator(chunk_size=500):
+        values = set()
+        for field, kind in ATTRIBUTE_FIELDS.items():
+            raw = getattr(product, field, None)
+            for item in (raw if isinstance(raw, list) else []):
+                normalized = str(item or '').strip().lower()[:255]
+                if normalized:
+                    values.add((kind, normalized))
+        batch.extend(ProductAttribute(product_id=product.id, kind=kind, value=value) for kind, value in values)
+        if len(batch) >= 1000:
+            ProductAttribute.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        ProductAttribute.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0023_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tag', 'Tag'), ('feature', 'Feature'), ('benefit', 'Benefit')], max_length=16)),
+                ('value', models.CharField(max_length=255)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attribute_values', to='store.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'value', 'product'], name='store_productattr_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'kind', 'value'), name='store_productattr_uniq')],
+            },
+        ),
+        migrations.RunPython(create_json_gin_indexes, drop_json_gin_indexes),
+        migrations.RunPython(backfill_product_attributes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0024_product_attribute'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=100)),
+                ('source', models.CharField(choices=[('catalog', 'Catalog search'), ('assistant', 'Assistant product search')], default='catalog', max_length=20)),
+                ('result_count', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='store_searchevent_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:55
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_histograms(apps, schema_editor):
+    # Same result as store.review_stats.recount_review_stats: review_count and
+    # rating are derived from the histogram, so products without approved
+    # reviews end at zero like every later counter update would leave them.
+    Product = apps.get_model('store', 'Product')
+    ProductReview = apps.get_model('store', 'ProductReview')
+    histograms = {}
+    rows = (
+        ProductReview.objects.filter(is_approved=True, rating__gte=1, rating__lte=5)
+        .values('product_id', 'rating')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        histograms.setdefault(row['product_id'], {})[f"rating_count_{row['rating']}"] = row['total']
+    Product.objects.exclude(pk__in=list(histograms)).update(review_count=0, rating=Decimal('0.00'))
+    for product_id, counts in histograms.items():
+        total = sum(counts.values())
+        weighted = sum(int(field.rsplit('_', 1)[1]) * count for field, count in counts.items())
+        rating = (Decimal(weighted) / Decimal(total)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        Product.objects.filter(pk=product_id).update(review_count=total, rating=rating, **counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0025_searchevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', 'is_approved', 'created_at'], name='store_review_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', 'is_approved', 'rating', 'created_at'], name='store_review_rating_idx'),
+        ),
+        migrations.RunPython(backfill_rating_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0027_cartitem_cart_product_uniq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationstate',
+            name='pending_order_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
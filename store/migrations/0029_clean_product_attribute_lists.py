@@ -0,0 +1,43 @@
+from django.db import migrations
+
+ATTRIBUTE_FIELDS = ('tags', 'features', 'benefits')
+
+
+def _clean(raw):
+    # store.product_attributes.clean_attribute_list as of this migration.
+    if not isinstance(raw, list):
+        return raw
+    cleaned = []
+    for item in raw:
+        if isinstance(item, str):
+            item = item.strip()[:255]
+            if not item:
+                continue
+        cleaned.append(item)
+    return cleaned
+
+
+def clean_product_attribute_lists(apps, schema_editor):
+    # Trim stored tag/feature/benefit elements so the Postgres lower()-only
+    # attribute index matches what the ProductAttribute side table holds.
+    Product = apps.get_model('store', 'Product')
+    for product in Product.objects.only('id', *ATTRIBUTE_FIELDS).iterator(chunk_size=500):
+        changes = {}
+        for field in ATTRIBUTE_FIELDS:
+            raw = getattr(product, field)
+            cleaned = _clean(raw)
+            if cleaned != raw:
+                changes[field] = cleaned
+        if changes:
+            Product.objects.filter(pk=product.pk).update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0028_recommendationstate_pending_order_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_product_attribute_lists, migrations.RunPython.noop),
+    ]
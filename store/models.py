@@ -1,6 +1,10 @@
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
 from django.utils.text import slugify
+from decimal import Decimal
 import uuid
 
 
@@ -11,6 +15,13 @@ class Category(models.Model):
 	image = models.ImageField(upload_to='categories/', max_length=255, null=True, blank=True)
 	parent = models.ForeignKey('self', null=True, blank=True, related_name='children', on_delete=models.CASCADE)
 	is_active = models.BooleanField(default=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	# Materialized path of ancestor ids, e.g. '/3/12/' for category 12 under 3.
+	# Maintained in save(); a subtree is `path__startswith=<ancestor path>`.
+	path = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+	depth = models.PositiveSmallIntegerField(default=0, editable=False)
+	# Active products assigned directly; maintained by store/category_counters.py.
+	active_product_count = models.PositiveIntegerField(default=0, editable=False)
 
 	class Meta:
 		verbose_name_plural = 'categories'
@@ -18,6 +29,43 @@ class Category(models.Model):
 	def __str__(self):
 		return self.name
 
+	def clean(self):
+		super().clean()
+		if self.pk and self.parent_id and self._parent_is_in_subtree():
+			raise ValidationError({'parent': 'A category cannot be moved under itself or one of its descendants.'})
+
+	def _parent_is_in_subtree(self):
+		if self.parent_id == self.pk:
+			return True
+		own_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first()
+		parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first()
+		return bool(own_path and parent_path and parent_path.startswith(own_path))
+
+	def save(self, *args, **kwargs):
+		old_path = ''
+		if self.pk:
+			if self.parent_id and self._parent_is_in_subtree():
+				raise ValueError('A category cannot be moved under itself or one of its descendants.')
+			old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first() or ''
+		super().save(*args, **kwargs)
+		self._sync_tree_path(old_path)
+
+	def _sync_tree_path(self, old_path):
+		parent_path = ''
+		if self.parent_id:
+			parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+		new_path = f"{parent_path or '/'}{self.pk}/"
+		new_depth = new_path.count('/') - 2
+		if new_path != self.path or new_depth != self.depth:
+			Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+		if old_path and old_path != new_path:
+			Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+				path=Concat(models.Value(new_path), Substr('path', len(old_path) + 1), output_field=models.CharField()),
+				depth=models.F('depth') + (new_depth - (old_path.count('/') - 2)),
+			)
+		self.path = new_path
+		self.depth = new_depth
+
 
 class HomeHeroSlide(models.Model):
 	badge = models.CharField(max_length=120, blank=True)
@@ -51,6 +99,12 @@ class Product(models.Model):
 	original_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 	rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
 	review_count = models.PositiveIntegerField(default=0)
+	# Approved reviews per star rating, kept in step by store/review_stats.py.
+	rating_count_1 = models.PositiveIntegerField(default=0, editable=False)
+	rating_count_2 = models.PositiveIntegerField(default=0, editable=False)
+	rating_count_3 = models.PositiveIntegerField(default=0, editable=False)
+	rating_count_4 = models.PositiveIntegerField(default=0, editable=False)
+	rating_count_5 = models.PositiveIntegerField(default=0, editable=False)
 	is_digital = models.BooleanField(default=False)
 	is_flash_sale = models.BooleanField(default=False)
 	features = models.JSONField(default=list, blank=True)
@@ -60,6 +114,20 @@ class Product(models.Model):
 	is_active = models.BooleanField(default=True)
 	is_featured = models.BooleanField(default=False)
 	created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	# Denormalized from the first ProductImage; see store/primary_images.py.
+	primary_image_url = models.CharField(max_length=500, blank=True, default='')
+	image_variants = models.JSONField(default=dict, blank=True)
+
+	class Meta:
+		# Storefront listings always filter on is_active; these back the default
+		# ordering and the price/rating/stock filters and facets.
+		indexes = [
+			models.Index(fields=['is_active', '-is_featured', '-created_at', 'id'], name='store_product_listing_idx'),
+			models.Index(fields=['is_active', 'price'], name='store_product_price_idx'),
+			models.Index(fields=['is_active', 'rating'], name='store_product_rating_idx'),
+			models.Index(fields=['is_active', 'stock'], name='store_product_stock_idx'),
+		]
 
 	def save(self, *args, **kwargs):
 		if not self.slug:
@@ -70,6 +138,53 @@ class Product(models.Model):
 		return self.name
 
 
+class ProductSearchDocument(models.Model):
+	"""
+	Denormalized search text for a product, split by ranking weight.
+	Indexed by a tsvector/GIN column on Postgres and an FTS5 table on SQLite (see store.search).
+	"""
+	product = models.OneToOneField(Product, primary_key=True, related_name='search_document', on_delete=models.CASCADE)
+	name_text = models.TextField(blank=True)
+	tags_text = models.TextField(blank=True)
+	category_text = models.TextField(blank=True)
+	description_text = models.TextField(blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"Search document for product {self.product_id}"
+
+
+class ProductAttribute(models.Model):
+	"""
+	One row per normalized (trimmed, lower-cased) value of `Product.tags`,
+	`features` or `benefits`. Maintained by store/product_attributes.py; gives
+	every backend an indexed filter path and backs the tag cloud counts.
+	"""
+	KIND_TAG = 'tag'
+	KIND_FEATURE = 'feature'
+	KIND_BENEFIT = 'benefit'
+	KIND_CHOICES = [
+		(KIND_TAG, 'Tag'),
+		(KIND_FEATURE, 'Feature'),
+		(KIND_BENEFIT, 'Benefit'),
+	]
+
+	product = models.ForeignKey(Product, related_name='attribute_values', on_delete=models.CASCADE)
+	kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+	value = models.CharField(max_length=255)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['product', 'kind', 'value'], name='store_productattr_uniq'),
+		]
+		indexes = [
+			models.Index(fields=['kind', 'value', 'product'], name='store_productattr_lookup_idx'),
+		]
+
+	def __str__(self):
+		return f"{self.kind}: {self.value} (product {self.product_id})"
+
+
 class ProductReview(models.Model):
 	product = models.ForeignKey(Product, related_name='reviews', on_delete=models.CASCADE)
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
@@ -83,6 +198,10 @@ class ProductReview(models.Model):
 
 	class Meta:
 		ordering = ['-created_at']
+		indexes = [
+			models.Index(fields=['product', 'is_approved', 'created_at'], name='store_review_listing_idx'),
+			models.Index(fields=['product', 'is_approved', 'rating', 'created_at'], name='store_review_rating_idx'),
+		]
 
 	def __str__(self):
 		name = self.reviewer_name or (self.user.username if self.user else 'Anonymous')
@@ -102,6 +221,15 @@ class ProductImage(models.Model):
 		return f"Image for {self.product.name} ({self.id})"
 
 
+def cart_total_expression(prefix=''):
+	"""SUM(quantity * price) over cart items; `prefix` is the path to the items ('items__' from Cart)."""
+	return models.Sum(
+		models.F(f'{prefix}quantity') * models.F(f'{prefix}product__price'),
+		output_field=models.DecimalField(max_digits=12, decimal_places=2),
+		default=Decimal('0.00'),
+	)
+
+
 class Cart(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE)
 	session_key = models.CharField(max_length=40, null=True, blank=True)
@@ -113,8 +241,10 @@ class Cart(models.Model):
 
 	@property
 	def total(self):
-		items = self.items.all()
-		return sum([item.subtotal for item in items])
+		# `store.cart_store.cart_display_queryset` annotates this in the cart query itself.
+		if hasattr(self, 'items_total'):
+			return self.items_total
+		return self.items.aggregate(total=cart_total_expression())['total']
 
 
 class CartItem(models.Model):
@@ -122,6 +252,12 @@ class CartItem(models.Model):
 	product = models.ForeignKey(Product, on_delete=models.PROTECT)
 	quantity = models.PositiveIntegerField(default=1)
 
+	class Meta:
+		constraints = [
+			# One line per product; adds upsert into it (store.cart_store.add_cart_quantity).
+			models.UniqueConstraint(fields=['cart', 'product'], name='store_cartitem_cart_product_uniq'),
+		]
+
 	@property
 	def subtotal(self):
 		return self.product.price * self.quantity
@@ -206,6 +342,135 @@ class OrderItem(models.Model):
 		return f"{self.quantity} x {self.product.name}"
 
 
+class ProductCoPurchase(models.Model):
+	"""
+	Sparse item-item co-occurrence counts from paid orders, stored in both
+	directions. The diagonal row (product == related) is the product's own
+	paid order count.
+	"""
+	product = models.ForeignKey(Product, related_name='co_purchase_counts', on_delete=models.CASCADE)
+	related = models.ForeignKey(Product, related_name='+', on_delete=models.CASCADE)
+	order_count = models.PositiveIntegerField(default=0)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['product', 'related'], name='store_copurchase_product_related_uniq'),
+		]
+
+	def __str__(self):
+		return f"{self.product_id} x {self.related_id}: {self.order_count}"
+
+
+class RelatedProduct(models.Model):
+	"""Precomputed top-N neighbours per product, one ranked list per kind."""
+	KIND_CO_PURCHASE = 'co_purchase'
+	KIND_CONTENT = 'content'
+	KIND_CHOICES = [
+		(KIND_CO_PURCHASE, 'Frequently bought together'),
+		(KIND_CONTENT, 'Similar content'),
+	]
+
+	product = models.ForeignKey(Product, related_name='related_products', on_delete=models.CASCADE)
+	related = models.ForeignKey(Product, related_name='+', on_delete=models.CASCADE)
+	kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=KIND_CO_PURCHASE)
+	rank = models.PositiveSmallIntegerField()
+	score = models.FloatField()
+	co_order_count = models.PositiveIntegerField(default=0)
+
+	class Meta:
+		ordering = ['product', 'kind', 'rank']
+		constraints = [
+			models.UniqueConstraint(fields=['product', 'kind', 'rank'], name='store_relatedproduct_product_kind_rank_uniq'),
+		]
+
+	def __str__(self):
+		return f"{self.product_id} -> {self.related_id} ({self.kind} #{self.rank})"
+
+
+class ProductTextVector(models.Model):
+	"""
+	L2-normalized, feature-hashed TF-IDF weights of a product's text, as
+	{bucket: weight}. `text_hash` skips recomputation when the text is unchanged.
+	"""
+	product = models.OneToOneField(Product, primary_key=True, related_name='text_vector', on_delete=models.CASCADE)
+	weights = models.JSONField(default=dict, blank=True)
+	text_hash = models.CharField(max_length=40, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"Text vector for product {self.product_id}"
+
+
+class RecommendationState(models.Model):
+	"""Watermarks for incremental recommendation jobs, one row per job key."""
+	key = models.CharField(max_length=80, unique=True)
+	last_order_id = models.PositiveBigIntegerField(default=0)
+	# Still-pending orders the watermark moved past; counted if they are paid later.
+	pending_order_ids = models.JSONField(default=list, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self):
+		return f"{self.key} @ order {self.last_order_id}"
+
+
+class ProductRanking(models.Model):
+	"""
+	Materialized sales rankings, refreshed by store/rankings.py. A NULL category
+	is the whole-catalog ranking; otherwise the category's subtree.
+	"""
+	KIND_BESTSELLER_7D = 'bestseller_7d'
+	KIND_BESTSELLER_30D = 'bestseller_30d'
+	KIND_TRENDING = 'trending'
+	KIND_CHOICES = [
+		(KIND_BESTSELLER_7D, 'Best sellers (7 days)'),
+		(KIND_BESTSELLER_30D, 'Best sellers (30 days)'),
+		(KIND_TRENDING, 'Trending'),
+	]
+
+	kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+	category = models.ForeignKey(Category, null=True, blank=True, related_name='+', on_delete=models.CASCADE)
+	product = models.ForeignKey(Product, related_name='rankings', on_delete=models.CASCADE)
+	rank = models.PositiveIntegerField()
+	score = models.FloatField()
+	units = models.PositiveIntegerField(default=0)
+	computed_at = models.DateTimeField()
+
+	class Meta:
+		ordering = ['kind', 'category', 'rank']
+		indexes = [
+			models.Index(fields=['kind', 'category', 'product'], name='store_ranking_lookup_idx'),
+			models.Index(fields=['kind', 'category', 'rank'], name='store_ranking_rank_idx'),
+		]
+
+	def __str__(self):
+		return f"{self.kind} #{self.rank}: product {self.product_id} (category {self.category_id or 'all'})"
+
+
+class SearchEvent(models.Model):
+	"""One catalog or assistant search, written in batches by store/search_analytics.py."""
+	SOURCE_CATALOG = 'catalog'
+	SOURCE_ASSISTANT = 'assistant'
+	SOURCE_CHOICES = [
+		(SOURCE_CATALOG, 'Catalog search'),
+		(SOURCE_ASSISTANT, 'Assistant product search'),
+	]
+
+	query = models.CharField(max_length=100)
+	source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=SOURCE_CATALOG)
+	result_count = models.PositiveIntegerField(default=0)
+	latency_ms = models.FloatField(default=0)
+	created_at = models.DateTimeField(default=timezone.now)
+
+	class Meta:
+		ordering = ['-created_at']
+		indexes = [
+			models.Index(fields=['created_at'], name='store_searchevent_created_idx'),
+		]
+
+	def __str__(self):
+		return f"{self.source}: {self.query!r} ({self.result_count} results, {self.latency_ms:.1f} ms)"
+
+
 class PaymentTransaction(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='payment_transactions')
 	order = models.ForeignKey(Order, related_name='transactions', on_delete=models.CASCADE)
@@ -0,0 +1,189 @@
+"""
+Keyset (cursor) pagination for catalog listings.
+
+Cursors carry the full ordering tuple of the last row served, so every page is a
+single indexed range scan (`WHERE (a, b, id) > (...) ORDER BY ... LIMIT n`) instead
+of an OFFSET walk. Nullable ordering columns always sort last.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _cursor_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _parse_ordering(ordering):
+    """Turn ['-created_at', 'id'] into [(field, descending, nulls_last)]."""
+    parsed = []
+    for entry in ordering:
+        name = str(entry)
+        descending = name.startswith('-')
+        parsed.append((name.lstrip('-'), descending, True))
+    return parsed
+
+
+def _reverse_ordering(spec):
+    return [(name, not descending, not nulls_last) for name, descending, nulls_last in spec]
+
+
+def _order_expressions(spec):
+    expressions = []
+    for name, descending, nulls_last in spec:
+        nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+        expressions.append(F(name).desc(**nulls) if descending else F(name).asc(**nulls))
+    return expressions
+
+
+def _equal(name, value):
+    if value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: value})
+
+
+def _after(name, descending, nulls_last, value):
+    """Rows strictly after `value` for one ordering column, or None when impossible."""
+    if value is None:
+        return None if nulls_last else Q(**{f'{name}__isnull': False})
+    condition = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+    if nulls_last:
+        condition |= Q(**{f'{name}__isnull': True})
+    return condition
+
+
+def keyset_filter(spec, values):
+    """Lexicographic `(f1, f2, ...) > (v1, v2, ...)` for the given ordering spec."""
+    combined = None
+    prefix = Q()
+    for (name, descending, nulls_last), value in zip(spec, values):
+        after = _after(name, descending, nulls_last, value)
+        if after is not None:
+            branch = prefix & after
+            combined = branch if combined is None else (combined | branch)
+        prefix &= _equal(name, value)
+    return combined
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination over a fixed ordering tuple.
+
+    Views supply the ordering via `get_keyset_ordering()`; function views can pass
+    `ordering=` to `paginate_queryset` directly. The last column must be unique.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_params = ('page_size', 'limit')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size=None, max_page_size=None):
+        self.page_size = page_size or getattr(settings, 'STORE_PRODUCT_PAGE_SIZE', 48)
+        self.max_page_size = max_page_size or getattr(settings, 'STORE_PRODUCT_MAX_PAGE_SIZE', 100)
+
+    def get_page_size(self, request):
+        for param in self.page_size_query_params:
+            raw = request.query_params.get(param)
+            if raw in (None, ''):
+                continue
+            try:
+                return max(1, min(int(raw), self.max_page_size))
+            except (TypeError, ValueError):
+                continue
+        return self.page_size
+
+    def encode_cursor(self, values, reverse=False):
+        payload = json.dumps({'v': [_cursor_value(v) for v in values], 'r': 1 if reverse else 0}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, expected_length):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != expected_length:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def _row_values(self, row, spec):
+        return [getattr(row, name) for name, _descending, _nulls_last in spec]
+
+    def paginate_queryset(self, queryset, request, view=None, ordering=None):
+        if ordering is None:
+            ordering = view.get_keyset_ordering()
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        spec = _parse_ordering(ordering)
+        values, reverse = self.decode_cursor(request, len(spec))
+
+        effective_spec = _reverse_ordering(spec) if reverse else spec
+        queryset = queryset.order_by(*_order_expressions(effective_spec))
+        if values is not None:
+            condition = keyset_filter(effective_spec, values)
+            queryset = queryset.filter(condition) if condition is not None else queryset.none()
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        self.next_cursor = self.encode_cursor(self._row_values(rows[-1], spec)) if rows and has_next else None
+        self.previous_cursor = (
+            self.encode_cursor(self._row_values(rows[0], spec), reverse=True) if rows and has_previous else None
+        )
+        return rows
+
+    def _page_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._page_link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self._page_link(self.previous_cursor)
+
+    def get_paginated_response_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_response_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,79 @@
+"""
+Denormalized primary image for products.
+
+`Product.primary_image_url` stores the resolved, request-independent URL of the
+first image (lowest `order`, then id), and `Product.image_variants` a few sized
+Cloudinary renditions of it. Both are refreshed from `ProductImage` signals so
+listings can render cards without prefetching or resolving images per request.
+
+The stored URLs depend on the media/Cloudinary settings at the time they were
+resolved. `manage.py refresh_primary_images` re-resolves every product and runs
+on each deploy (render.yaml); run it by hand after changing those settings
+without a deploy.
+"""
+from django.utils import timezone
+
+from .catalog_cache import bump_catalog_version
+from .models import Product, ProductImage
+from .image_urls import resolve_image_url
+
+CLOUDINARY_UPLOAD_SEGMENT = '/image/upload/'
+# name -> max width in px; `c_limit` never upscales.
+PRODUCT_IMAGE_VARIANT_WIDTHS = {
+    'thumb': 160,
+    'card': 480,
+    'large': 1024,
+}
+
+
+def build_image_variants(url) -> dict:
+    url = str(url or '')
+    if 'res.cloudinary.com/' not in url or CLOUDINARY_UPLOAD_SEGMENT not in url:
+        return {}
+    head, tail = url.split(CLOUDINARY_UPLOAD_SEGMENT, 1)
+    return {
+        name: f'{head}{CLOUDINARY_UPLOAD_SEGMENT}c_limit,f_auto,q_auto,w_{width}/{tail}'
+        for name, width in PRODUCT_IMAGE_VARIANT_WIDTHS.items()
+    }
+
+
+def primary_image_fields(image) -> dict:
+    url = resolve_image_url(getattr(image, 'image', None)) if image is not None else ''
+    return {
+        'primary_image_url': url[:500],
+        'image_variants': build_image_variants(url),
+    }
+
+
+def refresh_primary_images(product_ids, apply=True):
+    """Recompute the stored primary image for the given products. Returns rows changed (or stale, with apply=False)."""
+    ids = {int(pk) for pk in (product_ids or []) if pk}
+    if not ids:
+        return 0
+    first_images = {}
+    for image in ProductImage.objects.filter(product_id__in=ids).order_by('product_id', 'order', 'id'):
+        first_images.setdefault(image.product_id, image)
+
+    changed = 0
+    now = timezone.now()
+    current = Product.objects.filter(id__in=ids).values_list('id', 'primary_image_url', 'image_variants')
+    for product_id, stored_url, stored_variants in current:
+        fields = primary_image_fields(first_images.get(product_id))
+        if fields['primary_image_url'] == stored_url and fields['image_variants'] == (stored_variants or {}):
+            continue
+        changed += 1
+        if apply:
+            # Queryset update: avoid re-running Product post_save work for an image change.
+            Product.objects.filter(id=product_id).update(updated_at=now, **fields)
+    return changed
+
+
+def refresh_all_primary_images(batch_size=500, apply=True):
+    """`refresh_primary_images` over the whole catalog, in id batches. Returns rows changed."""
+    ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+    changed = 0
+    for start in range(0, len(ids), batch_size):
+        changed += refresh_primary_images(ids[start:start + batch_size], apply=apply)
+    if changed and apply:
+        bump_catalog_version()
+    return changed
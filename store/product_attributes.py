@@ -0,0 +1,138 @@
+"""
+Indexed filtering over the `tags`, `features` and `benefits` JSON lists.
+
+Matching is on whole list elements, case-insensitively. On Postgres it uses
+GIN (jsonb_path_ops) expression indexes over `lower(col::text)::jsonb` created
+in migration 0024; other backends use the `ProductAttribute` side table, which
+`sync_product_attributes` keeps in step with product saves. The side table
+also feeds the tag cloud on every backend.
+
+The index can only lower-case, so list elements are trimmed before they are
+stored (`clean_attribute_list`, run on product save). Both paths then compare
+`normalize_attribute_value` of the query against the same form of each element.
+"""
+from django.db import connections
+from django.db.models import Count, JSONField, Q, TextField
+from django.db.models.functions import Cast, Lower
+
+from .models import Product, ProductAttribute
+
+ATTRIBUTE_FIELDS = {
+    'tags': ProductAttribute.KIND_TAG,
+    'features': ProductAttribute.KIND_FEATURE,
+    'benefits': ProductAttribute.KIND_BENEFIT,
+}
+ATTRIBUTE_VALUE_MAX_LENGTH = 255
+
+
+def clean_attribute_value(value) -> str:
+    """A list element as stored: trimmed and length-capped, case kept for display."""
+    return str(value or '').strip()[:ATTRIBUTE_VALUE_MAX_LENGTH]
+
+
+def normalize_attribute_value(value) -> str:
+    """The form values are matched in: what `lower()` makes of a cleaned element."""
+    return clean_attribute_value(value).lower()
+
+
+def clean_attribute_list(raw):
+    """`raw` with string elements cleaned and blank ones dropped; non-lists pass through."""
+    if not isinstance(raw, list):
+        return raw
+    cleaned = []
+    for item in raw:
+        if isinstance(item, str):
+            item = clean_attribute_value(item)
+            if not item:
+                continue
+        cleaned.append(item)
+    return cleaned
+
+
+def product_attribute_values(product) -> set:
+    """{(kind, normalized value)} for a product's JSON lists."""
+    values = set()
+    for field, kind in ATTRIBUTE_FIELDS.items():
+        raw = getattr(product, field, None)
+        for item in (raw if isinstance(raw, list) else []):
+            normalized = normalize_attribute_value(item)
+            if normalized:
+                values.add((kind, normalized))
+    return values
+
+
+def sync_product_attributes(product_ids):
+    """Diff each product's JSON lists against its side-table rows; returns rows written."""
+    ids = {int(pk) for pk in (product_ids or []) if pk}
+    if not ids:
+        return 0
+    wanted = {
+        product.id: product_attribute_values(product)
+        for product in Product.objects.filter(id__in=ids).only('id', *ATTRIBUTE_FIELDS)
+    }
+    existing = {}
+    for row_id, product_id, kind, value in ProductAttribute.objects.filter(product_id__in=ids).values_list(
+        'id', 'product_id', 'kind', 'value'
+    ):
+        existing.setdefault(product_id, {})[(kind, value)] = row_id
+
+    stale = []
+    fresh = []
+    for product_id in ids:
+        current = existing.get(product_id, {})
+        target = wanted.get(product_id, set())
+        stale.extend(row_id for key, row_id in current.items() if key not in target)
+        fresh.extend(
+            ProductAttribute(product_id=product_id, kind=kind, value=value)
+            for kind, value in target - set(current)
+        )
+    if stale:
+        ProductAttribute.objects.filter(id__in=stale).delete()
+    if fresh:
+        ProductAttribute.objects.bulk_create(fresh, batch_size=1000, ignore_conflicts=True)
+    return len(stale) + len(fresh)
+
+
+def _lowered_json(field):
+    # Must match the indexed expression in migration 0024 for Postgres to use the GIN index.
+    return Cast(Lower(Cast(field, output_field=TextField())), output_field=JSONField())
+
+
+def filter_products_by_attribute(qs, field, values, match_all=False):
+    """Products whose `field` list contains any (or all) of `values`."""
+    kind = ATTRIBUTE_FIELDS[field]
+    values = sorted({normalize_attribute_value(v) for v in values} - {''})
+    if not values:
+        return qs
+    if connections[qs.db].vendor == 'postgresql':
+        alias = f'{field}_lowered'
+        qs = qs.alias(**{alias: _lowered_json(field)})
+        if match_all:
+            return qs.filter(**{f'{alias}__contains': values})
+        any_match = Q()
+        for value in values:
+            any_match |= Q(**{f'{alias}__contains': [value]})
+        return qs.filter(any_match)
+
+    rows = ProductAttribute.objects.filter(kind=kind, value__in=values)
+    if match_all:
+        matching = (
+            rows.values('product_id')
+            .annotate(matched=Count('value', distinct=True))
+            .filter(matched=len(values))
+            .values('product_id')
+        )
+    else:
+        matching = rows.values('product_id')
+    return qs.filter(id__in=matching)
+
+
+def tag_cloud(limit=50):
+    """[{'tag', 'count'}] over active products, most used first."""
+    rows = (
+        ProductAttribute.objects.filter(kind=ProductAttribute.KIND_TAG, product__is_active=True)
+        .values('value')
+        .annotate(count=Count('product_id'))
+        .order_by('-count', 'value')[:limit]
+    )
+    return [{'tag': row['value'], 'count': row['count']} for row in rows]
@@ -0,0 +1,133 @@
+"""
+Best-seller and trending rankings, materialized into `ProductRanking`.
+
+`refresh_product_rankings()` runs one aggregate over recent paid order items,
+then ranks active products for the whole catalog and for every category
+subtree they belong to (ancestors come from `Category.path`). Storefront
+listings sort by the stored rank (`?sort=bestsellers|trending`), so no order
+data is aggregated at request time.
+
+Trending compares the last 7 days with the daily rate of the 30 days before:
+score = (recent - expected) / sqrt(expected + 1), a Poisson-style z-score that
+keeps low-volume products from jumping on a single sale.
+"""
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .catalog_cache import bump_catalog_version
+from .models import OrderItem, Product, ProductRanking
+from .recommendations import PAID_ORDER_STATUSES
+
+logger = logging.getLogger(__name__)
+
+RECENT_DAYS = 7
+BESTSELLER_LONG_DAYS = 30
+TRENDING_BASELINE_DAYS = 30
+TRENDING_MIN_RECENT_UNITS = 2
+# Public `?sort=` values -> ranking kind; `bestsellers` honours `?window=7`.
+RANKING_SORTS = {
+    'bestsellers': ProductRanking.KIND_BESTSELLER_30D,
+    'trending': ProductRanking.KIND_TRENDING,
+}
+
+
+def ranking_kind_for_sort(sort, window=None):
+    kind = RANKING_SORTS.get(str(sort or '').strip().lower())
+    if kind == ProductRanking.KIND_BESTSELLER_30D and str(window or '').strip() == str(RECENT_DAYS):
+        return ProductRanking.KIND_BESTSELLER_7D
+    return kind
+
+
+def sales_windows(now):
+    """{product_id: (units last 7d, units last 30d, units in the trending baseline)}."""
+    recent_start = now - timedelta(days=RECENT_DAYS)
+    long_start = now - timedelta(days=BESTSELLER_LONG_DAYS)
+    baseline_start = recent_start - timedelta(days=TRENDING_BASELINE_DAYS)
+    rows = (
+        OrderItem.objects.filter(
+            order__status__in=PAID_ORDER_STATUSES,
+            order__created_at__gte=min(long_start, baseline_start),
+            order__created_at__lt=now,
+            product__is_active=True,
+        )
+        .values('product_id')
+        .annotate(
+            recent=Sum('quantity', filter=Q(order__created_at__gte=recent_start)),
+            long=Sum('quantity', filter=Q(order__created_at__gte=long_start)),
+            baseline=Sum('quantity', filter=Q(order__created_at__lt=recent_start)),
+        )
+    )
+    return {
+        row['product_id']: (row['recent'] or 0, row['long'] or 0, row['baseline'] or 0)
+        for row in rows
+    }
+
+
+def trending_score(recent_units, baseline_units):
+    expected = baseline_units / TRENDING_BASELINE_DAYS * RECENT_DAYS
+    return (recent_units - expected) / math.sqrt(expected + 1)
+
+
+def _product_scopes(product_ids):
+    """{product_id: {None, category ids of every assigned category and its ancestors}}."""
+    scopes = {product_id: {None} for product_id in product_ids}
+    memberships = Product.categories.through.objects.filter(product_id__in=product_ids).values_list(
+        'product_id', 'category__path'
+    )
+    for product_id, path in memberships.iterator(chunk_size=2000):
+        scopes[product_id].update(int(part) for part in str(path or '').split('/') if part.isdigit())
+    return scopes
+
+
+def _scores_by_kind(stats):
+    scores = {
+        ProductRanking.KIND_BESTSELLER_7D: {},
+        ProductRanking.KIND_BESTSELLER_30D: {},
+        ProductRanking.KIND_TRENDING: {},
+    }
+    for product_id, (recent, long, baseline) in stats.items():
+        if recent > 0:
+            scores[ProductRanking.KIND_BESTSELLER_7D][product_id] = (float(recent), recent)
+        if long > 0:
+            scores[ProductRanking.KIND_BESTSELLER_30D][product_id] = (float(long), long)
+        if recent >= TRENDING_MIN_RECENT_UNITS:
+            score = trending_score(recent, baseline)
+            if score > 0:
+                scores[ProductRanking.KIND_TRENDING][product_id] = (score, recent)
+    return scores
+
+
+def refresh_product_rankings(now=None):
+    """Recompute every ranking from paid orders and swap the table contents atomically."""
+    now = now or timezone.now()
+    stats = sales_windows(now)
+    scopes = _product_scopes(list(stats))
+
+    rows = []
+    for kind, scored in _scores_by_kind(stats).items():
+        by_scope = defaultdict(list)
+        for product_id, (score, units) in scored.items():
+            for category_id in scopes.get(product_id, {None}):
+                by_scope[category_id].append((score, units, product_id))
+        for category_id, entries in by_scope.items():
+            entries.sort(key=lambda entry: (-entry[0], -entry[1], entry[2]))
+            rows.extend(
+                ProductRanking(
+                    kind=kind, category_id=category_id, product_id=product_id,
+                    rank=rank, score=round(score, 6), units=units, computed_at=now,
+                )
+                for rank, (score, units, product_id) in enumerate(entries, start=1)
+            )
+
+    with transaction.atomic():
+        ProductRanking.objects.all().delete()
+        ProductRanking.objects.bulk_create(rows, batch_size=1000)
+    bump_catalog_version()
+    logger.info('product_rankings.refresh products=%s rows=%s', len(stats), len(rows))
+    return {'products': len(stats), 'rows': len(rows)}
@@ -0,0 +1,252 @@
+"""
+"Frequently bought together" recommendations from paid order history.
+
+`update_related_products()` folds newly paid orders into a sparse item-item
+co-occurrence table (`ProductCoPurchase`), then rescores only the products those
+orders touched and rewrites their top-N rows in `RelatedProduct`. Scores are
+cosine similarity over order sets: co_orders / sqrt(orders(a) * orders(b)).
+
+Progress is an order-id watermark (`RecommendationState`), read and advanced
+under a row lock so overlapping runs cannot count a batch twice. It never moves
+past a pending order created within the settle window. Older pending orders it
+does pass are remembered on the state row and counted by a later run if they
+are paid within `STORE_RELATED_LATE_PAYMENT_DAYS`. Orders have no refunded or
+cancelled status (refunds live on `PaymentTransaction`), so nothing is ever
+subtracted; neighbour scores of untouched products also drift slightly as
+popularity changes. `rebuild_related_products()` recomputes everything from
+scratch.
+"""
+import logging
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import combinations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from .catalog_cache import bump_catalog_version
+from .models import Order, OrderItem, ProductCoPurchase, RecommendationState, RelatedProduct
+
+logger = logging.getLogger(__name__)
+
+CO_PURCHASE_STATE_KEY = 'co-purchase'
+PAID_ORDER_STATUSES = (
+    Order.STATUS_PAID,
+    Order.STATUS_PROCESSING,
+    Order.STATUS_SHIPPED,
+    Order.STATUS_DELIVERED,
+)
+# Very large baskets (bulk/wholesale orders) say little about item affinity and
+# cost O(n^2) pairs, so only their first N distinct products are counted.
+MAX_BASKET_PRODUCTS = 40
+
+
+def _setting_int(name, default, minimum=0):
+    try:
+        return max(minimum, int(getattr(settings, name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def related_products_limit() -> int:
+    return _setting_int('STORE_RELATED_PRODUCTS_LIMIT', 12, minimum=1)
+
+
+def _min_co_orders() -> int:
+    return _setting_int('STORE_RELATED_MIN_CO_ORDERS', 2, minimum=1)
+
+
+def _settle_window():
+    return timedelta(hours=_setting_int('STORE_RELATED_SETTLE_HOURS', 24))
+
+
+def _late_payment_window():
+    return timedelta(days=_setting_int('STORE_RELATED_LATE_PAYMENT_DAYS', 30))
+
+
+def _processable_upper_bound(after_id):
+    """Highest order id that can be consumed without skipping a still-payable order."""
+    open_pending = Order.objects.filter(
+        id__gt=after_id,
+        status=Order.STATUS_PENDING,
+        created_at__gt=timezone.now() - _settle_window(),
+    ).aggregate(first=Min('id'))['first']
+    if open_pending is not None:
+        return open_pending - 1
+    return Order.objects.aggregate(last=Max('id'))['last'] or after_id
+
+
+def _baskets(**order_filter):
+    """{order_id: sorted distinct product ids} for paid orders matching `order_filter` (OrderItem lookups)."""
+    rows = (
+        OrderItem.objects.filter(order__status__in=PAID_ORDER_STATUSES, **order_filter)
+        .order_by('order_id', 'id')
+        .values_list('order_id', 'product_id')
+    )
+    baskets = defaultdict(list)
+    for order_id, product_id in rows.iterator(chunk_size=2000):
+        basket = baskets[order_id]
+        if product_id not in basket and len(basket) < MAX_BASKET_PRODUCTS:
+            basket.append(product_id)
+    return {order_id: sorted(products) for order_id, products in baskets.items()}
+
+
+def count_co_purchases(baskets):
+    """Counter of (a, b) -> orders, both directions plus the (a, a) diagonal."""
+    counts = Counter()
+    for products in baskets:
+        for product_id in products:
+            counts[(product_id, product_id)] += 1
+        for a, b in combinations(products, 2):
+            counts[(a, b)] += 1
+            counts[(b, a)] += 1
+    return counts
+
+
+def _apply_counts(deltas):
+    product_ids = {a for a, _b in deltas}
+    existing = {
+        (a, b): count
+        for a, b, count in ProductCoPurchase.objects.filter(
+            product_id__in=product_ids, related_id__in=product_ids
+        ).values_list('product_id', 'related_id', 'order_count')
+    }
+    rows = [
+        ProductCoPurchase(product_id=a, related_id=b, order_count=existing.get((a, b), 0) + delta)
+        for (a, b), delta in deltas.items()
+    ]
+    ProductCoPurchase.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['product', 'related'],
+        update_fields=['order_count'],
+    )
+
+
+def score_neighbours(product_ids):
+    """{product_id: [(related_id, score, co_orders), ...]} best first, top N only."""
+    product_ids = set(product_ids)
+    limit = related_products_limit()
+    pairs = defaultdict(list)
+    related_ids = set(product_ids)
+    for a, b, co_orders in ProductCoPurchase.objects.filter(
+        product_id__in=product_ids, order_count__gte=_min_co_orders()
+    ).exclude(related_id=F('product_id')).values_list('product_id', 'related_id', 'order_count'):
+        pairs[a].append((b, co_orders))
+        related_ids.add(b)
+    totals = dict(
+        ProductCoPurchase.objects.filter(product_id__in=related_ids, related_id=F('product_id'))
+        .values_list('product_id', 'order_count')
+    )
+
+    neighbours = {}
+    for product_id in product_ids:
+        scored = []
+        for related_id, co_orders in pairs.get(product_id, []):
+            denominator = math.sqrt(totals.get(product_id, 0) * totals.get(related_id, 0))
+            if denominator:
+                scored.append((related_id, co_orders / denominator, co_orders))
+        scored.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        neighbours[product_id] = scored[:limit]
+    return neighbours
+
+
+def _store_neighbours(neighbours):
+    kind = RelatedProduct.KIND_CO_PURCHASE
+    RelatedProduct.objects.filter(product_id__in=list(neighbours), kind=kind).delete()
+    RelatedProduct.objects.bulk_create(
+        [
+            RelatedProduct(
+                product_id=product_id, related_id=related_id, kind=kind,
+                rank=rank, score=score, co_order_count=co_orders,
+            )
+            for product_id, scored in neighbours.items()
+            for rank, (related_id, score, co_orders) in enumerate(scored, start=1)
+        ],
+        batch_size=1000,
+    )
+
+
+def _fold_baskets(baskets):
+    """Add the baskets' pairs to the counts and rescore the products they touch."""
+    deltas = count_co_purchases(baskets.values())
+    if not deltas:
+        return set()
+    _apply_counts(deltas)
+    touched = {a for a, _b in deltas}
+    _store_neighbours(score_neighbours(touched))
+    return touched
+
+
+def _locked_state():
+    return RecommendationState.objects.select_for_update().get(key=CO_PURCHASE_STATE_KEY)
+
+
+def _still_pending(order_ids):
+    """The ids among `order_ids` that are pending and young enough to be paid late."""
+    return set(
+        Order.objects.filter(
+            id__in=order_ids,
+            status=Order.STATUS_PENDING,
+            created_at__gt=timezone.now() - _late_payment_window(),
+        ).values_list('id', flat=True)
+    )
+
+
+def update_related_products(batch_orders=500):
+    """
+    Consume paid orders past the watermark in batches; returns a summary dict.
+    """
+    state, _ = RecommendationState.objects.get_or_create(key=CO_PURCHASE_STATE_KEY)
+    # Conservative even if another run advances the watermark meanwhile: the
+    # bound only ever stops short of a still-open pending order.
+    until_id = _processable_upper_bound(state.last_order_id)
+    processed_orders = 0
+    touched = set()
+
+    with transaction.atomic():
+        state = _locked_state()
+        waiting = set(state.pending_order_ids or [])
+        if waiting:
+            baskets = _baskets(order_id__in=waiting)
+            touched |= _fold_baskets(baskets)
+            processed_orders += len(baskets)
+            state.pending_order_ids = sorted(_still_pending(waiting - set(baskets)))
+            state.save(update_fields=['pending_order_ids', 'updated_at'])
+
+    while True:
+        with transaction.atomic():
+            state = _locked_state()
+            if state.last_order_id >= until_id:
+                break
+            batch_end = min(until_id, state.last_order_id + max(1, int(batch_orders)))
+            baskets = _baskets(order_id__gt=state.last_order_id, order_id__lte=batch_end)
+            touched |= _fold_baskets(baskets)
+            passed_over = Order.objects.filter(
+                id__gt=state.last_order_id, id__lte=batch_end, status=Order.STATUS_PENDING,
+            ).values_list('id', flat=True)
+            state.pending_order_ids = sorted(set(state.pending_order_ids or []) | _still_pending(passed_over))
+            state.last_order_id = batch_end
+            state.save(update_fields=['last_order_id', 'pending_order_ids', 'updated_at'])
+        processed_orders += len(baskets)
+
+    if touched:
+        bump_catalog_version()
+    logger.info(
+        'related_products.update orders=%s products=%s watermark=%s',
+        processed_orders, len(touched), state.last_order_id,
+    )
+    return {'orders': processed_orders, 'products': len(touched), 'last_order_id': state.last_order_id}
+
+
+def rebuild_related_products(batch_orders=500):
+    """Drop all co-occurrence state and recount every paid order."""
+    with transaction.atomic():
+        RelatedProduct.objects.filter(kind=RelatedProduct.KIND_CO_PURCHASE).delete()
+        ProductCoPurchase.objects.all().delete()
+        RecommendationState.objects.filter(key=CO_PURCHASE_STATE_KEY).delete()
+    return update_related_products(batch_orders=batch_orders)
@@ -0,0 +1,124 @@
+"""
+Denormalized review statistics on `Product`.
+
+`rating_count_1..5` hold approved reviews per star. `review_count` and `rating`
+are derived from them in the same UPDATE statement as every `F()` adjustment,
+so the histogram and the average are read straight off the product row and
+changed in one statement. The signals in `signals.py` apply review creates,
+approvals, rating edits and deletes; `set_reviews_approved` covers bulk admin
+actions and `recount_review_stats` rebuilds the counters exactly.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, Round
+
+from .catalog_cache import bump_catalog_version
+from .models import Product, ProductReview
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+RATING_COUNT_FIELDS = {stars: f'rating_count_{stars}' for stars in RATING_VALUES}
+
+
+def _stats_assignments(counts):
+    """UPDATE assignments for the star counters plus the derived `review_count` and `rating`."""
+    total = sum(counts.values(), Value(0))
+    weighted = sum((stars * count for stars, count in counts.items()), Value(0))
+    average = Cast(weighted, FloatField()) / Cast(Greatest(total, Value(1)), FloatField())
+    assignments = {RATING_COUNT_FIELDS[stars]: count for stars, count in counts.items()}
+    assignments['review_count'] = total
+    assignments['rating'] = Round(Cast(average, DecimalField(max_digits=3, decimal_places=2)), 2)
+    return assignments
+
+
+def adjust_review_stats(product_id, deltas):
+    """Apply {stars: delta} to one product's histogram (never below zero)."""
+    deltas = {int(stars): int(delta) for stars, delta in (deltas or {}).items() if delta and int(stars) in RATING_COUNT_FIELDS}
+    if not product_id or not deltas:
+        return 0
+    counts = {
+        stars: Greatest(F(field) + deltas[stars], Value(0)) if stars in deltas else F(field)
+        for stars, field in RATING_COUNT_FIELDS.items()
+    }
+    return Product.objects.filter(pk=product_id).update(**_stats_assignments(counts))
+
+
+def review_stats_deltas(previous, current):
+    """{(product_id, stars): delta} between two (product_id, rating, is_approved) states (None = absent)."""
+    deltas = Counter()
+    if previous and previous[2]:
+        deltas[(previous[0], previous[1])] -= 1
+    if current and current[2]:
+        deltas[(current[0], current[1])] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def apply_review_stats_deltas(deltas):
+    by_product = defaultdict(dict)
+    for (product_id, stars), delta in deltas.items():
+        by_product[product_id][stars] = by_product[product_id].get(stars, 0) + delta
+    updated = sum(adjust_review_stats(product_id, product_deltas) for product_id, product_deltas in by_product.items())
+    if updated:
+        # Ratings are part of cached catalog payloads.
+        bump_catalog_version()
+    return updated
+
+
+def set_reviews_approved(queryset, is_approved):
+    """Bulk `is_approved` update that keeps product histograms in step. Returns rows updated."""
+    with transaction.atomic():
+        flipping = queryset.filter(is_approved=not is_approved)
+        changing = list(flipping.values_list('product_id', 'rating'))
+        updated = flipping.update(is_approved=is_approved)
+        sign = 1 if is_approved else -1
+        apply_review_stats_deltas({key: n * sign for key, n in Counter(changing).items()})
+    return updated
+
+
+def rating_histogram(product):
+    return {str(stars): getattr(product, field) for stars, field in RATING_COUNT_FIELDS.items()}
+
+
+def review_stats_drift():
+    """[(product_id, stored histogram, actual histogram)] for products whose counters are wrong."""
+    actual = defaultdict(lambda: [0] * len(RATING_VALUES))
+    rows = (
+        ProductReview.objects.filter(is_approved=True, rating__in=RATING_VALUES)
+        .values_list('product_id', 'rating')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for product_id, stars, total in rows:
+        actual[product_id][stars - 1] = total
+    fields = list(RATING_COUNT_FIELDS.values())
+    drift = []
+    for product_id, *stored in Product.objects.values_list('id', *fields).order_by('id'):
+        expected = actual.get(product_id, [0] * len(RATING_VALUES))
+        if stored != expected:
+            drift.append((product_id, tuple(stored), tuple(expected)))
+    return drift
+
+
+def recount_review_stats(product_ids=None):
+    """Recompute histograms (and with them `review_count`/`rating`) exactly. Returns rows updated."""
+    qs = Product.objects.all()
+    if product_ids is not None:
+        qs = qs.filter(id__in=list(product_ids))
+    counts = {
+        stars: Coalesce(
+            Subquery(
+                ProductReview.objects.filter(product_id=OuterRef('pk'), is_approved=True, rating=stars)
+                .order_by()
+                .values('product_id')
+                .annotate(total=Count('id'))
+                .values('total')[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+        for stars in RATING_VALUES
+    }
+    updated = qs.update(**_stats_assignments(counts))
+    bump_catalog_version()
+    return updated
@@ -0,0 +1,232 @@
+"""
+Catalog full-text search.
+
+Every product owns a `ProductSearchDocument` row holding its searchable text split
+into four weighted columns (name > tags > category > description). The database
+indexes those rows natively:
+
+- Postgres: a generated, weighted `tsvector` column with a GIN index.
+- SQLite: an external-content FTS5 table kept in sync by triggers.
+
+Both are created by migration `0015_productsearchdocument`. Other backends (or a
+SQLite build without FTS5) fall back to the legacy `icontains` scan.
+"""
+import logging
+import re
+
+from django.db import connections, router
+from django.db.models import Case, F, FloatField, Func, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Product, ProductSearchDocument
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DOCUMENT_TABLE = 'store_productsearchdocument'
+SEARCH_FTS_TABLE = 'store_product_fts'
+SEARCH_QUERY_MAX_LENGTH = 100
+SEARCH_MAX_TERMS = 6
+# bm25 column weights for (name_text, tags_text, category_text, description_text).
+SEARCH_FTS_WEIGHTS = (10.0, 5.0, 2.5, 1.0)
+SEARCH_TERM_RE = re.compile(r'\w+', flags=re.UNICODE)
+
+_fts_table_present = {}
+
+
+def normalize_search_query(raw_query) -> str:
+    return re.sub(r'\s+', ' ', str(raw_query or '')).strip()[:SEARCH_QUERY_MAX_LENGTH]
+
+
+def search_terms(query) -> list:
+    return [term.lower() for term in SEARCH_TERM_RE.findall(str(query or ''))][:SEARCH_MAX_TERMS]
+
+
+def _join_text(values) -> str:
+    return ' '.join(str(v).strip() for v in (values or []) if str(v or '').strip())
+
+
+def build_search_document_fields(product) -> dict:
+    categories = list(product.categories.all())
+    slug_words = str(product.slug or '').replace('-', ' ')
+    return {
+        'name_text': _join_text([product.name, slug_words]),
+        'tags_text': _join_text(product.tags if isinstance(product.tags, list) else []),
+        'category_text': _join_text(
+            [c.name for c in categories] + [str(c.slug or '').replace('-', ' ') for c in categories]
+        ),
+        'description_text': _join_text(
+            [product.description]
+            + (product.features if isinstance(product.features, list) else [])
+            + (product.benefits if isinstance(product.benefits, list) else [])
+        ),
+    }
+
+
+def refresh_search_documents(product_ids):
+    """Create or update search documents for the given products in bulk."""
+    ids = {int(pk) for pk in (product_ids or []) if pk}
+    if not ids:
+        return 0
+    products = Product.objects.filter(id__in=ids).prefetch_related('categories')
+    existing = {
+        doc.product_id: doc
+        for doc in ProductSearchDocument.objects.filter(product_id__in=ids)
+    }
+    to_create = []
+    to_update = []
+    for product in products:
+        fields = build_search_document_fields(product)
+        doc = existing.get(product.id)
+        if doc is None:
+            to_create.append(ProductSearchDocument(product=product, **fields))
+            continue
+        if any(getattr(doc, name) != value for name, value in fields.items()):
+            for name, value in fields.items():
+                setattr(doc, name, value)
+            to_update.append(doc)
+    if to_create:
+        ProductSearchDocument.objects.bulk_create(to_create)
+    if to_update:
+        ProductSearchDocument.objects.bulk_update(
+            to_update, ['name_text', 'tags_text', 'category_text', 'description_text']
+        )
+    return len(to_create) + len(to_update)
+
+
+def search_backend(using=None) -> str:
+    """Return 'postgresql', 'sqlite' or '' (legacy scan) for the active database."""
+    alias = using or router.db_for_read(Product)
+    connection = connections[alias]
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor != 'sqlite':
+        return ''
+    key = (alias, str(connection.settings_dict.get('NAME')))
+    if key not in _fts_table_present:
+        try:
+            with connection.cursor() as cursor:
+                _fts_table_present[key] = SEARCH_FTS_TABLE in connection.introspection.table_names(cursor)
+        except Exception:
+            logger.exception('search.backend fts introspection failed alias=%s', alias)
+            return ''
+    return 'sqlite' if _fts_table_present[key] else ''
+
+
+def _fts5_match_expression(units) -> str:
+    expressions = []
+    for alternatives in units:
+        options = [f'"{" ".join(words)}"*' for words in alternatives]
+        expressions.append(options[0] if len(options) == 1 else f"({' OR '.join(options)})")
+    return ' '.join(expressions)
+
+
+def _tsquery_expression(units) -> str:
+    expressions = []
+    for alternatives in units:
+        options = [' <-> '.join(words) + ':*' for words in alternatives]
+        expressions.append(options[0] if len(options) == 1 else f"({' | '.join(options)})")
+    return ' & '.join(expressions)
+
+
+class _DocumentRank(Func):
+    """Correlated rank lookup for the outer product row. Lower ranks sort first."""
+    output_field = FloatField()
+
+    def __init__(self, rank_sql, query, **extra):
+        super().__init__(F('pk'), **extra)
+        self.rank_sql = rank_sql
+        self.query = query
+
+    def as_sql(self, compiler, connection, **extra_context):
+        pk_sql, pk_params = compiler.compile(self.get_source_expressions()[0])
+        return self.rank_sql.format(pk=pk_sql), [self.query, *pk_params]
+
+
+def _apply_sqlite_search(qs, units):
+    match = _fts5_match_expression(units)
+    weights = ', '.join(str(w) for w in SEARCH_FTS_WEIGHTS)
+    qs = qs.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {SEARCH_FTS_TABLE} WHERE {SEARCH_FTS_TABLE} MATCH %s', [match])
+    )
+    return qs.annotate(
+        search_rank=_DocumentRank(
+            f'(SELECT bm25({SEARCH_FTS_TABLE}, {weights}) FROM {SEARCH_FTS_TABLE} '
+            f'WHERE {SEARCH_FTS_TABLE} MATCH %s AND rowid = {{pk}})',
+            match,
+        )
+    )
+
+
+def _apply_postgres_search(qs, units):
+    tsquery = _tsquery_expression(units)
+    qs = qs.filter(
+        id__in=RawSQL(
+            f"SELECT product_id FROM {SEARCH_DOCUMENT_TABLE} WHERE search_vector @@ to_tsquery('simple', %s)",
+            [tsquery],
+        )
+    )
+    return qs.annotate(
+        search_rank=_DocumentRank(
+            f"(SELECT -ts_rank(search_vector, to_tsquery('simple', %s)) FROM {SEARCH_DOCUMENT_TABLE} "
+            f"WHERE product_id = {{pk}})",
+            tsquery,
+        )
+    )
+
+
+def _legacy_needles(words):
+    if len(words) == 1:
+        return [words[0]]
+    return [' '.join(words), '-'.join(words)]
+
+
+def _apply_legacy_search(qs, normalized_query, units):
+    for alternatives in units:
+        condition = Q()
+        for words in alternatives:
+            for needle in _legacy_needles(words):
+                condition |= (
+                    Q(name__icontains=needle)
+                    | Q(slug__icontains=needle)
+                    | Q(description__icontains=needle)
+                    | Q(categories__name__icontains=needle)
+                    | Q(categories__slug__icontains=needle)
+                )
+        qs = qs.filter(condition)
+    return qs.annotate(
+        search_rank=Case(
+            When(slug__iexact=normalized_query, then=Value(0)),
+            When(name__iexact=normalized_query, then=Value(1)),
+            When(name__istartswith=normalized_query, then=Value(2)),
+            When(slug__istartswith=normalized_query, then=Value(3)),
+            When(categories__name__iexact=normalized_query, then=Value(4)),
+            When(categories__slug__iexact=normalized_query, then=Value(5)),
+            When(name__icontains=normalized_query, then=Value(6)),
+            When(categories__name__icontains=normalized_query, then=Value(7)),
+            default=Value(8),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def search_products(qs, raw_query):
+    """
+    Filter a product queryset to search matches and annotate `search_rank`
+    (ascending = more relevant). Query words are expanded with synonyms and
+    stems first (see search_expansion.py). Returns the queryset unchanged for
+    empty queries.
+    """
+    normalized_query = normalize_search_query(raw_query)
+    if not normalized_query:
+        return qs
+    from .search_expansion import expand_query_terms
+
+    units = expand_query_terms(normalized_query)
+    if not units:
+        return qs.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    backend = search_backend(qs.db)
+    if backend == 'sqlite':
+        return _apply_sqlite_search(qs, units)
+    if backend == 'postgresql':
+        return _apply_postgres_search(qs, units)
+    return _apply_legacy_search(qs, normalized_query, units)
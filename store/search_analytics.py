@@ -0,0 +1,159 @@
+"""
+Search analytics: what customers search for, what finds nothing, and how long it takes.
+
+Catalog listings with `?q=` and assistant product searches call `record_search`,
+which only appends to a bounded in-process ring buffer (the oldest entries are
+dropped if the database falls behind). A daemon thread drains the buffer every
+`STORE_SEARCH_ANALYTICS_FLUSH_SECONDS` with one `bulk_create`, so the request
+path never writes. Result counts are what the customer saw: rows on a listing's
+first page (0 when autocorrect had to step in) or the assistant's matches.
+`search_report` backs the admin report.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+
+from .models import SearchEvent
+from .search import normalize_search_query
+
+logger = logging.getLogger(__name__)
+
+SEARCH_REPORT_ROWS = 25
+SEARCH_ANALYTICS_BATCH_SIZE = 500
+
+
+class SearchEventBuffer:
+    def __init__(self, maxlen):
+        self._events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def append(self, event):
+        with self._lock:
+            self._events.append(event)
+
+    def drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+
+_buffer = SearchEventBuffer(int(getattr(settings, 'STORE_SEARCH_ANALYTICS_BUFFER_SIZE', 5000)))
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_interval():
+    try:
+        return float(getattr(settings, 'STORE_SEARCH_ANALYTICS_FLUSH_SECONDS', 5))
+    except (TypeError, ValueError):
+        return 5.0
+
+
+def flush_search_events():
+    """Write buffered searches in one batch; returns how many were written."""
+    events = _buffer.drain()
+    if not events:
+        return 0
+    try:
+        SearchEvent.objects.bulk_create(events, batch_size=SEARCH_ANALYTICS_BATCH_SIZE)
+    except Exception:
+        logger.exception('search_analytics.flush failed events=%s', len(events))
+        return 0
+    return len(events)
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        flush_search_events()
+        close_old_connections()
+
+
+def _ensure_flusher():
+    global _flusher
+    interval = _flush_interval()
+    if _flusher is not None or interval <= 0:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, args=(interval,), name='search-analytics-flush', daemon=True)
+            _flusher.start()
+            atexit.register(flush_search_events)
+
+
+def record_search(raw_query, result_count, latency_ms, source=SearchEvent.SOURCE_CATALOG):
+    """Buffer one search; never touches the database."""
+    if not getattr(settings, 'STORE_SEARCH_ANALYTICS_ENABLED', True):
+        return
+    query = normalize_search_query(raw_query).lower()
+    if not query:
+        return
+    _buffer.append(SearchEvent(
+        query=query,
+        source=source,
+        result_count=max(0, int(result_count or 0)),
+        latency_ms=round(float(latency_ms), 3),
+        created_at=timezone.now(),
+    ))
+    _ensure_flusher()
+
+
+def latency_percentile(queryset, percentile):
+    """Nearest-rank percentile of `latency_ms`, or None for no rows."""
+    total = queryset.count()
+    if not total:
+        return None
+    index = max(0, math.ceil(percentile / 100 * total) - 1)
+    return queryset.order_by('latency_ms').values_list('latency_ms', flat=True)[index]
+
+
+def search_report(days=7, source=None):
+    since = timezone.now() - timedelta(days=days)
+    events = SearchEvent.objects.filter(created_at__gte=since)
+    if source:
+        events = events.filter(source=source)
+    totals = events.aggregate(
+        searches=Count('id'),
+        zero_results=Count('id', filter=Q(result_count=0)),
+        avg_latency_ms=Avg('latency_ms'),
+    )
+    top_queries = (
+        events.values('query')
+        .annotate(searches=Count('id'), zero_results=Count('id', filter=Q(result_count=0)), avg_latency_ms=Avg('latency_ms'))
+        .order_by('-searches', 'query')[:SEARCH_REPORT_ROWS]
+    )
+    zero_result_queries = (
+        events.filter(result_count=0)
+        .values('query')
+        .annotate(searches=Count('id'), last_searched=Max('created_at'))
+        .order_by('-searches', 'query')[:SEARCH_REPORT_ROWS]
+    )
+    return {
+        'days': days,
+        'source': source or '',
+        'searches': totals['searches'],
+        'zero_results': totals['zero_results'],
+        'avg_latency_ms': totals['avg_latency_ms'],
+        'p95_latency_ms': latency_percentile(events, 95),
+        'top_queries': list(top_queries),
+        'zero_result_queries': list(zero_result_queries),
+    }
+
+
+def prune_search_events(retention_days=None):
+    retention_days = retention_days or int(getattr(settings, 'STORE_SEARCH_ANALYTICS_RETENTION_DAYS', 90))
+    deleted, _ = SearchEvent.objects.filter(created_at__lt=timezone.now() - timedelta(days=retention_days)).delete()
+    return deleted
@@ -0,0 +1,137 @@
+"""
+Query-side synonym and stemming expansion for catalog search.
+
+Search terms are matched as prefixes, so a light stemmer only has to shorten a
+word to a prefix its other inflections share ("serums" -> "serum", "scented"
+-> "scent"). An "-ies" plural is ambiguous ("berries" -> "berry", "cookies" ->
+"cookie"), so both singulars are tried. Spelling variants and true synonyms ("moisturiser"/"moisturizer",
+"tee"/"t-shirt") come from a synonym map, `STORE_SEARCH_SYNONYMS` plus the
+defaults below, compiled once into a table keyed by stemmed word or phrase.
+
+`expand_query_terms` turns a query into units: each unit is a tuple of
+alternatives (any may match), each alternative a tuple of words (matched as a
+phrase, last word as a prefix). Expansion is a few dict lookups per query word
+and never touches the database.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+
+from .search import SEARCH_MAX_TERMS, SEARCH_TERM_RE
+
+DEFAULT_SEARCH_SYNONYMS = (
+    ('moisturizer', 'moisturiser'),
+    ('moisturizing', 'moisturising'),
+    ('tee', 't-shirt', 'tshirt'),
+    ('hoodie', 'hoody', 'hooded sweatshirt'),
+    ('sneaker', 'trainer'),
+    ('sweater', 'jumper'),
+    ('color', 'colour'),
+    ('gray', 'grey'),
+    ('sunscreen', 'sunblock', 'spf'),
+    ('fragrance', 'perfume', 'cologne'),
+    ('lipstick', 'lip stick'),
+    ('eyeliner', 'eye liner'),
+)
+# Longest synonym phrase, in words, looked for in a query.
+SEARCH_SYNONYM_MAX_WORDS = 3
+STEM_MIN_LENGTH = 4
+
+
+def stem_word(word) -> str:
+    """Shorten a lower-case word to a prefix shared by its common inflections."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith('ies') and len(word) > 5:
+        return word[:-3] + 'y'
+    if word.endswith('sses'):
+        return word[:-2]
+    if word.endswith(('xes', 'zes', 'ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= STEM_MIN_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def stem_variants(word) -> tuple:
+    """`stem_word(word)`, plus the "-ie" singular for "-ies" plurals the stemmer turned into "-y"."""
+    stem = stem_word(word)
+    if word.endswith('ies') and stem == word[:-3] + 'y':
+        return (stem, word[:-1])
+    return (stem,)
+
+
+def _phrase(text):
+    words = [word.lower() for word in SEARCH_TERM_RE.findall(str(text or ''))]
+    return tuple(words[:-1] + [stem_word(words[-1])]) if words else ()
+
+
+def _phrase_keys(words):
+    """Expansion table keys to try for a run of query words, one per stem of the last word."""
+    return [' '.join(words[:-1] + [stem]) for stem in stem_variants(words[-1])]
+
+
+def _minimal_alternatives(alternatives):
+    """Drop alternatives already covered by a shorter one (prefix matching subsumes them)."""
+    kept = []
+    for alternative in sorted(set(alternatives), key=lambda alt: (len(alt), ' '.join(alt))):
+        covered = any(
+            len(other) == len(alternative)
+            and other[:-1] == alternative[:-1]
+            and alternative[-1].startswith(other[-1])
+            for other in kept
+        )
+        if not covered:
+            kept.append(alternative)
+    return tuple(kept)
+
+
+def _configured_synonym_groups():
+    groups = list(DEFAULT_SEARCH_SYNONYMS)
+    for group in getattr(settings, 'STORE_SEARCH_SYNONYMS', ()) or ():
+        if isinstance(group, str):
+            group = group.split(',')
+        groups.append(tuple(group))
+    return tuple(groups)
+
+
+@lru_cache(maxsize=4)
+def compile_expansion_table(groups):
+    """{stemmed word or phrase: alternatives} for the given synonym groups."""
+    merged = {}
+    for group in groups:
+        phrases = {_phrase(entry) for entry in group} - {()}
+        for phrase in phrases:
+            merged.setdefault(phrase, set()).update(phrases)
+    return {
+        ' '.join(phrase): _minimal_alternatives(alternatives)
+        for phrase, alternatives in merged.items()
+    }
+
+
+def expansion_table():
+    return compile_expansion_table(_configured_synonym_groups())
+
+
+def expand_query_terms(query):
+    """[(alternative word tuples), ...], one unit per query word or synonym phrase."""
+    words = [word.lower() for word in SEARCH_TERM_RE.findall(str(query or ''))]
+    table = expansion_table()
+    units = []
+    index = 0
+    while index < len(words) and len(units) < SEARCH_MAX_TERMS:
+        for size in range(min(SEARCH_SYNONYM_MAX_WORDS, len(words) - index), 0, -1):
+            keys = _phrase_keys(words[index:index + size])
+            alternatives = next((table[key] for key in keys if key in table), None)
+            if alternatives:
+                break
+        else:
+            size = 1
+            word = words[index]
+            alternatives = _minimal_alternatives([(word,)] + [(stem,) for stem in stem_variants(word)])
+        units.append(alternatives)
+        index += size
+    return units
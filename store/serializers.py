@@ -1,9 +1,6 @@
 ﻿from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from django.conf import settings
-import os
-import re
-from urllib.parse import urlparse, quote, unquote
+from .image_urls import get_image_url_resolver
 from .models import (
     Product,
     ProductImage,
@@ -26,232 +23,21 @@ from .models import (
 User = get_user_model()
 
 
+# Thin wrappers kept for existing imports; the memoized logic lives in image_urls.py.
 def _cloudinary_cloud_name():
-    def _clean_cloud_name(value: str) -> str:
-        candidate = str(value or '').strip()
-        if not candidate:
-            return ''
-        lowered = unquote(candidate).strip().lower()
-        if '<' in lowered or '>' in lowered:
-            return ''
-        if lowered in {'cloud_name', 'your_cloud_name', 'replace_me'}:
-            return ''
-        return candidate
-
-    storage_cfg = getattr(settings, 'CLOUDINARY_STORAGE', {}) or {}
-    cloud_name = _clean_cloud_name(storage_cfg.get('CLOUD_NAME'))
-    if cloud_name:
-        return cloud_name
-    cloudinary_url = str(os.environ.get('CLOUDINARY_URL') or '').strip().strip('"').strip("'")
-    if cloudinary_url.lower().startswith('cloudinary_url='):
-        cloudinary_url = cloudinary_url.split('=', 1)[1].strip().strip('"').strip("'")
-    if not cloudinary_url:
-        return ''
-    try:
-        parsed = urlparse(cloudinary_url)
-        if parsed.scheme == 'cloudinary':
-            return _clean_cloud_name(parsed.hostname)
-    except Exception:
-        return ''
-    return ''
-
-
-def _extract_cloudinary_public_id(path: str) -> str:
-    path = str(path or '').replace('\\', '/')
-    marker = '/image/upload/'
-    lowered = path.lower()
-    if marker in lowered:
-        idx = lowered.find(marker)
-        tail = path[idx + len(marker):].lstrip('/')
-    else:
-        segments = [seg for seg in path.split('/') if seg]
-        tail = '/'.join(segments[1:]) if len(segments) > 1 else ''
-
-    if tail.startswith('v') and '/' in tail:
-        version, remainder = tail.split('/', 1)
-        if version[1:].isdigit():
-            tail = remainder
-    return unquote(tail).lstrip('/')
+    return get_image_url_resolver().cloud_name
 
 
 def _normalize_cloudinary_delivery_url(url: str) -> str:
-    cleaned = str(url or '').strip()
-    if not cleaned:
-        return ''
-    try:
-        parsed = urlparse(cleaned)
-    except Exception:
-        return cleaned
-    if 'res.cloudinary.com' not in str(parsed.netloc or '').lower():
-        return cleaned
-
-    path = (parsed.path or '').replace('\\', '/')
-    # Keep delivered Cloudinary path as-is. We only normalize slashes and placeholders.
-    path_segments = [seg for seg in path.split('/') if seg]
-    current_cloud_name = unquote(path_segments[0]).strip() if path_segments else ''
-    cloud_name = _cloudinary_cloud_name()
-    is_placeholder_cloud = (
-        (not current_cloud_name)
-        or ('<' in current_cloud_name or '>' in current_cloud_name)
-        or (current_cloud_name.lower() in {'cloud_name', 'your_cloud_name', 'replace_me'})
-    )
-    if is_placeholder_cloud:
-        public_id = _extract_cloudinary_public_id(path)
-        if cloud_name and public_id:
-            return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(public_id, safe="/")}'
-        if public_id:
-            if public_id.startswith('media/'):
-                public_id = public_id[len('media/'):]
-            return f'/media/{public_id}'
-        return ''
-
-    try:
-        return parsed._replace(path=path).geturl()
-    except Exception:
-        return cleaned
+    return get_image_url_resolver().normalize_delivery_url(url)
 
 
 def _fallback_image_url_from_name(name: str, upload_prefix: str = '') -> str:
-    cleaned = str(name or '').strip().replace('\\', '/').lstrip('/')
-    prefix = str(upload_prefix or '').strip().replace('\\', '/').lstrip('/')
-    if prefix and not prefix.endswith('/'):
-        prefix = f'{prefix}/'
-    if not cleaned:
-        return ''
-    if cleaned.startswith('https:/') and not cleaned.startswith('https://'):
-        cleaned = cleaned.replace('https:/', 'https://', 1)
-    if cleaned.startswith('http:/') and not cleaned.startswith('http://'):
-        cleaned = cleaned.replace('http:/', 'http://', 1)
-    if cleaned.startswith('http://') or cleaned.startswith('https://') or cleaned.startswith('data:'):
-        if 'res.cloudinary.com/' in cleaned:
-            repaired = _normalize_cloudinary_delivery_url(cleaned)
-            if repaired:
-                cleaned = repaired
-            if cleaned.startswith('/'):
-                return cleaned
-        # If a Cloudinary URL was stored without `/image/upload/`, normalize it.
-        if 'res.cloudinary.com/' in cleaned and '/image/upload/' not in cleaned:
-            try:
-                parsed = urlparse(cleaned)
-                parts = [p for p in parsed.path.split('/') if p]
-                # /<cloud_name>/<public_id...>
-                if len(parts) >= 2:
-                    cloud_name = parts[0]
-                    public_id = quote('/'.join(parts[1:]), safe='/')
-                    return f'{parsed.scheme}://{parsed.netloc}/{cloud_name}/image/upload/{public_id}'
-            except Exception:
-                pass
-        return _normalize_cloudinary_delivery_url(cleaned)
-    if cleaned.startswith('media/'):
-        cloud_name = _cloudinary_cloud_name()
-        media_relative = cleaned[len('media/'):]
-        if cloud_name and media_relative.startswith(('products/', 'categories/', 'hero/')):
-            return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(cleaned, safe="/")}'
-        return f'/{cleaned}'
-
-    if cleaned.startswith(('products/', 'categories/', 'hero/')):
-        cloud_name = _cloudinary_cloud_name()
-        if cloud_name:
-            return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(cleaned, safe="/")}'
-        return f'/media/{cleaned}'
-    if cleaned.startswith('res.cloudinary.com/'):
-        candidate = _normalize_cloudinary_delivery_url(f'https://{cleaned}')
-        if candidate.startswith('/'):
-            return candidate
-        if candidate:
-            cleaned = candidate
-        candidate = f'https://{cleaned}'
-        if '/image/upload/' not in candidate:
-            try:
-                parsed = urlparse(candidate)
-                parts = [p for p in parsed.path.split('/') if p]
-                if len(parts) >= 2:
-                    cloud_name = parts[0]
-                    public_id = quote('/'.join(parts[1:]), safe='/')
-                    return f'https://{parsed.netloc}/{cloud_name}/image/upload/{public_id}'
-            except Exception:
-                pass
-        return candidate
-
-    # Cloudinary often stores a public_id in the field value; construct delivery URL.
-    if prefix and '/' not in cleaned and cleaned.lower().endswith(
-        ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.svg', '.avif')
-    ):
-        cleaned = f'{prefix}{cleaned}'
-    cloud_name = _cloudinary_cloud_name()
-    if cloud_name:
-        return f'https://res.cloudinary.com/{cloud_name}/image/upload/{quote(cleaned, safe="/")}'
-    if prefix and '/' not in cleaned:
-        cleaned = f'{prefix}{cleaned}'
-    return f'/media/{cleaned}'
+    return get_image_url_resolver().url_from_name(name, upload_prefix)
 
 
 def _resolve_image_url(field_file, request=None) -> str:
-    if not field_file:
-        return ''
-
-    upload_prefix = ''
-    try:
-        upload_prefix = str(
-            getattr(getattr(field_file, 'field', None), 'upload_to', '') or ''
-        ).strip()
-    except Exception:
-        upload_prefix = ''
-
-    raw_url = ''
-    try:
-        raw_url = str(field_file.url or '').strip()
-    except Exception:
-        raw_url = ''
-
-    raw_name = ''
-    try:
-        raw_name = str(getattr(field_file, 'name', '') or '').strip()
-    except Exception:
-        raw_name = ''
-    normalized_name = raw_name.replace('\\', '/').lstrip('/')
-
-    # For Cloudinary, use name-based fallback only when the URL is clearly
-    # placeholder/broken or misses the `media/` namespace present in stored name.
-    if (
-        raw_url.startswith(('http://', 'https://'))
-        and 'res.cloudinary.com/' in raw_url
-        and normalized_name
-    ):
-        name_based_url = _fallback_image_url_from_name(
-            normalized_name, upload_prefix=upload_prefix
-        )
-        if name_based_url.startswith(('http://', 'https://')):
-            raw_lower = raw_url.lower()
-            needs_name_based_repair = (
-                '<cloud_name>' in raw_lower
-                or '%3ccloud_name%3e' in raw_lower
-                or 'your_cloud_name' in raw_lower
-            )
-            if needs_name_based_repair:
-                return name_based_url
-
-    # If storage returns another absolute URL, keep it unchanged.
-    if raw_url.startswith(('http://', 'https://')):
-        return raw_url
-
-    url = _fallback_image_url_from_name(
-        raw_url, upload_prefix=upload_prefix
-    ) if raw_url else ''
-
-    if not url:
-        url = _fallback_image_url_from_name(
-            normalized_name,
-            upload_prefix=upload_prefix
-        )
-
-    if not url:
-        return ''
-
-    if request and url.startswith('/'):
-        return request.build_absolute_uri(url)
-
-    return url
+    return get_image_url_resolver().resolve(field_file, request)
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -267,7 +53,7 @@ class ProductImageSerializer(serializers.ModelSerializer):
 
 
 class CategorySerializer(serializers.ModelSerializer):
-    product_count = serializers.IntegerField(read_only=True)
+    product_count = serializers.IntegerField(source='active_product_count', read_only=True)
     image_url = serializers.SerializerMethodField()
 
     def get_image_url(self, obj):
@@ -276,7 +62,7 @@ class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'image', 'image_url', 'parent', 'is_active', 'product_count']
+        fields = ['id', 'name', 'slug', 'description', 'image', 'image_url', 'parent', 'depth', 'is_active', 'product_count']
 
 
 class HomeHeroSlideSerializer(serializers.ModelSerializer):
@@ -306,19 +92,112 @@ class HomeHeroSlideSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+def parse_fieldsets(query_params):
+    """Read `fields=a,b` and `expand=c` into (set or None, set)."""
+    def _names(param):
+        names = set()
+        for raw in query_params.getlist(param):
+            names.update(part.strip() for part in str(raw).split(',') if part.strip())
+        return names
+
+    return (_names('fields') or None), _names('expand')
+
+
+class SparseFieldsetMixin:
+    """
+    Trim a serializer to the fieldset in `context['fieldsets']`.
+
+    Without a fieldset the serializer renders `default_fields` (all of `Meta.fields`
+    when unset). `fields` replaces that selection; `expand` adds nested relations.
+    """
+    default_fields = None
+    expandable_fields = ()
+    # Model columns each non-column field needs loaded; other fields load themselves.
+    field_columns = {}
+
+    @classmethod
+    def resolve_field_names(cls, fields=None, expand=()):
+        available = list(cls.Meta.fields)
+        selected = set(fields) if fields else set(cls.default_fields or available)
+        selected |= set(expand or ()) & set(cls.expandable_fields)
+        return [name for name in available if name in selected]
+
+    @classmethod
+    def required_columns(cls, field_names):
+        concrete = {f.name for f in cls.Meta.model._meta.concrete_fields}
+        columns = set()
+        for name in field_names:
+            if name in cls.field_columns:
+                columns.update(cls.field_columns[name])
+            elif name in concrete:
+                columns.add(name)
+        return columns
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = self.context.get('fieldsets') or (None, ())
+        keep = set(self.resolve_field_names(fields, expand))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+def _absolute_media_url(url, request=None):
+    url = str(url or '')
+    if request and url.startswith('/'):
+        return request.build_absolute_uri(url)
+    return url
+
+
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
+    image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    in_stock = serializers.SerializerMethodField()
+
+    default_fields = [
+        'id', 'name', 'slug', 'description', 'price', 'original_price', 'stock', 'rating', 'review_count',
+        'is_active', 'is_featured', 'is_flash_sale', 'is_digital', 'created_at', 'images', 'categories',
+        'features', 'benefits', 'tags'
+    ]
+    expandable_fields = ('images', 'categories')
+    field_columns = {
+        'image_url': ('primary_image_url',),
+        'image_variants': ('image_variants',),
+        'in_stock': ('stock', 'is_digital'),
+        'images': (),
+        'categories': (),
+    }
+
+    def get_image_url(self, obj):
+        # Stored by store/primary_images.py whenever the product's images change.
+        return _absolute_media_url(obj.primary_image_url, self.context.get('request'))
+
+    def get_image_variants(self, obj):
+        request = self.context.get('request')
+        return {name: _absolute_media_url(url, request) for name, url in (obj.image_variants or {}).items()}
+
+    def get_in_stock(self, obj):
+        return bool(obj.is_digital or int(obj.stock or 0) > 0)
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'description', 'price', 'original_price', 'stock', 'rating', 'review_count',
             'is_active', 'is_featured', 'is_flash_sale', 'is_digital', 'created_at', 'images', 'categories',
-            'features', 'benefits', 'tags'
+            'features', 'benefits', 'tags', 'image_url', 'image_variants', 'in_stock'
         ]
 
 
+class ProductCardSerializer(ProductSerializer):
+    """Grid/card payload: no long text, JSON lists or nested objects unless expanded."""
+    default_fields = ['id', 'slug', 'name', 'price', 'original_price', 'rating', 'image_url', 'in_stock']
+
+    class Meta(ProductSerializer.Meta):
+        pass
+
+
 class ProductReviewSerializer(serializers.ModelSerializer):
     display_name = serializers.SerializerMethodField()
     verified = serializers.SerializerMethodField()
@@ -339,8 +218,25 @@ class ProductReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'product', 'display_name', 'verified', 'created_at']
 
 
+class CartProductSerializer(ProductCardSerializer):
+    """Cart line payload: card fields, stock limits and one category label."""
+    category = serializers.SerializerMethodField()
+    default_fields = [
+        'id', 'slug', 'name', 'price', 'original_price', 'image_url', 'in_stock', 'stock', 'is_digital', 'category',
+    ]
+    field_columns = {**ProductCardSerializer.field_columns, 'category': ()}
+
+    def get_category(self, obj):
+        # Reads the prefetched `categories`; see store.cart_store.cart_product_queryset.
+        categories = list(obj.categories.all())
+        return categories[0].name if categories else None
+
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ['category']
+
+
 class CartItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = CartProductSerializer(read_only=True)
 
     class Meta:
         model = CartItem
@@ -368,7 +264,7 @@ class AddressSerializer(serializers.ModelSerializer):
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    product = ProductCardSerializer(read_only=True)
 
     class Meta:
         model = OrderItem
@@ -405,7 +301,7 @@ class OrderSerializer(serializers.ModelSerializer):
 
 
 class WishlistSerializer(serializers.ModelSerializer):
-    products = ProductSerializer(many=True, read_only=True)
+    products = ProductCardSerializer(many=True, read_only=True)
 
     class Meta:
         model = Wishlist
@@ -1,9 +1,20 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
+from django.contrib.auth.signals import user_logged_in
 from django.conf import settings
 import logging
-from .models import ProductImage, Category
+from .models import Product, ProductImage, ProductReview, Category, HomeHeroSlide, Page, RelatedProduct
 from .media_layout import ensure_category_media_structure
+from .search import refresh_search_documents
+from .catalog_cache import bump_catalog_version, catalog_version_bumped
+from .home_payload import schedule_home_payload_rebuild
+from .spelling import schedule_spelling_rebuild
+from .primary_images import refresh_primary_images
+from .category_counters import adjust_category_counts, product_category_ids
+from .similar_products import SIMILAR_TEXT_FIELDS, schedule_similar_products_refresh
+from .product_attributes import ATTRIBUTE_FIELDS, clean_attribute_list, sync_product_attributes
+from .review_stats import apply_review_stats_deltas, review_stats_deltas
+from .cart_store import merge_session_cart_into_user
 
 logger = logging.getLogger(__name__)
 
@@ -49,3 +60,262 @@ def product_image_post_save(sender, instance, created, **kwargs):
     except Exception:
         logger.exception('metadata signal processing failed product_id=%s image_id=%s', product.id, instance.id)
         return
+
+
+@receiver(post_save, sender=ProductImage)
+def product_image_post_save_refresh_primary_image(sender, instance, raw=False, **kwargs):
+    # Registered after the metadata receiver so its product.save() cannot clobber the refresh.
+    if raw:
+        return
+    refresh_primary_images([instance.product_id])
+
+
+@receiver(post_delete, sender=ProductImage)
+def product_image_post_delete_refresh_primary_image(sender, instance, **kwargs):
+    refresh_primary_images([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+def product_post_save_refresh_search_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_documents([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def product_post_save_sync_attributes(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not (set(update_fields) & set(ATTRIBUTE_FIELDS)):
+        return
+    sync_product_attributes([instance.pk])
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def product_categories_changed_refresh_search_document(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # Reverse clears do not carry pk_set; remember affected products before the rows disappear.
+        instance._search_clear_product_ids = list(instance.products.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        refresh_search_documents([instance.pk])
+    elif action == 'post_clear':
+        refresh_search_documents(getattr(instance, '_search_clear_product_ids', []))
+    else:
+        refresh_search_documents(pk_set)
+
+
+@receiver(post_save, sender=Category)
+def category_post_save_refresh_search_documents(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    refresh_search_documents(instance.products.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+def category_pre_delete_collect_products(sender, instance, **kwargs):
+    instance._search_product_ids = list(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def category_post_delete_refresh_search_documents(sender, instance, **kwargs):
+    refresh_search_documents(getattr(instance, '_search_product_ids', []))
+
+
+def catalog_changed_bump_version(sender, raw=False, **kwargs):
+    if raw:
+        return
+    bump_catalog_version()
+
+
+for _catalog_model in (Product, ProductImage, Category, HomeHeroSlide):
+    post_save.connect(
+        catalog_changed_bump_version,
+        sender=_catalog_model,
+        dispatch_uid=f'catalog_version_post_save_{_catalog_model.__name__}',
+    )
+    post_delete.connect(
+        catalog_changed_bump_version,
+        sender=_catalog_model,
+        dispatch_uid=f'catalog_version_post_delete_{_catalog_model.__name__}',
+    )
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def product_categories_changed_bump_catalog_version(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalog_version()
+
+
+@receiver(pre_save, sender=Product)
+def product_pre_save_clean_attribute_lists(sender, instance, raw=False, update_fields=None, **kwargs):
+    # The Postgres attribute filter only lower()s stored elements, so they must already be trimmed.
+    if raw:
+        return
+    for field in ATTRIBUTE_FIELDS:
+        if update_fields is None or field in update_fields:
+            setattr(instance, field, clean_attribute_list(getattr(instance, field)))
+
+
+@receiver(pre_save, sender=Product)
+def product_pre_save_remember_active_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._was_active = None
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and 'is_active' not in update_fields:
+        instance._was_active = instance.is_active
+        return
+    instance._was_active = Product.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+def product_post_save_update_category_counts(sender, instance, created, raw=False, **kwargs):
+    was_active = getattr(instance, '_was_active', None)
+    if raw or created or was_active is None or bool(was_active) == bool(instance.is_active):
+        return
+    adjust_category_counts(product_category_ids([instance.pk]), 1 if instance.is_active else -1)
+
+
+@receiver(pre_delete, sender=Product)
+def product_pre_delete_collect_categories(sender, instance, **kwargs):
+    instance._counted_category_ids = product_category_ids([instance.pk]) if instance.is_active else []
+
+
+@receiver(post_delete, sender=Product)
+def product_post_delete_update_category_counts(sender, instance, **kwargs):
+    adjust_category_counts(getattr(instance, '_counted_category_ids', []), -1)
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def product_categories_changed_update_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # instance is a Product; pk_set holds category ids.
+        if action == 'pre_clear':
+            instance._counted_clear_category_ids = product_category_ids([instance.pk]) if instance.is_active else []
+        elif action == 'post_add' and instance.is_active:
+            adjust_category_counts(pk_set, 1)
+        elif action == 'pre_remove':
+            # remove() reports every id it was given, linked or not.
+            instance._counted_remove_category_ids = list(
+                sender.objects.filter(product_id=instance.pk, category_id__in=pk_set or [])
+                .values_list('category_id', flat=True)
+            ) if instance.is_active else []
+        elif action == 'post_remove':
+            adjust_category_counts(getattr(instance, '_counted_remove_category_ids', []), -1)
+        elif action == 'post_clear':
+            adjust_category_counts(getattr(instance, '_counted_clear_category_ids', []), -1)
+        return
+
+    # instance is a Category; pk_set holds product ids.
+    if action == 'pre_clear':
+        instance._counted_clear_total = instance.products.filter(is_active=True).count()
+    elif action == 'post_add':
+        active = Product.objects.filter(pk__in=pk_set or [], is_active=True).count()
+        adjust_category_counts([instance.pk], active)
+    elif action == 'pre_remove':
+        instance._counted_remove_total = sender.objects.filter(
+            category_id=instance.pk, product_id__in=pk_set or [], product__is_active=True
+        ).count()
+    elif action == 'post_remove':
+        adjust_category_counts([instance.pk], -getattr(instance, '_counted_remove_total', 0))
+    elif action == 'post_clear':
+        adjust_category_counts([instance.pk], -getattr(instance, '_counted_clear_total', 0))
+
+
+@receiver(post_save, sender=Product)
+def product_post_save_refresh_similar_products(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not (set(update_fields) & (SIMILAR_TEXT_FIELDS | {'is_active'})):
+        return
+    schedule_similar_products_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=Product)
+def product_pre_delete_collect_similar_lists(sender, instance, **kwargs):
+    instance._similar_list_product_ids = list(
+        RelatedProduct.objects.filter(kind=RelatedProduct.KIND_CONTENT, related=instance)
+        .values_list('product_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def product_post_delete_refresh_similar_products(sender, instance, **kwargs):
+    # Rows pointing at the product cascade away; rescore the lists they left short.
+    schedule_similar_products_refresh(getattr(instance, '_similar_list_product_ids', []))
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def product_categories_changed_refresh_similar_products(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._similar_clear_product_ids = list(instance.products.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_similar_products_refresh([instance.pk])
+    elif action == 'post_clear':
+        schedule_similar_products_refresh(getattr(instance, '_similar_clear_product_ids', []))
+    else:
+        schedule_similar_products_refresh(pk_set)
+
+
+@receiver(post_save, sender=Page)
+def storefront_theme_page_saved_bump_catalog_version(sender, instance, raw=False, **kwargs):
+    from .views import STOREFRONT_THEME_PAGE_SLUG
+    # The theme preset is part of the prebuilt home payload.
+    if not raw and instance.slug == STOREFRONT_THEME_PAGE_SLUG:
+        bump_catalog_version()
+
+
+@receiver(catalog_version_bumped)
+def catalog_version_bumped_rebuild_home_payload(sender, **kwargs):
+    schedule_home_payload_rebuild()
+
+
+@receiver(catalog_version_bumped)
+def catalog_version_bumped_rebuild_spelling(sender, **kwargs):
+    schedule_spelling_rebuild()
+
+
+def _review_state(review):
+    return (review.product_id, int(review.rating or 0), bool(review.is_approved))
+
+
+@receiver(pre_save, sender=ProductReview)
+def review_pre_save_remember_state(sender, instance, raw=False, **kwargs):
+    instance._previous_review_state = None
+    if raw or not instance.pk:
+        return
+    instance._previous_review_state = (
+        ProductReview.objects.filter(pk=instance.pk).values_list('product_id', 'rating', 'is_approved').first()
+    )
+
+
+@receiver(post_save, sender=ProductReview)
+def review_post_save_update_stats(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_review_stats_deltas(
+        review_stats_deltas(getattr(instance, '_previous_review_state', None), _review_state(instance))
+    )
+
+
+@receiver(post_delete, sender=ProductReview)
+def review_post_delete_update_stats(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Product) or getattr(origin, 'model', None) is Product:
+        # The product itself is going away.
+        return
+    apply_review_stats_deltas(review_stats_deltas(_review_state(instance), None))
+
+
+@receiver(user_logged_in)
+def user_logged_in_merge_session_cart(sender, request, user, **kwargs):
+    if request is None:
+        return
+    try:
+        merge_session_cart_into_user(request, user)
+    except Exception:
+        logger.exception('cart.merge failed user_id=%s', getattr(user, 'id', None))
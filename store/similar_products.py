@@ -0,0 +1,274 @@
+"""
+Content-based "similar products" from catalog text.
+
+Each active product becomes a feature-hashed TF-IDF vector over its name, tags,
+description, features and category membership (one feature per category id),
+L2-normalized and stored in `ProductTextVector`. Cosine neighbours are scored
+through an inverted index (bucket -> postings), so only products sharing at
+least one term are ever compared, and the full rebuild writes `RelatedProduct`
+rows (kind=content) one chunk of products at a time.
+
+Text edits go through `refresh_similar_products()`: unchanged text is skipped
+by hash, changed products get a new vector and list, and only the lists that
+contained them or that they now break into are rescored. IDF weights of
+untouched vectors are left as of their last build until the next full rebuild.
+"""
+import hashlib
+import heapq
+import logging
+import math
+import zlib
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Prefetch
+
+from .catalog_cache import bump_catalog_version
+from .models import Category, Product, ProductTextVector, RelatedProduct
+from .recommendations import related_products_limit
+from .search import SEARCH_TERM_RE
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_HASH_BUCKETS = 1 << 18
+SIMILAR_MIN_SCORE = 0.05
+SIMILAR_TEXT_FIELDS = {'name', 'description', 'tags', 'features'}
+# Terms found in more than this share of a sizeable catalog carry no signal and
+# would make every posting list as long as the catalog.
+SIMILAR_MAX_DF_RATIO = 0.5
+SIMILAR_MAX_DF_MIN_CATALOG = 20
+SIMILAR_FIELD_WEIGHTS = {'name': 3, 'tags': 2, 'category': 2, 'text': 1}
+SIMILAR_STOPWORDS = frozenset(
+    'a an and are as at be by for from in into is it its of on or our the this to with your you'.split()
+)
+
+
+def _tokens(value):
+    return [
+        token
+        for token in (t.lower() for t in SEARCH_TERM_RE.findall(str(value or '')))
+        if len(token) > 1 and not token.isdigit() and token not in SIMILAR_STOPWORDS
+    ]
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode('utf-8')) % SIMILAR_HASH_BUCKETS
+
+
+def _as_list(value):
+    return [str(v) for v in value] if isinstance(value, list) else []
+
+
+def product_term_counts(product):
+    """(Counter of weighted term frequencies per hash bucket, hash of the source text)."""
+    category_ids = sorted(c.id for c in product.categories.all())
+    sources = {
+        'name': [product.name],
+        'tags': _as_list(product.tags),
+        'text': [product.description] + _as_list(product.features),
+    }
+    counts = Counter()
+    for field, values in sources.items():
+        weight = SIMILAR_FIELD_WEIGHTS[field]
+        for value in values:
+            for token in _tokens(value):
+                counts[_bucket(token)] += weight
+    for category_id in category_ids:
+        counts[_bucket(f'category:{category_id}')] += SIMILAR_FIELD_WEIGHTS['category']
+    text_hash = hashlib.sha1(repr((sources, category_ids)).encode('utf-8')).hexdigest()
+    return counts, text_hash
+
+
+def vectorize(counts, doc_freq, total):
+    """Sublinear TF x smoothed IDF, L2-normalized; returns {bucket: weight}."""
+    max_df = total * SIMILAR_MAX_DF_RATIO if total >= SIMILAR_MAX_DF_MIN_CATALOG else None
+    weights = {}
+    for bucket, tf in counts.items():
+        df = doc_freq.get(bucket, 0)
+        if max_df is not None and df > max_df:
+            continue
+        weights[bucket] = (1.0 + math.log(tf)) * (math.log((1 + total) / (1 + df)) + 1.0)
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    if not norm:
+        return {}
+    return {bucket: round(w / norm, 6) for bucket, w in weights.items()}
+
+
+def _postings(vectors):
+    index = defaultdict(list)
+    for product_id, weights in vectors.items():
+        for bucket, weight in weights.items():
+            index[bucket].append((product_id, weight))
+    return index
+
+
+def _similarity_scores(product_id, vectors, postings):
+    scores = defaultdict(float)
+    for bucket, weight in vectors.get(product_id, {}).items():
+        for other_id, other_weight in postings.get(bucket, ()):
+            if other_id != product_id:
+                scores[other_id] += weight * other_weight
+    return scores
+
+
+def _top_neighbours(product_ids, vectors, postings, limit):
+    neighbours = {}
+    for product_id in product_ids:
+        scores = _similarity_scores(product_id, vectors, postings)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        neighbours[product_id] = [(other_id, score) for other_id, score in best if score >= SIMILAR_MIN_SCORE]
+    return neighbours
+
+
+def _store_neighbours(neighbours):
+    kind = RelatedProduct.KIND_CONTENT
+    with transaction.atomic():
+        RelatedProduct.objects.filter(product_id__in=list(neighbours), kind=kind).delete()
+        RelatedProduct.objects.bulk_create(
+            [
+                RelatedProduct(product_id=product_id, related_id=related_id, kind=kind, rank=rank, score=round(score, 6))
+                for product_id, scored in neighbours.items()
+                for rank, (related_id, score) in enumerate(scored, start=1)
+            ],
+            batch_size=1000,
+        )
+
+
+def _catalog_products():
+    return (
+        Product.objects.filter(is_active=True)
+        .only('id', 'name', 'description', 'tags', 'features')
+        .prefetch_related(Prefetch('categories', queryset=Category.objects.only('id')))
+    )
+
+
+def _load_vectors(exclude_ids=()):
+    rows = (
+        ProductTextVector.objects.filter(product__is_active=True)
+        .exclude(product_id__in=list(exclude_ids))
+        .values_list('product_id', 'weights')
+    )
+    return {
+        product_id: {int(bucket): float(weight) for bucket, weight in (weights or {}).items()}
+        for product_id, weights in rows.iterator(chunk_size=2000)
+    }
+
+
+def _save_vectors(vectors, hashes):
+    ProductTextVector.objects.bulk_create(
+        [
+            ProductTextVector(product_id=product_id, weights={str(b): w for b, w in vectors[product_id].items()}, text_hash=text_hash)
+            for product_id, text_hash in hashes.items()
+        ],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['weights', 'text_hash', 'updated_at'],
+    )
+
+
+def rebuild_similar_products(chunk_size=256):
+    """Vectorize the whole active catalog and rewrite every content neighbour list."""
+    counts, hashes = {}, {}
+    for product in _catalog_products().iterator(chunk_size=500):
+        counts[product.id], hashes[product.id] = product_term_counts(product)
+    total = len(counts)
+    doc_freq = Counter(bucket for product_counts in counts.values() for bucket in product_counts)
+    vectors = {product_id: vectorize(product_counts, doc_freq, total) for product_id, product_counts in counts.items()}
+    del counts
+
+    with transaction.atomic():
+        ProductTextVector.objects.all().delete()
+        RelatedProduct.objects.filter(kind=RelatedProduct.KIND_CONTENT).delete()
+        _save_vectors(vectors, hashes)
+
+    postings = _postings(vectors)
+    limit = related_products_limit()
+    product_ids = sorted(vectors)
+    chunk_size = max(1, int(chunk_size))
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        _store_neighbours(_top_neighbours(chunk, vectors, postings, limit))
+
+    bump_catalog_version()
+    logger.info('similar_products.rebuild products=%s', total)
+    return {'products': total}
+
+
+def refresh_similar_products(product_ids):
+    """Re-vectorize products whose text changed and rescore the neighbour lists they affect."""
+    ids = {int(pk) for pk in (product_ids or []) if pk}
+    if not ids:
+        return 0
+    products = {product.id: product for product in _catalog_products().filter(id__in=ids)}
+    stored_hashes = dict(ProductTextVector.objects.filter(product_id__in=ids).values_list('product_id', 'text_hash'))
+    changed = {}
+    for product_id, product in products.items():
+        product_counts, text_hash = product_term_counts(product)
+        if stored_hashes.get(product_id) != text_hash:
+            changed[product_id] = (product_counts, text_hash)
+    removed = ids - set(products)
+    if not changed and not removed:
+        return 0
+
+    vectors = _load_vectors(exclude_ids=set(changed) | removed)
+    doc_freq = Counter(bucket for weights in vectors.values() for bucket in weights)
+    for product_counts, _text_hash in changed.values():
+        doc_freq.update(product_counts.keys())
+    total = len(vectors) + len(changed)
+    for product_id, (product_counts, _text_hash) in changed.items():
+        vectors[product_id] = vectorize(product_counts, doc_freq, total)
+
+    content_rows = RelatedProduct.objects.filter(kind=RelatedProduct.KIND_CONTENT)
+    affected = set(changed)
+    affected |= set(content_rows.filter(related_id__in=set(changed) | removed).values_list('product_id', flat=True))
+
+    # Lists a changed product may now break into: shorter than the limit, or beaten on score.
+    limit = related_products_limit()
+    postings = _postings(vectors)
+    candidates = {}
+    for product_id in changed:
+        for other_id, score in _similarity_scores(product_id, vectors, postings).items():
+            if score >= SIMILAR_MIN_SCORE:
+                candidates[other_id] = max(score, candidates.get(other_id, 0.0))
+    floors = {
+        row['product_id']: row
+        for row in content_rows.filter(product_id__in=list(candidates))
+        .values('product_id')
+        .annotate(size=Count('id'), floor=Min('score'))
+    }
+    for other_id, score in candidates.items():
+        row = floors.get(other_id)
+        if row is None or row['size'] < limit or score > row['floor']:
+            affected.add(other_id)
+    affected &= set(vectors)
+
+    with transaction.atomic():
+        if removed:
+            ProductTextVector.objects.filter(product_id__in=removed).delete()
+            content_rows.filter(product_id__in=removed).delete()
+        if changed:
+            _save_vectors(vectors, {product_id: text_hash for product_id, (_counts, text_hash) in changed.items()})
+        _store_neighbours(_top_neighbours(affected, vectors, postings, limit))
+    bump_catalog_version()
+    return len(affected)
+
+
+def schedule_similar_products_refresh(product_ids):
+    """Refresh after commit: on a worker when async tasks are enabled, inline otherwise."""
+    ids = sorted({int(pk) for pk in (product_ids or []) if pk})
+    if not ids:
+        return
+
+    def _run():
+        try:
+            if getattr(settings, 'STORE_METADATA_ASYNC', False):
+                from .tasks import refresh_similar_products_task
+                refresh_similar_products_task.delay(ids)
+            else:
+                refresh_similar_products(ids)
+        except Exception:
+            logger.exception('similar_products.refresh failed product_ids=%s', ids[:20])
+
+    transaction.on_commit(_run)
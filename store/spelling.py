@@ -0,0 +1,205 @@
+"""
+"Did you mean" corrections for searches that match nothing.
+
+The vocabulary is every word in active product names, tags and category names,
+with how many of those it appears in. It is stored once in the shared cache
+(stamped with the catalog version it was built from); each process turns it
+into a SymSpell symmetric-delete index: every term is stored under all strings
+reachable by deleting up to `max_distance` characters from its prefix, so a
+lookup only generates the query word's own deletes and checks a few dict keys
+instead of comparing against the whole vocabulary.
+
+Catalog writes enqueue `rebuild_spelling_vocabulary` when async tasks are
+enabled; without a worker the vocabulary is rebuilt lazily on the first
+correction lookup after a change.
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .catalog_cache import get_catalog_version
+from .models import Category, Product, ProductAttribute
+from .search import SEARCH_TERM_RE, search_terms
+
+logger = logging.getLogger(__name__)
+
+SPELLING_VOCABULARY_KEY = 'store:spelling:vocabulary'
+SPELLING_REBUILD_PENDING_KEY = 'store:spelling:rebuild-pending'
+SPELLING_REBUILD_DELAY_SECONDS = 5
+SPELLING_PREFIX_LENGTH = 7
+SPELLING_MIN_WORD_LENGTH = 3
+# Words up to this length only get single-edit corrections.
+SPELLING_SHORT_WORD_LENGTH = 4
+
+_dictionary = None
+_dictionary_version = None
+
+
+def spelling_max_distance():
+    return max(1, int(getattr(settings, 'STORE_SPELLING_MAX_EDIT_DISTANCE', 2)))
+
+
+def _vocabulary_words(text):
+    return {
+        word.lower() for word in SEARCH_TERM_RE.findall(str(text or ''))
+        if len(word) >= SPELLING_MIN_WORD_LENGTH and not word.isdigit()
+    }
+
+
+def build_spelling_vocabulary():
+    """{word: number of product names, tags and category names containing it}."""
+    counts = Counter()
+    sources = (
+        Product.objects.filter(is_active=True).values_list('name', flat=True),
+        ProductAttribute.objects.filter(kind=ProductAttribute.KIND_TAG, product__is_active=True).values_list(
+            'value', flat=True
+        ),
+        Category.objects.filter(is_active=True).values_list('name', flat=True),
+    )
+    for rows in sources:
+        for text in rows.iterator(chunk_size=2000):
+            counts.update(_vocabulary_words(text))
+    return dict(counts)
+
+
+def edit_distance(source, target, max_distance):
+    """Optimal string alignment distance, or None once it must exceed `max_distance`."""
+    if abs(len(source) - len(target)) > max_distance:
+        return None
+    previous_previous = None
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous_previous is not None and j > 1
+                and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]
+            ):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return None
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+class SpellingDictionary:
+    def __init__(self, frequencies, max_distance=2, prefix_length=SPELLING_PREFIX_LENGTH):
+        self.frequencies = dict(frequencies)
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._deletes = {}
+        for term in self.frequencies:
+            for variant in self._variants(term[:prefix_length], max_distance):
+                self._deletes.setdefault(variant, []).append(term)
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    @staticmethod
+    def _variants(word, max_distance):
+        """`word` plus every string reachable by up to `max_distance` deletions."""
+        found = {word}
+        frontier = [word]
+        for _ in range(max_distance):
+            following = []
+            for item in frontier:
+                if len(item) <= 1:
+                    continue
+                for index in range(len(item)):
+                    variant = item[:index] + item[index + 1:]
+                    if variant not in found:
+                        found.add(variant)
+                        following.append(variant)
+            frontier = following
+        return found
+
+    def lookup(self, word, max_distance=None):
+        """Closest known term as (term, distance, frequency), or None."""
+        word = str(word or '').lower()
+        if word in self.frequencies:
+            return word, 0, self.frequencies[word]
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        best = None
+        checked = set()
+        for variant in self._variants(word[:self.prefix_length], max_distance):
+            for term in self._deletes.get(variant, ()):
+                if term in checked:
+                    continue
+                checked.add(term)
+                distance = edit_distance(word, term, max_distance)
+                if distance is None:
+                    continue
+                candidate = (distance, -self.frequencies[term], term)
+                if best is None or candidate < best:
+                    best = candidate
+        if best is None:
+            return None
+        return best[2], best[0], -best[1]
+
+    def correct(self, query):
+        """The query with unknown words replaced by their closest terms, or None if nothing changed."""
+        words = search_terms(query)
+        corrected = []
+        for word in words:
+            if len(word) < SPELLING_MIN_WORD_LENGTH or word.isdigit():
+                corrected.append(word)
+                continue
+            limit = 1 if len(word) <= SPELLING_SHORT_WORD_LENGTH else self.max_distance
+            match = self.lookup(word, limit)
+            corrected.append(match[0] if match else word)
+        return ' '.join(corrected) if corrected != words else None
+
+
+def rebuild_spelling_vocabulary():
+    """Rebuild and store the shared vocabulary; returns the number of terms."""
+    cache.delete(SPELLING_REBUILD_PENDING_KEY)
+    version = get_catalog_version()
+    terms = build_spelling_vocabulary()
+    cache.set(SPELLING_VOCABULARY_KEY, {'version': version, 'terms': terms}, None)
+    logger.info('spelling.rebuild version=%s terms=%s', version, len(terms))
+    return len(terms)
+
+
+def get_spelling_dictionary():
+    """This process's index over the shared vocabulary, reloaded when the vocabulary changes."""
+    global _dictionary, _dictionary_version
+    entry = cache.get(SPELLING_VOCABULARY_KEY)
+    stale = entry is not None and entry.get('version') != get_catalog_version()
+    if entry is None or (stale and not getattr(settings, 'STORE_METADATA_ASYNC', False)):
+        rebuild_spelling_vocabulary()
+        entry = cache.get(SPELLING_VOCABULARY_KEY) or {'version': None, 'terms': {}}
+    if _dictionary is None or entry.get('version') != _dictionary_version:
+        _dictionary = SpellingDictionary(entry.get('terms') or {}, max_distance=spelling_max_distance())
+        _dictionary_version = entry.get('version')
+    return _dictionary
+
+
+def suggest_query_correction(raw_query):
+    try:
+        return get_spelling_dictionary().correct(raw_query)
+    except Exception:
+        logger.exception('spelling.correct failed')
+        return None
+
+
+def schedule_spelling_rebuild():
+    """Enqueue one vocabulary rebuild after commit when async tasks are enabled."""
+    if not getattr(settings, 'STORE_METADATA_ASYNC', False):
+        return
+    if not cache.add(SPELLING_REBUILD_PENDING_KEY, 1, 60):
+        return
+
+    def _enqueue():
+        try:
+            from .tasks import rebuild_spelling_vocabulary_task
+            rebuild_spelling_vocabulary_task.apply_async(countdown=SPELLING_REBUILD_DELAY_SECONDS)
+        except Exception:
+            cache.delete(SPELLING_REBUILD_PENDING_KEY)
+            logger.exception('spelling.schedule failed')
+
+    transaction.on_commit(_enqueue)
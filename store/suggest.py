@@ -0,0 +1,240 @@
+"""
+Per-process prefix index for search-box typeahead.
+
+Product names, category names and popular tags are normalized and stored as
+every word-suffix ("vitamin c serum", "c serum", "serum") in one sorted list,
+so a keystroke is a `bisect` plus a short forward scan and never touches the
+database. Matches at the start of a name rank above mid-name matches, then by
+weight (reviews/featured for products, product counts for categories and tags).
+
+The index lives in module state, shared by all threads of a worker. When the
+catalog version moves (checked at most every `STORE_SUGGEST_CHECK_SECONDS`), it
+re-reads only products and categories whose `updated_at` passed the last sync,
+drops indexed rows whose ids are gone, and recomputes the small tag list. A
+full rebuild every `STORE_SUGGEST_REBUILD_SECONDS` starts from scratch. Both
+read the database without holding the lookup lock; a rebuild swaps in a freshly
+sorted key list and a sync applies its few changes under it.
+"""
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .catalog_cache import get_catalog_version
+from .models import Category, Product
+from .product_attributes import tag_cloud
+from .search import SEARCH_TERM_RE
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_MAX_KEY_WORDS = 8
+SUGGEST_SCAN_LIMIT = 400
+SUGGEST_TAG_LIMIT = 200
+SUGGEST_FEATURED_BOOST = 25
+# Overlap between incremental syncs, so rows committed just before a sync are never missed.
+SUGGEST_SYNC_SLACK = timedelta(seconds=2)
+
+
+def normalize_suggest_text(value) -> str:
+    text = unicodedata.normalize('NFKD', str(value or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(token.lower() for token in SEARCH_TERM_RE.findall(text))
+
+
+def _suffix_keys(text):
+    words = normalize_suggest_text(text).split()[:SUGGEST_MAX_KEY_WORDS]
+    return tuple((' '.join(words[i:]), i == 0) for i in range(len(words)))
+
+
+def _setting_seconds(name, default):
+    try:
+        return max(0.0, float(getattr(settings, name, default)))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def _product_entry(product):
+    """(entity, payload, weight, text) for an indexable product; payload None when it should be dropped."""
+    entity = ('product', product.id)
+    if not product.is_active:
+        return entity, None, 0, ''
+    weight = 1 + int(product.review_count or 0) + (SUGGEST_FEATURED_BOOST if product.is_featured else 0)
+    return entity, {'type': 'product', 'text': product.name, 'slug': product.slug}, weight, product.name
+
+
+def _category_entry(category):
+    entity = ('category', category.id)
+    if not category.is_active:
+        return entity, None, 0, ''
+    payload = {'type': 'category', 'text': category.name, 'slug': category.slug}
+    return entity, payload, 1 + int(category.active_product_count or 0), category.name
+
+
+def _tag_entries():
+    return [
+        (('tag', row['tag']), {'type': 'tag', 'text': row['tag']}, row['count'], row['tag'])
+        for row in tag_cloud(SUGGEST_TAG_LIMIT)
+    ]
+
+
+def _products():
+    return Product.objects.only('id', 'name', 'slug', 'is_active', 'is_featured', 'review_count')
+
+
+def _categories():
+    return Category.objects.only('id', 'name', 'slug', 'is_active', 'active_product_count')
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Serializes refreshes; lookups only wait for the short swap/apply under `_lock`.
+        self._refresh_lock = threading.Lock()
+        self._keys = []
+        self._entries = {}
+        self._version = None
+        self._synced_at = None
+        self._checked_at = 0.0
+        self._rebuilt_at = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # -- mutation (callers hold the lock) ---------------------------------
+
+    def _put(self, entity, payload, weight, text):
+        self._drop(entity)
+        keys = _suffix_keys(text) if payload is not None else ()
+        if not keys:
+            return
+        self._entries[entity] = (payload, weight, keys)
+        for key, is_head in keys:
+            insort(self._keys, (key, not is_head, entity))
+
+    def _drop(self, entity):
+        entry = self._entries.pop(entity, None)
+        if entry is None:
+            return
+        for key, is_head in entry[2]:
+            item = (key, not is_head, entity)
+            index = bisect_left(self._keys, item)
+            if index < len(self._keys) and self._keys[index] == item:
+                del self._keys[index]
+
+    # -- refresh -----------------------------------------------------------
+
+    def rebuild(self):
+        """Build a fresh index off-lock (one sort, no per-key inserts) and swap it in."""
+        with self._refresh_lock:
+            started = timezone.now()
+            version = get_catalog_version()
+            rows = [
+                *(_product_entry(product) for product in _products().filter(is_active=True).iterator(chunk_size=2000)),
+                *(_category_entry(category) for category in _categories().filter(is_active=True)),
+                *_tag_entries(),
+            ]
+            entries = {}
+            keys = []
+            for entity, payload, weight, text in rows:
+                suffixes = _suffix_keys(text)
+                if payload is None or not suffixes:
+                    continue
+                entries[entity] = (payload, weight, suffixes)
+                keys.extend((key, not is_head, entity) for key, is_head in suffixes)
+            keys.sort()
+            with self._lock:
+                self._keys = keys
+                self._entries = entries
+                self._version = version
+                self._synced_at = started
+                self._rebuilt_at = time.monotonic()
+                self._checked_at = self._rebuilt_at
+
+    def sync(self):
+        """Apply catalog rows changed or deleted since the last sync."""
+        with self._refresh_lock:
+            started = timezone.now()
+            version = get_catalog_version()
+            since = self._synced_at - SUGGEST_SYNC_SLACK
+            changed = [
+                *(_product_entry(product) for product in _products().filter(updated_at__gte=since)),
+                *(_category_entry(category) for category in _categories().filter(updated_at__gte=since)),
+            ]
+            tags = _tag_entries()
+            # Hard deletes leave no updated_at behind: diff ids against the index.
+            indexed = [entity for entity in list(self._entries) if entity[0] in ('product', 'category')]
+            existing = {
+                'product': set(Product.objects.filter(is_active=True).values_list('id', flat=True)),
+                'category': set(Category.objects.filter(is_active=True).values_list('id', flat=True)),
+            }
+            gone = [entity for entity in indexed if entity[1] not in existing[entity[0]]]
+            with self._lock:
+                for entity in gone:
+                    self._drop(entity)
+                for row in changed:
+                    self._put(*row)
+                for entity in [entity for entity in self._entries if entity[0] == 'tag']:
+                    self._drop(entity)
+                for row in tags:
+                    self._put(*row)
+                self._version = version
+                self._synced_at = started
+                self._checked_at = time.monotonic()
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if self._synced_at is None or now - self._rebuilt_at >= _setting_seconds('STORE_SUGGEST_REBUILD_SECONDS', 900):
+            self.rebuild()
+            return
+        if now - self._checked_at < _setting_seconds('STORE_SUGGEST_CHECK_SECONDS', 5):
+            return
+        if get_catalog_version() != self._version:
+            self.sync()
+        else:
+            self._checked_at = now
+
+    # -- lookup ------------------------------------------------------------
+
+    def suggest(self, query, limit=8):
+        prefix = normalize_suggest_text(query)
+        if not prefix:
+            return []
+        with self._lock:
+            keys = self._keys
+            index = bisect_left(keys, (prefix,))
+            best = {}
+            scanned = 0
+            while index < len(keys) and scanned < SUGGEST_SCAN_LIMIT:
+                key, not_head, entity = keys[index]
+                if not key.startswith(prefix):
+                    break
+                best[entity] = min(not_head, best.get(entity, True))
+                index += 1
+                scanned += 1
+            ranked = sorted(
+                best.items(),
+                key=lambda item: (item[1], -self._entries[item[0]][1], self._entries[item[0]][0]['text']),
+            )
+            return [dict(self._entries[entity][0]) for entity, _not_head in ranked[:limit]]
+
+
+_suggest_index = SuggestIndex()
+
+
+def get_suggest_index():
+    return _suggest_index
+
+
+def search_suggestions(query, limit=8):
+    index = get_suggest_index()
+    try:
+        index.ensure_fresh()
+    except Exception:
+        # A failed refresh keeps serving the last good index.
+        logger.exception('suggest.refresh failed')
+    return index.suggest(query, limit)
@@ -2,8 +2,6 @@ from celery import shared_task
 from django.conf import settings
 from .models import ProductImage, PendingMetadata
 from .utils.image_meta import generate_product_json_from_image
-from decimal import Decimal, ROUND_HALF_UP
-import random
 
 
 @shared_task(bind=True)
@@ -25,24 +23,66 @@ def analyze_and_apply_image(self, product_image_id: int):
     applied = False
     if confidence >= threshold:
         # map conservative fields
+        changed = []
         if generated.get('title') and generated.get('title_source') == 'filename':
             product.name = generated.get('title')
+            changed.append('name')
         if generated.get('slug') and generated.get('title_source') == 'filename':
             product.slug = generated.get('slug')
+            changed.append('slug')
         if generated.get('description'):
             product.description = generated.get('description')
+            changed.append('description')
         if generated.get('features'):
             product.features = generated.get('features')
+            changed.append('features')
         if generated.get('benefits'):
             product.benefits = generated.get('benefits')
+            changed.append('benefits')
         if generated.get('suggested_tags'):
             product.tags = generated.get('suggested_tags')
-        # Seed social proof values when metadata is generated from admin button.
-        product.review_count = random.randint(20, 300)
-        product.rating = Decimal(str(random.uniform(3.0, 5.0))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        product.save()
+            changed.append('tags')
+        # review_count/rating are derived from the review histogram
+        # (store/review_stats.py); only the generated text fields are written.
+        product.save(update_fields=changed + ['updated_at'])
         pending.applied = True
         pending.save()
         applied = True
 
     return {'status': 'ok', 'applied': applied, 'confidence': confidence}
+
+
+@shared_task
+def warm_home_payload_task():
+    from .home_payload import warm_home_payload
+    return {'status': 'ok', 'built': warm_home_payload()}
+
+
+@shared_task
+def rebuild_spelling_vocabulary_task():
+    from .spelling import rebuild_spelling_vocabulary
+    return {'status': 'ok', 'terms': rebuild_spelling_vocabulary()}
+
+
+@shared_task
+def prune_search_events_task():
+    from .search_analytics import prune_search_events
+    return {'status': 'ok', 'deleted': prune_search_events()}
+
+
+@shared_task
+def update_related_products_task():
+    from .recommendations import update_related_products
+    return {'status': 'ok', **update_related_products()}
+
+
+@shared_task
+def refresh_similar_products_task(product_ids):
+    from .similar_products import refresh_similar_products
+    return {'status': 'ok', 'rescored': refresh_similar_products(product_ids)}
+
+
+@shared_task
+def refresh_product_rankings_task():
+    from .rankings import refresh_product_rankings
+    return {'status': 'ok', **refresh_product_rankings()}
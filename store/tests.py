@@ -16,10 +16,21 @@ from .models import (
 	AssistantPolicy,
 	UserNotification,
 	UserMailboxMessage,
+	Page,
+	HomeHeroSlide,
+	ProductCoPurchase,
+	RelatedProduct,
+	ProductTextVector,
+	ProductRanking,
+	ProductAttribute,
+	SearchEvent,
+	ProductReview,
 )
 from django.conf import settings
 from unittest.mock import Mock, patch
 from django.contrib.auth.models import User
+from django.utils import timezone
+from datetime import timedelta
 import io
 import json
 import os
@@ -318,6 +329,27 @@ class WishlistAndHomeContentTests(TestCase):
 		wishlist.refresh_from_db()
 		self.assertEqual(wishlist.products.count(), 0)
 
+	def test_wishlist_and_orders_render_product_cards(self):
+		from .models import Order, OrderItem, Wishlist
+		other = Product.objects.create(name='Other Product', slug='other-product', price='5.00', stock=2, is_active=True)
+		Wishlist.objects.create(user=self.user).products.add(self.product, other)
+		for index in range(2):
+			order = Order.objects.create(user=self.user, order_number=f'WISH-{index}', total='25.00')
+			OrderItem.objects.create(order=order, product=self.product, quantity=1, price='20.00')
+			OrderItem.objects.create(order=order, product=other, quantity=1, price='5.00')
+		self.client.force_login(self.user)
+
+		card_fields = {'id', 'slug', 'name', 'price', 'original_price', 'rating', 'image_url', 'in_stock'}
+		with self.assertNumQueries(5):  # session, user, wishlist get_or_create, wishlist, products
+			wishlist = self.client.get('/api/wishlist/').json()
+		self.assertEqual({p['slug'] for p in wishlist['products']}, {'wish-product', 'other-product'})
+		self.assertEqual(set(wishlist['products'][0]), card_fields)
+
+		with self.assertNumQueries(5):  # session, user, orders, items with products, transactions
+			orders = self.client.get('/api/orders/').json()
+		self.assertEqual(len(orders), 2)
+		self.assertEqual(set(orders[0]['items'][0]['product']), card_fields)
+
 	def test_home_content_returns_payload(self):
 		from .models import Category, HomeHeroSlide
 		Category.objects.create(name='Home Cat', slug='home-cat', is_active=True)
@@ -891,10 +923,81 @@ class ProductReviewTests(TestCase):
 
 		list_resp = self.client.get('/api/products/slug/reviewable-product/reviews/')
 		self.assertEqual(list_resp.status_code, 200)
-		rows = list_resp.json()
+		rows = list_resp.json()['results']
 		self.assertEqual(len(rows), 1)
 		self.assertEqual(rows[0]['display_name'], 'Alice')
 		self.assertEqual(int(rows[0]['rating']), 4)
+		self.assertEqual(list_resp.json()['summary'], {
+			'average': '4.00', 'count': 1, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 1, '5': 0},
+		})
+
+	def _review(self, rating, is_approved=True):
+		return ProductReview.objects.create(
+			product=self.product, reviewer_name='Reviewer', rating=rating, comment='Fine.', is_approved=is_approved,
+		)
+
+	def _stats(self):
+		self.product.refresh_from_db()
+		return (
+			self.product.review_count,
+			str(self.product.rating),
+			[getattr(self.product, f'rating_count_{stars}') for stars in range(1, 6)],
+		)
+
+	def test_histogram_follows_create_approve_edit_and_delete(self):
+		five = self._review(5)
+		self._review(4)
+		self._review(4)
+		pending = self._review(1, is_approved=False)
+		self.assertEqual(self._stats(), (3, '4.33', [0, 0, 0, 2, 1]))
+
+		pending.is_approved = True
+		pending.save()
+		self.assertEqual(self._stats(), (4, '3.50', [1, 0, 0, 2, 1]))
+		pending.rating = 2
+		pending.save()
+		self.assertEqual(self._stats(), (4, '3.75', [0, 1, 0, 2, 1]))
+		five.delete()
+		self.assertEqual(self._stats(), (3, '3.33', [0, 1, 0, 2, 0]))
+
+		from .review_stats import set_reviews_approved
+
+		self.assertEqual(set_reviews_approved(ProductReview.objects.filter(rating=4), False), 2)
+		self.assertEqual(self._stats(), (1, '2.00', [0, 1, 0, 0, 0]))
+		self.assertEqual(set_reviews_approved(ProductReview.objects.all(), True), 2)
+		self.assertEqual(self._stats(), (3, '3.33', [0, 1, 0, 2, 0]))
+		self.product.delete()
+
+	def test_review_listing_paginates_filters_and_sorts(self):
+		for rating in (5, 3, 4, 5, 1):
+			self._review(rating)
+		self._review(2, is_approved=False)
+		url = '/api/products/slug/reviewable-product/reviews/'
+
+		first = self.client.get(url, {'page_size': 2}).json()
+		self.assertEqual([row['rating'] for row in first['results']], [1, 5])
+		second = self.client.get(first['next']).json()
+		self.assertEqual([row['rating'] for row in second['results']], [4, 3])
+		self.assertEqual(first['summary']['histogram'], {'1': 1, '2': 0, '3': 1, '4': 1, '5': 2})
+		self.assertEqual(first['summary']['count'], 5)
+
+		self.assertEqual([row['rating'] for row in self.client.get(url, {'rating': '5,1'}).json()['results']], [1, 5, 5])
+		self.assertEqual([row['rating'] for row in self.client.get(url, {'sort': 'highest'}).json()['results']], [5, 5, 4, 3, 1])
+		self.assertEqual(self.client.get(url, {'sort': 'best'}).status_code, 400)
+		self.assertEqual(self.client.get(url, {'rating': 'five'}).status_code, 400)
+		self.assertEqual(self.client.get(url, {'rating': '5,9'}).status_code, 400)
+		self.assertEqual(self.client.get(url, {'rating': '0'}).json()['error'], 'invalid_rating')
+
+	def test_recount_fixes_drifted_histograms(self):
+		from .review_stats import recount_review_stats, review_stats_drift
+
+		self._review(5)
+		self._review(3)
+		Product.objects.filter(pk=self.product.pk).update(rating_count_5=7, review_count=9)
+		self.assertEqual(review_stats_drift(), [(self.product.pk, (0, 0, 1, 0, 7), (0, 0, 1, 0, 1))])
+		recount_review_stats()
+		self.assertEqual(review_stats_drift(), [])
+		self.assertEqual(self._stats(), (2, '4.00', [0, 0, 1, 0, 1]))
 
 
 class MetadataReviewSeedTests(TestCase):
@@ -907,9 +1010,13 @@ class MetadataReviewSeedTests(TestCase):
 			is_active=True,
 		)
 
-	def test_metadata_generation_randomizes_review_fields(self):
+	def test_metadata_auto_apply_keeps_review_stats_derived(self):
+		from decimal import Decimal
+		from .review_stats import review_stats_drift
 		from .tasks import analyze_and_apply_image
 
+		ProductReview.objects.create(product=self.product, rating=4, comment='Nice', is_approved=True)
+
 		buf = io.BytesIO()
 		image = Image.new('RGB', (800, 800), color='white')
 		image.save(buf, format='JPEG')
@@ -918,10 +1025,1330 @@ class MetadataReviewSeedTests(TestCase):
 		upload = SimpleUploadedFile('premium-modern-lamp.jpg', buf.read(), content_type='image/jpeg')
 		pimg = ProductImage.objects.create(product=self.product, image=upload, alt='meta')
 
-		result = analyze_and_apply_image(pimg.id)
-		self.assertEqual(result.get('status'), 'ok')
+		with override_settings(STORE_AUTO_APPLY_CONFIDENCE=0.0):
+			result = analyze_and_apply_image(pimg.id)
+		self.assertEqual((result.get('status'), result.get('applied')), ('ok', True))
+
+		self.product.refresh_from_db()
+		self.assertEqual((self.product.review_count, self.product.rating_count_4), (1, 1))
+		self.assertEqual(self.product.rating, Decimal('4.00'))
+		self.assertEqual(review_stats_drift(), [])
+
+
+class ProductSearchTests(TestCase):
+	def setUp(self):
+		self.client = Client()
+		self.category = Category.objects.create(name='Body Care', slug='body-care', is_active=True)
+		self.name_match = Product.objects.create(name='Shea Butter Cream', slug='shea-butter-cream', price='15.00', stock=5)
+		self.description_match = Product.objects.create(
+			name='Daily Lotion',
+			slug='daily-lotion',
+			price='12.00',
+			stock=5,
+			description='Light lotion blended with shea butter.',
+		)
+		self.category_match = Product.objects.create(name='Cocoa Scrub', slug='cocoa-scrub', price='9.00', stock=5)
+		self.category_match.categories.add(self.category)
+
+	def _search(self, query):
+		resp = self.client.get('/api/products/', {'q': query})
+		self.assertEqual(resp.status_code, 200)
+		return [row['slug'] for row in resp.json()['results']]
+
+	def test_search_ranks_name_matches_above_description_matches(self):
+		slugs = self._search('shea')
+		self.assertEqual(slugs, ['shea-butter-cream', 'daily-lotion'])
+
+	def test_search_matches_term_prefixes_across_fields(self):
+		self.assertEqual(self._search('shea lot'), ['daily-lotion'])
+		self.assertEqual(self._search('!!!'), [])
+
+	def test_search_document_follows_category_membership_and_renames(self):
+		self.assertEqual(self._search('body'), ['cocoa-scrub'])
+		self.category.name = 'Bath Rituals'
+		self.category.save()
+		self.assertEqual(self._search('rituals'), ['cocoa-scrub'])
+		self.category_match.categories.remove(self.category)
+		self.assertEqual(self._search('rituals'), [])
+
+
+class ProductListPaginationTests(TestCase):
+	def setUp(self):
+		self.client = Client()
+		for index in range(7):
+			Product.objects.create(
+				name=f'Paged Product {index}',
+				slug=f'paged-product-{index}',
+				price='10.00',
+				stock=3,
+				is_featured=index in (2, 5),
+			)
+		Product.objects.filter(slug='paged-product-3').update(created_at=None)
+
+	def _walk(self, params):
+		slugs = []
+		resp = self.client.get('/api/products/', params)
+		while True:
+			self.assertEqual(resp.status_code, 200)
+			payload = resp.json()
+			slugs.extend(row['slug'] for row in payload['results'])
+			if not payload['next']:
+				return slugs, payload
+			resp = self.client.get(payload['next'])
+
+	def test_cursor_pages_cover_catalog_in_keyset_order(self):
+		full = self.client.get('/api/products/', {'page_size': 100}).json()
+		expected = [row['slug'] for row in full['results']]
+		self.assertEqual(len(expected), 7)
+		self.assertEqual(expected[:2], ['paged-product-5', 'paged-product-2'])
+		self.assertEqual(expected[-1], 'paged-product-3')
+		self.assertIsNone(full['next'])
+		self.assertIsNone(full['previous'])
+
+		slugs, last_page = self._walk({'page_size': 2})
+		self.assertEqual(slugs, expected)
+		self.assertEqual([row['slug'] for row in last_page['results']], expected[6:])
+
+		previous = self.client.get(last_page['previous']).json()
+		self.assertEqual([row['slug'] for row in previous['results']], expected[4:6])
+		self.assertIsNotNone(previous['next'])
+
+	def test_limit_sets_page_size_and_invalid_cursor_is_rejected(self):
+		resp = self.client.get('/api/products/', {'limit': 3})
+		self.assertEqual(len(resp.json()['results']), 3)
+		self.assertIsNotNone(resp.json()['next'])
+		self.assertEqual(self.client.get('/api/products/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+	def test_search_results_paginate_on_rank(self):
+		slugs, _ = self._walk({'q': 'paged', 'page_size': 3})
+		self.assertEqual(sorted(slugs), sorted(f'paged-product-{index}' for index in range(7)))
+		self.assertEqual(len(set(slugs)), 7)
+
+
+class CatalogResponseCacheTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.category = Category.objects.create(name='Hair Care', slug='hair-care', is_active=True)
+		self.product = Product.objects.create(name='Argan Oil', slug='argan-oil', price='20.00', stock=4)
+
+	def test_repeat_reads_are_served_from_cache(self):
+		first = self.client.get('/api/products/', {'featured': 'false', 'utm_source': 'mail'})
+		second = self.client.get('/api/products/', {'utm_source': 'ads', 'featured': 'false'})
+		self.assertEqual(first['X-Catalog-Cache'], 'miss')
+		self.assertEqual(second['X-Catalog-Cache'], 'hit')
+		self.assertEqual(first.json(), second.json())
+
+	def test_catalog_writes_invalidate_cached_responses(self):
+		self.client.get('/api/products/slug/argan-oil/')
+		self.product.name = 'Pure Argan Oil'
+		self.product.save()
+		resp = self.client.get('/api/products/slug/argan-oil/')
+		self.assertEqual(resp['X-Catalog-Cache'], 'miss')
+		self.assertEqual(resp.json()['name'], 'Pure Argan Oil')
+
+		before = self.client.get('/api/categories/hair-care/').json()
+		self.assertEqual(before['product_count'], 0)
+		self.product.categories.add(self.category)
+		after = self.client.get('/api/categories/hair-care/').json()
+		self.assertEqual(after['product_count'], 1)
+
+	@override_settings(STORE_CATALOG_CACHE_TTL=0)
+	def test_zero_ttl_disables_cache(self):
+		self.client.get('/api/products/')
+		resp = self.client.get('/api/products/')
+		self.assertNotIn('X-Catalog-Cache', resp)
+
+
+class ConditionalGetTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.product = Product.objects.create(name='Rose Water', slug='rose-water', price='8.00', stock=6)
+
+	def test_catalog_etag_returns_not_modified_until_catalog_changes(self):
+		first = self.client.get('/api/products/')
+		self.assertEqual(first.status_code, 200)
+		etag = first['ETag']
+		self.assertTrue(first.has_header('Last-Modified'))
+		self.assertIn('no-cache', first['Cache-Control'])
+
+		repeat = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(repeat.status_code, 304)
+		self.assertEqual(repeat.content, b'')
+
+		other_query = self.client.get('/api/products/', {'featured': 'true'}, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(other_query.status_code, 200)
+
+		self.product.price = '9.00'
+		self.product.save()
+		changed = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(changed.status_code, 200)
+		self.assertNotEqual(changed['ETag'], etag)
+
+	def test_shipping_methods_and_pages_use_content_validators(self):
+		method = ShippingMethod.objects.create(name='Standard', price='5.00', delivery_days='3-5', active=True)
+		first = self.client.get('/api/shipping/methods/')
+		self.assertEqual(self.client.get('/api/shipping/methods/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+		method.price = '6.00'
+		method.save()
+		self.assertEqual(self.client.get('/api/shipping/methods/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+		Page.objects.create(title='About', slug='about', content='Hello')
+		page = self.client.get('/api/pages/about/')
+		self.assertEqual(page.status_code, 200)
+		self.assertEqual(self.client.get('/api/pages/about/', HTTP_IF_NONE_MATCH=page['ETag']).status_code, 304)
+		self.assertEqual(
+			self.client.get('/api/pages/about/', HTTP_IF_MODIFIED_SINCE=page['Last-Modified']).status_code,
+			304,
+		)
+		self.assertEqual(self.client.get('/api/pages/missing/').status_code, 404)
+
+
+class ProductFieldsetTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.category = Category.objects.create(name='Fragrance', slug='fragrance', is_active=True)
+		self.product = Product.objects.create(
+			name='Amber Mist',
+			slug='amber-mist',
+			price='30.00',
+			original_price='35.00',
+			stock=0,
+			description='Long description that grid pages never show.',
+			features=['Long lasting'],
+			tags=['amber'],
+		)
+		self.product.categories.add(self.category)
+
+	def test_default_payload_is_unchanged(self):
+		row = self.client.get('/api/products/').json()['results'][0]
+		self.assertIn('description', row)
+		self.assertIn('images', row)
+		self.assertIn('categories', row)
+		self.assertNotIn('image_url', row)
+		self.assertNotIn('in_stock', row)
+
+	def test_card_view_returns_compact_rows(self):
+		row = self.client.get('/api/products/', {'view': 'card'}).json()['results'][0]
+		self.assertEqual(
+			set(row),
+			{'id', 'slug', 'name', 'price', 'original_price', 'rating', 'image_url', 'in_stock'},
+		)
+		self.assertFalse(row['in_stock'])
+		self.assertEqual(row['image_url'], '')
+
+		expanded = self.client.get('/api/products/', {'view': 'card', 'expand': 'categories'}).json()['results'][0]
+		self.assertEqual([c['slug'] for c in expanded['categories']], ['fragrance'])
+
+	def test_fields_param_selects_sparse_columns(self):
+		with self.assertNumQueries(1):
+			resp = self.client.get('/api/products/', {'fields': 'id,slug,price,unknown'})
+		self.assertEqual(resp.json()['results'], [{'id': self.product.id, 'slug': 'amber-mist', 'price': '30.00'}])
+
+
+class ProductPrimaryImageTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.temp_media_root = tempfile.mkdtemp(prefix='rukkie_media_primary_')
+		self.settings_override = override_settings(MEDIA_ROOT=self.temp_media_root)
+		self.settings_override.enable()
+		self.metadata_patch = patch('store.tasks.analyze_and_apply_image')
+		self.metadata_patch.start()
+		self.product = Product.objects.create(name='Clay Mask', slug='clay-mask', price='14.00', stock=3)
+
+	def tearDown(self):
+		self.metadata_patch.stop()
+		self.settings_override.disable()
+		shutil.rmtree(self.temp_media_root, ignore_errors=True)
+
+	def _upload(self, name):
+		buf = io.BytesIO()
+		Image.new('RGB', (20, 20), color='white').save(buf, format='JPEG')
+		return SimpleUploadedFile(name, buf.getvalue(), content_type='image/jpeg')
+
+	def test_primary_image_follows_image_changes(self):
+		second = ProductImage.objects.create(product=self.product, image=self._upload('second.jpg'), order=2)
+		self.product.refresh_from_db()
+		self.assertIn('second', self.product.primary_image_url)
+
+		first = ProductImage.objects.create(product=self.product, image=self._upload('first.jpg'), order=1)
+		self.product.refresh_from_db()
+		self.assertIn('first', self.product.primary_image_url)
 
+		first.delete()
 		self.product.refresh_from_db()
-		self.assertGreaterEqual(self.product.review_count, 20)
-		self.assertGreaterEqual(float(self.product.rating), 3.0)
-		self.assertLessEqual(float(self.product.rating), 5.0)
+		self.assertIn('second', self.product.primary_image_url)
+		second.delete()
+		self.product.refresh_from_db()
+		self.assertEqual(self.product.primary_image_url, '')
+
+	def test_card_view_reads_stored_url_without_image_queries(self):
+		ProductImage.objects.create(product=self.product, image=self._upload('card.jpg'), order=0)
+		with self.assertNumQueries(1):
+			row = self.client.get('/api/products/', {'view': 'card'}).json()['results'][0]
+		self.assertTrue(row['image_url'].startswith('http://testserver/media/'))
+
+	def test_cloudinary_urls_get_sized_variants(self):
+		from .primary_images import build_image_variants
+
+		variants = build_image_variants('https://res.cloudinary.com/demo/image/upload/v1/media/products/a.jpg')
+		self.assertEqual(
+			variants['card'],
+			'https://res.cloudinary.com/demo/image/upload/c_limit,f_auto,q_auto,w_480/v1/media/products/a.jpg',
+		)
+		self.assertEqual(build_image_variants('/media/products/a.jpg'), {})
+
+	@override_settings(CLOUDINARY_STORAGE={'CLOUD_NAME': 'demo'})
+	def test_refresh_command_repairs_placeholder_cloudinary_urls(self):
+		from django.core.files.storage import FileSystemStorage
+		from django.core.management import call_command
+		from django.core.management.base import CommandError
+		from .serializers import ProductImageSerializer
+
+		class PlaceholderCloudStorage(FileSystemStorage):
+			def url(self, name):
+				return f'https://res.cloudinary.com/<cloud_name>/image/upload/v1/{name}'
+
+		with patch.object(ProductImage._meta.get_field('image'), 'storage', PlaceholderCloudStorage()):
+			image = ProductImage.objects.create(product=self.product, image='media/products/mask.jpg', order=0)
+			# As left by the schema-only migration, or by a later Cloudinary config change.
+			Product.objects.filter(pk=self.product.pk).update(primary_image_url='', image_variants={})
+			with self.assertRaises(CommandError):
+				call_command('refresh_primary_images', '--check', stdout=io.StringIO())
+			call_command('refresh_primary_images', stdout=io.StringIO())
+			call_command('refresh_primary_images', '--check', stdout=io.StringIO())
+			expected = ProductImageSerializer(image).data['image_url']
+
+		self.product.refresh_from_db()
+		self.assertEqual(expected, 'https://res.cloudinary.com/demo/image/upload/media/products/mask.jpg')
+		self.assertEqual(self.product.primary_image_url, expected)
+		self.assertIn('w_480', self.product.image_variants['card'])
+
+
+class ImageUrlResolverTests(TestCase):
+	def test_resolver_memoizes_and_resets_on_settings_change(self):
+		from .image_urls import get_image_url_resolver
+		from .serializers import _fallback_image_url_from_name
+
+		self.assertEqual(_fallback_image_url_from_name('products/a.jpg'), '/media/products/a.jpg')
+		with override_settings(CLOUDINARY_STORAGE={'CLOUD_NAME': 'demo'}):
+			self.assertEqual(
+				_fallback_image_url_from_name('products/a.jpg'),
+				'https://res.cloudinary.com/demo/image/upload/products/a.jpg',
+			)
+		self.assertEqual(_fallback_image_url_from_name('products/a.jpg'), '/media/products/a.jpg')
+
+		resolver = get_image_url_resolver()
+		product = Product.objects.create(name='Cached Image', slug='cached-image', price='5.00', stock=1)
+		field_file = ProductImage(product=product, image='products/cached.jpg').image
+		self.assertEqual(resolver.resolve(field_file), '/media/products/cached.jpg')
+		self.assertEqual(resolver.resolve(field_file), '/media/products/cached.jpg')
+		self.assertGreaterEqual(resolver.cache_info()['stored_url'].hits, 1)
+
+
+class CategoryTreeTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.skincare = Category.objects.create(name='Skincare', slug='skincare', is_active=True)
+		self.face = Category.objects.create(name='Face', slug='face', parent=self.skincare, is_active=True)
+		self.serums = Category.objects.create(name='Serums', slug='serums', parent=self.face, is_active=True)
+		self.body = Category.objects.create(name='Body', slug='body', is_active=True)
+		self.serum = Product.objects.create(name='Vitamin C Serum', slug='vitamin-c-serum', price='22.00', stock=5)
+		self.serum.categories.add(self.serums)
+		self.lotion = Product.objects.create(name='Body Lotion', slug='body-lotion', price='11.00', stock=5)
+		self.lotion.categories.add(self.body)
+
+	def _slugs(self, category):
+		resp = self.client.get('/api/products/', {'category': category})
+		return [row['slug'] for row in resp.json()['results']]
+
+	def test_paths_are_maintained_on_save_and_move(self):
+		self.serums.refresh_from_db()
+		self.assertEqual(self.serums.path, f'/{self.skincare.id}/{self.face.id}/{self.serums.id}/')
+		self.assertEqual(self.serums.depth, 2)
+
+		self.face.parent = self.body
+		self.face.save()
+		self.serums.refresh_from_db()
+		self.assertEqual(self.serums.path, f'/{self.body.id}/{self.face.id}/{self.serums.id}/')
+		self.assertEqual(self.serums.depth, 2)
+
+		self.body.parent = self.serums
+		with self.assertRaises(ValueError):
+			self.body.save()
+
+	def test_category_filter_includes_descendants(self):
+		self.assertEqual(self._slugs('skincare'), ['vitamin-c-serum'])
+		self.assertEqual(self._slugs('face'), ['vitamin-c-serum'])
+		self.assertEqual(self._slugs('body'), ['body-lotion'])
+		self.assertEqual(self._slugs('missing'), [])
+
+	def test_tree_endpoint_nests_active_categories(self):
+		Category.objects.create(name='Hidden Child', slug='hidden-child', parent=self.body, is_active=False)
+		with self.assertNumQueries(1):
+			resp = self.client.get('/api/categories/tree/')
+		self.assertEqual(resp.status_code, 200)
+		tree = resp.json()
+		self.assertEqual([node['slug'] for node in tree], ['body', 'skincare'])
+		self.assertEqual(tree[0]['children'], [])
+		face = tree[1]['children'][0]
+		self.assertEqual(face['slug'], 'face')
+		self.assertEqual([node['slug'] for node in face['children']], ['serums'])
+		self.assertEqual(face['children'][0]['product_count'], 1)
+		self.assertEqual(self.client.get('/api/categories/tree/')['X-Catalog-Cache'], 'hit')
+
+
+class CategoryProductCounterTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.category = Category.objects.create(name='Candles', slug='candles', is_active=True)
+		self.other = Category.objects.create(name='Gifts', slug='gifts', is_active=True)
+		self.first = Product.objects.create(name='Soy Candle', slug='soy-candle', price='12.00', stock=3)
+		self.second = Product.objects.create(name='Wax Melt', slug='wax-melt', price='6.00', stock=3)
+
+	def _counts(self):
+		return dict(Category.objects.values_list('slug', 'active_product_count'))
+
+	def test_counters_follow_membership_activity_and_deletes(self):
+		self.first.categories.add(self.category, self.other)
+		self.category.products.add(self.second)
+		self.assertEqual(self._counts(), {'candles': 2, 'gifts': 1})
+
+		self.second.is_active = False
+		self.second.save()
+		self.assertEqual(self._counts()['candles'], 1)
+		self.second.is_active = True
+		self.second.save(update_fields=['is_active'])
+		self.assertEqual(self._counts()['candles'], 2)
+
+		self.first.categories.remove(self.other)
+		self.category.products.clear()
+		self.assertEqual(self._counts(), {'candles': 0, 'gifts': 0})
+
+		self.first.categories.add(self.category)
+		self.first.delete()
+		self.assertEqual(self._counts()['candles'], 0)
+
+	def test_removing_unassigned_memberships_leaves_counters_alone(self):
+		self.first.categories.add(self.category)
+		self.second.categories.add(self.other)
+
+		self.first.categories.remove(self.other)
+		self.assertEqual(self._counts(), {'candles': 1, 'gifts': 1})
+		self.other.products.remove(self.first)
+		self.assertEqual(self._counts(), {'candles': 1, 'gifts': 1})
+		self.other.products.remove(self.first, self.second)
+		self.assertEqual(self._counts(), {'candles': 1, 'gifts': 0})
+
+	def test_bulk_admin_actions_and_recount_command(self):
+		from django.contrib.admin.sites import site
+		from django.core.management import call_command
+		from django.core.management.base import CommandError
+		from django.test import RequestFactory
+
+		self.first.categories.add(self.category)
+		self.second.categories.add(self.category)
+		product_admin = site._registry[Product]
+		request = RequestFactory().post('/')
+		with patch.object(product_admin, 'message_user'):
+			product_admin.mark_selected_inactive(request, Product.objects.all())
+			self.assertEqual(self._counts()['candles'], 0)
+			product_admin.mark_selected_active(request, Product.objects.filter(pk=self.first.pk))
+		self.assertEqual(self._counts()['candles'], 1)
+
+		resp = self.client.get('/api/categories/candles/')
+		self.assertEqual(resp.json()['product_count'], 1)
+
+		Category.objects.filter(pk=self.category.pk).update(active_product_count=9)
+		with self.assertRaises(CommandError):
+			call_command('recount_category_products', '--check', stdout=io.StringIO())
+		call_command('recount_category_products', stdout=io.StringIO())
+		call_command('recount_category_products', '--check', stdout=io.StringIO())
+		self.assertEqual(self._counts()['candles'], 1)
+
+
+class HomePayloadTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		HomeHeroSlide.objects.create(title='Glow Season', is_active=True)
+		Category.objects.create(name='Skin Care', slug='skin-care', is_active=True)
+		Product.objects.create(name='Vitamin C Serum', slug='vitamin-c-serum', price='25.00', stock=3, is_featured=True)
+		Product.objects.create(name='Clay Mask', slug='clay-mask', price='12.00', stock=0, is_flash_sale=True)
+
+	def test_payload_contains_prebuilt_sections(self):
+		resp = self.client.get('/api/home/content/')
+		self.assertEqual(resp.status_code, 200)
+		data = resp.json()
+		self.assertEqual([s['title'] for s in data['hero_slides']], ['Glow Season'])
+		self.assertEqual([c['slug'] for c in data['categories']], ['skin-care'])
+		self.assertEqual([p['slug'] for p in data['featured_products']], ['vitamin-c-serum'])
+		self.assertEqual(data['flash_sale_products'][0]['slug'], 'clay-mask')
+		self.assertFalse(data['flash_sale_products'][0]['in_stock'])
+		self.assertNotIn('description', data['featured_products'][0])
+		self.assertEqual(data['theme'], 'default')
+
+	def test_version_etag_and_rebuild_on_change(self):
+		first = self.client.get('/api/home/content/')
+		etag = first['ETag']
+		with self.assertNumQueries(0):
+			repeat = self.client.get('/api/home/content/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(repeat.status_code, 304)
+		with self.assertNumQueries(0):
+			cached = self.client.get('/api/home/content/')
+		self.assertEqual(cached.content, first.content)
+
+		Page.objects.update_or_create(slug='storefront-theme-preset', defaults={'title': 'Theme', 'content': 'obsidian-gold'})
+		changed = self.client.get('/api/home/content/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(changed.status_code, 200)
+		self.assertEqual(changed.json()['theme'], 'obsidian-gold')
+
+	@override_settings(STORE_METADATA_ASYNC=True)
+	def test_catalog_write_schedules_one_warm_up(self):
+		from .home_payload import HOME_PAYLOAD_WARM_PENDING_KEY, warm_home_payload
+		with patch('store.tasks.warm_home_payload_task.apply_async') as apply_async:
+			with self.captureOnCommitCallbacks(execute=True):
+				Product.objects.create(name='Toner', slug='toner', price='9.00', stock=2)
+				Product.objects.create(name='Cleanser', slug='cleanser', price='7.00', stock=2)
+		apply_async.assert_called_once()
+		self.assertTrue(warm_home_payload('http://testserver'))
+		self.assertIsNone(cache.get(HOME_PAYLOAD_WARM_PENDING_KEY))
+		self.assertFalse(warm_home_payload('http://testserver'))
+
+	@override_settings(ALLOWED_HOSTS=['testserver', 'shop.example.com'])
+	def test_warm_up_builds_the_keys_requests_read(self):
+		from .home_payload import warm_home_payload
+
+		self.client.get('/api/home/content/')
+		self.client.get('/api/home/content/', HTTP_HOST='shop.example.com')
+		Product.objects.create(name='Toner', slug='toner', price='9.00', stock=2)
+		self.assertTrue(warm_home_payload())
+		for host in ('testserver', 'shop.example.com'):
+			with self.assertNumQueries(0):
+				resp = self.client.get('/api/home/content/', HTTP_HOST=host)
+			self.assertEqual(resp.status_code, 200)
+		self.assertFalse(warm_home_payload())
+
+
+@override_settings(STORE_RELATED_MIN_CO_ORDERS=1)
+class RelatedProductsTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.serum = Product.objects.create(name='Serum', slug='serum', price='20.00', stock=5)
+		self.toner = Product.objects.create(name='Toner', slug='toner', price='10.00', stock=5)
+		self.cream = Product.objects.create(name='Cream', slug='cream', price='15.00', stock=5)
+		self.brush = Product.objects.create(name='Brush', slug='brush', price='5.00', stock=5)
+
+	def _order(self, products, status=Order.STATUS_PAID):
+		order = Order.objects.create(total='0.00', status=status)
+		for product in products:
+			OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+		return order
+
+	def test_neighbours_are_ranked_by_cosine_and_served_from_table(self):
+		from .recommendations import update_related_products
+		self._order([self.serum, self.toner])
+		self._order([self.serum, self.toner, self.cream])
+		self._order([self.serum, self.cream, self.cream])
+		abandoned = self._order([self.brush, self.serum], status=Order.STATUS_PENDING)
+		Order.objects.filter(id=abandoned.id).update(created_at=timezone.now() - timedelta(days=3))
+		self._order([self.cream])
+
+		summary = update_related_products()
+		self.assertEqual(summary['orders'], 4)
+
+		ranked = list(RelatedProduct.objects.filter(product=self.toner).values_list('related__slug', flat=True))
+		self.assertEqual(ranked, ['serum', 'cream'])
+		self.assertEqual(ProductCoPurchase.objects.get(product=self.cream, related=self.cream).order_count, 3)
+
+		resp = self.client.get('/api/products/slug/toner/related/')
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual([p['slug'] for p in resp.json()['results']], ['serum', 'cream'])
+		self.assertNotIn('description', resp.json()['results'][0])
+
+	def test_incremental_run_waits_for_pending_orders_then_catches_up(self):
+		from .recommendations import update_related_products
+		self._order([self.serum, self.toner])
+		pending = self._order([self.serum, self.brush], status=Order.STATUS_PENDING)
+		self._order([self.serum, self.toner])
+
+		first = update_related_products()
+		self.assertEqual(first['last_order_id'], pending.id - 1)
+		self.assertEqual(ProductCoPurchase.objects.get(product=self.serum, related=self.toner).order_count, 1)
+
+		pending.status = Order.STATUS_PAID
+		pending.save()
+		second = update_related_products()
+		self.assertEqual(second['orders'], 2)
+		self.assertEqual(ProductCoPurchase.objects.get(product=self.serum, related=self.toner).order_count, 2)
+		self.assertTrue(RelatedProduct.objects.filter(product=self.brush, related=self.serum).exists())
+		self.assertEqual(update_related_products()['orders'], 0)
+
+	def test_orders_paid_after_the_settle_window_are_counted_late(self):
+		from .models import RecommendationState
+		from .recommendations import CO_PURCHASE_STATE_KEY, update_related_products
+		late = self._order([self.serum, self.brush], status=Order.STATUS_PENDING)
+		stale = self._order([self.toner, self.brush], status=Order.STATUS_PENDING)
+		Order.objects.filter(id=late.id).update(created_at=timezone.now() - timedelta(days=2))
+		Order.objects.filter(id=stale.id).update(created_at=timezone.now() - timedelta(days=90))
+		self._order([self.serum, self.toner])
+
+		self.assertEqual(update_related_products()['orders'], 1)
+		state = RecommendationState.objects.get(key=CO_PURCHASE_STATE_KEY)
+		self.assertEqual(state.pending_order_ids, [late.id])
+
+		Order.objects.filter(id__in=[late.id, stale.id]).update(status=Order.STATUS_PAID)
+		self.assertEqual(update_related_products()['orders'], 1)
+		self.assertTrue(RelatedProduct.objects.filter(product=self.brush, related=self.serum).exists())
+		self.assertFalse(RelatedProduct.objects.filter(product=self.brush, related=self.toner).exists())
+		state.refresh_from_db()
+		self.assertEqual(state.pending_order_ids, [])
+		self.assertEqual(update_related_products()['orders'], 0)
+
+
+class SimilarProductsTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.skin = Category.objects.create(name='Skin', slug='skin', is_active=True)
+		self.hair = Category.objects.create(name='Hair', slug='hair', is_active=True)
+		self.serum = Product.objects.create(
+			name='Vitamin C Brightening Serum', slug='vitamin-c-serum', price='20.00', stock=5,
+			description='Brightening serum with vitamin C for dull skin.', tags=['serum', 'vitamin c'],
+		)
+		self.booster = Product.objects.create(
+			name='Vitamin C Booster Drops', slug='vitamin-c-booster', price='18.00', stock=5,
+			description='Concentrated vitamin C drops to brighten skin.', tags=['vitamin c', 'brightening'],
+		)
+		self.shampoo = Product.objects.create(
+			name='Argan Repair Shampoo', slug='argan-shampoo', price='12.00', stock=5,
+			description='Sulfate free shampoo for dry hair.', tags=['hair', 'argan'],
+		)
+		self.serum.categories.add(self.skin)
+		self.booster.categories.add(self.skin)
+		self.shampoo.categories.add(self.hair)
+
+	def _content_neighbours(self, product):
+		return list(
+			RelatedProduct.objects.filter(product=product, kind=RelatedProduct.KIND_CONTENT)
+			.values_list('related__slug', flat=True)
+		)
+
+	def test_rebuild_ranks_textually_similar_products(self):
+		from .similar_products import rebuild_similar_products
+		summary = rebuild_similar_products(chunk_size=1)
+		self.assertEqual(summary['products'], 3)
+		self.assertEqual(ProductTextVector.objects.count(), 3)
+		self.assertEqual(self._content_neighbours(self.serum), ['vitamin-c-booster'])
+		self.assertEqual(self._content_neighbours(self.shampoo), [])
+
+		resp = self.client.get('/api/products/slug/vitamin-c-serum/related/')
+		self.assertEqual([p['slug'] for p in resp.json()['results']], ['vitamin-c-booster'])
+
+	def test_text_change_refreshes_affected_lists_after_commit(self):
+		from .similar_products import rebuild_similar_products
+		rebuild_similar_products()
+		with self.captureOnCommitCallbacks(execute=True):
+			self.shampoo.name = 'Vitamin C Brightening Serum Refill'
+			self.shampoo.description = 'Brightening vitamin C serum refill for skin.'
+			self.shampoo.save()
+		self.assertIn('argan-shampoo', self._content_neighbours(self.serum))
+		self.assertEqual(self._content_neighbours(self.shampoo)[0], 'vitamin-c-serum')
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.shampoo.is_active = False
+			self.shampoo.save()
+		self.assertNotIn('argan-shampoo', self._content_neighbours(self.serum))
+		self.assertFalse(ProductTextVector.objects.filter(product=self.shampoo).exists())
+
+		with patch('store.similar_products.refresh_similar_products') as refresh:
+			with self.captureOnCommitCallbacks(execute=True):
+				self.serum.stock = 4
+				self.serum.save(update_fields=['stock'])
+		refresh.assert_not_called()
+
+
+class ProductRankingTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.face = Category.objects.create(name='Face', slug='face', is_active=True)
+		self.serums = Category.objects.create(name='Serums', slug='serums', parent=self.face, is_active=True)
+		self.steady = Product.objects.create(name='Steady Cream', slug='steady-cream', price='10.00', stock=50)
+		self.rising = Product.objects.create(name='Rising Serum', slug='rising-serum', price='10.00', stock=50)
+		self.unsold = Product.objects.create(name='Quiet Toner', slug='quiet-toner', price='10.00', stock=50)
+		self.rising.categories.add(self.serums)
+		self.steady.categories.add(self.face)
+
+	def _sale(self, product, quantity, days_ago, status=Order.STATUS_PAID):
+		order = Order.objects.create(total='0.00', status=status)
+		Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+		OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+
+	def test_rankings_are_materialized_and_drive_sorting(self):
+		from .rankings import refresh_product_rankings
+		for days_ago in (2, 10, 15, 20, 25, 32, 35):
+			self._sale(self.steady, 3, days_ago)
+		self._sale(self.rising, 4, 1)
+		self._sale(self.rising, 3, 3)
+		self._sale(self.unsold, 50, 1, status=Order.STATUS_PENDING)
+		refresh_product_rankings()
+
+		def slugs(params):
+			resp = self.client.get('/api/products/', params)
+			return [p['slug'] for p in resp.json()['results']]
+
+		with self.assertNumQueries(1):
+			self.client.get('/api/products/', {'sort': 'trending', 'view': 'card'})
+
+		self.assertEqual(slugs({'sort': 'bestsellers'}), ['steady-cream', 'rising-serum', 'quiet-toner'])
+		self.assertEqual(slugs({'sort': 'bestsellers', 'window': '7'}), ['rising-serum', 'steady-cream', 'quiet-toner'])
+		self.assertEqual(slugs({'sort': 'trending'})[0], 'rising-serum')
+		self.assertFalse(ProductRanking.objects.filter(kind=ProductRanking.KIND_TRENDING, product=self.steady).exists())
+
+		face_ranks = ProductRanking.objects.filter(kind=ProductRanking.KIND_BESTSELLER_30D, category=self.face)
+		self.assertEqual(list(face_ranks.values_list('product__slug', 'rank')), [('steady-cream', 1), ('rising-serum', 2)])
+		self.assertEqual(slugs({'sort': 'bestsellers', 'category': 'serums'}), ['rising-serum'])
+
+		first_page = self.client.get('/api/products/', {'sort': 'bestsellers', 'page_size': 2}).json()
+		second_page = self.client.get(first_page['next']).json()
+		self.assertEqual([p['slug'] for p in second_page['results']], ['quiet-toner'])
+
+
+class ProductBulkFetchTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.category = Category.objects.create(name='Bath', slug='bath', is_active=True)
+		self.soap = Product.objects.create(name='Olive Soap', slug='olive-soap', price='4.00', stock=9)
+		self.salt = Product.objects.create(name='Bath Salt', slug='bath-salt', price='6.00', stock=9)
+		self.hidden = Product.objects.create(name='Old Sponge', slug='old-sponge', price='2.00', stock=9, is_active=False)
+		self.soap.categories.add(self.category)
+
+	def test_returns_products_in_request_order_with_prefetching(self):
+		with self.assertNumQueries(3):
+			resp = self.client.get('/api/products/bulk/', {'slugs': 'bath-salt,old-sponge,olive-soap,nope,bath-salt'})
+		self.assertEqual(resp.status_code, 200)
+		body = resp.json()
+		self.assertEqual([p['slug'] for p in body['results']], ['bath-salt', 'olive-soap'])
+		self.assertEqual(body['missing'], ['old-sponge', 'nope'])
+		self.assertEqual(body['results'][1]['categories'][0]['slug'], 'bath')
+
+		resp = self.client.get('/api/products/bulk/', {'ids': f'{self.soap.id},{self.salt.id}', 'fields': 'name'})
+		self.assertEqual(resp.json()['results'], [{'name': 'Olive Soap'}, {'name': 'Bath Salt'}])
+
+	@override_settings(STORE_PRODUCT_BULK_MAX_ITEMS=2)
+	def test_rejects_invalid_or_oversized_requests(self):
+		self.assertEqual(self.client.get('/api/products/bulk/', {'ids': '1,2,3'}).json()['error'], 'too_many_products')
+		self.assertEqual(self.client.get('/api/products/bulk/', {'ids': 'x'}).json()['error'], 'invalid_ids')
+		self.assertEqual(self.client.get('/api/products/bulk/').status_code, 400)
+
+
+class ProductFacetTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.skin = Category.objects.create(name='Skin', slug='skin', is_active=True)
+		self.hair = Category.objects.create(name='Hair', slug='hair', is_active=True)
+		self.serum = Product.objects.create(
+			name='Serum', slug='serum', price='30.00', stock=4, rating='4.50', tags=['vegan', 'Glow'],
+		)
+		self.oil = Product.objects.create(
+			name='Hair Oil', slug='hair-oil', price='8.00', stock=0, rating='3.20', is_flash_sale=True, tags=['vegan'],
+		)
+		self.guide = Product.objects.create(
+			name='Skin Guide', slug='skin-guide', price='120.00', stock=1, rating='0', is_digital=True,
+		)
+		self.serum.categories.add(self.skin)
+		self.guide.categories.add(self.skin)
+		self.oil.categories.add(self.hair)
+
+	def test_list_filters(self):
+		def slugs(params):
+			return sorted(p['slug'] for p in self.client.get('/api/products/', params).json()['results'])
+
+		self.assertEqual(slugs({'min_price': '10', 'max_price': '100'}), ['serum'])
+		self.assertEqual(slugs({'in_stock': 'false'}), ['hair-oil'])
+		self.assertEqual(slugs({'rating_gte': '3'}), ['hair-oil', 'serum'])
+		self.assertEqual(slugs({'tags': 'glow,missing'}), ['serum'])
+		self.assertEqual(slugs({'min_price': 'abc'}), ['hair-oil', 'serum', 'skin-guide'])
+
+	def test_facet_counts_follow_filters_and_are_cached(self):
+		with self.assertNumQueries(2):
+			facets = self.client.get('/api/products/facets/', {'tags': 'vegan'}).json()
+		self.assertEqual(facets['total'], 2)
+		self.assertEqual([(c['slug'], c['count']) for c in facets['categories']], [('hair', 1), ('skin', 1)])
+		self.assertEqual(facets['availability'], {'in_stock': 1, 'out_of_stock': 1})
+		self.assertEqual(facets['flash_sale'], {'true': 1, 'false': 1})
+		self.assertEqual({b['min']: b['count'] for b in facets['price']}['25'], 1)
+		self.assertEqual([(r['gte'], r['count']) for r in facets['rating']], [(4, 1), (3, 2), (2, 2), (1, 2)])
+
+		listing = self.client.get('/api/products/', {'facets': '1', 'page_size': '1'}).json()
+		self.assertEqual(len(listing['results']), 1)
+		self.assertEqual(listing['facets']['total'], 3)
+		self.assertEqual(listing['facets']['product_type'], {'digital': 1, 'physical': 2})
+		with self.assertNumQueries(1):
+			self.client.get('/api/products/', {'facets': '1', 'page_size': '2', 'view': 'card'})
+		self.assertEqual(self.client.get('/api/products/facets/', {'q': 'serum'}).json()['total'], 1)
+
+	def test_digital_products_count_as_in_stock(self):
+		Product.objects.filter(pk=self.guide.pk).update(stock=0)
+		cache.clear()
+		listed = self.client.get('/api/products/', {'in_stock': 'true'}).json()['results']
+		self.assertEqual(sorted(p['slug'] for p in listed), ['serum', 'skin-guide'])
+		listed = self.client.get('/api/products/', {'in_stock': 'false'}).json()['results']
+		self.assertEqual([p['slug'] for p in listed], ['hair-oil'])
+		facets = self.client.get('/api/products/facets/').json()
+		self.assertEqual(facets['availability'], {'in_stock': 2, 'out_of_stock': 1})
+
+
+class ProductAttributeFilterTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.balm = Product.objects.create(
+			name='Lip Balm', slug='lip-balm', price='5.00', stock=3,
+			tags=['Vegan', 'lips', ' vegan '], benefits=['Hydrating'],
+		)
+		self.scrub = Product.objects.create(name='Lip Scrub', slug='lip-scrub', price='6.00', stock=3, tags=['lips'])
+		self.mask = Product.objects.create(name='Clay Mask', slug='clay-mask', price='9.00', stock=3, tags=['vegan', 'clay'])
+		Product.objects.create(name='Old Mask', slug='old-mask', price='1.00', stock=0, tags=['clay'], is_active=False)
+
+	def _slugs(self, params):
+		return sorted(p['slug'] for p in self.client.get('/api/products/', params).json()['results'])
+
+	def test_side_table_tracks_json_lists(self):
+		self.assertEqual(
+			sorted(ProductAttribute.objects.filter(product=self.balm).values_list('kind', 'value')),
+			[('benefit', 'hydrating'), ('tag', 'lips'), ('tag', 'vegan')],
+		)
+		self.balm.tags = ['lips']
+		self.balm.save(update_fields=['tags'])
+		self.assertEqual(list(self.balm.attribute_values.filter(kind='tag').values_list('value', flat=True)), ['lips'])
+
+	def test_padded_values_are_stored_trimmed_and_match(self):
+		from .product_attributes import clean_attribute_list, normalize_attribute_value
+
+		self.balm.refresh_from_db()
+		# Stored elements are what Postgres lower()s in its index: trimmed, case kept.
+		self.assertEqual(self.balm.tags, ['Vegan', 'lips', 'vegan'])
+		self.assertEqual(
+			{normalize_attribute_value(v) for v in self.balm.tags},
+			set(self.balm.attribute_values.filter(kind='tag').values_list('value', flat=True)),
+		)
+		self.assertEqual(clean_attribute_list([' Shea  ', '', '  ', 3]), ['Shea', 3])
+		self.assertEqual(self._slugs({'tags': '  Vegan '}), ['clay-mask', 'lip-balm'])
+
+	def test_any_and_all_tag_filters(self):
+		self.assertEqual(self._slugs({'tags': 'VEGAN,clay'}), ['clay-mask', 'lip-balm'])
+		self.assertEqual(self._slugs({'tags': 'vegan,lips', 'tags_mode': 'all'}), ['lip-balm'])
+		self.assertEqual(self._slugs({'benefits': 'hydrating'}), ['lip-balm'])
+		self.assertEqual(self._slugs({'tags': 'unknown'}), [])
+
+	def test_tag_cloud_counts_active_products(self):
+		resp = self.client.get('/api/products/tags/')
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual(
+			resp.json()['results'],
+			[{'tag': 'lips', 'count': 2}, {'tag': 'vegan', 'count': 2}, {'tag': 'clay', 'count': 1}],
+		)
+		self.assertEqual(self.client.get('/api/products/tags/')['X-Catalog-Cache'], 'hit')
+
+
+class SearchSuggestTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.category = Category.objects.create(name='Serums', slug='serums')
+		self.serum = Product.objects.create(name='Vitamin C Serum', slug='vitamin-c-serum', price='20.00', stock=5, tags=['brightening'])
+		self.serum.categories.add(self.category)
+		Product.objects.create(name='Sérum Night Repair', slug='serum-night-repair', price='30.00', stock=5, review_count=3)
+		Product.objects.create(name='Hidden Serum', slug='hidden-serum', price='9.00', stock=5, is_active=False)
+		from .suggest import get_suggest_index
+
+		self.index = get_suggest_index()
+		self.index.rebuild()
+
+	def _suggest(self, q, **params):
+		resp = self.client.get('/api/search/suggest/', {'q': q, **params})
+		self.assertEqual(resp.status_code, 200)
+		return [(row['type'], row['text']) for row in resp.json()['results']]
+
+	def test_prefix_matches_rank_name_starts_first(self):
+		self.assertEqual(
+			self._suggest('SER'),
+			[('product', 'Sérum Night Repair'), ('category', 'Serums'), ('product', 'Vitamin C Serum')],
+		)
+		self.assertEqual(self._suggest('c se'), [('product', 'Vitamin C Serum')])
+		self.assertEqual(self._suggest('bright'), [('tag', 'brightening')])
+		self.assertEqual(self._suggest('ser', limit='1'), [('product', 'Sérum Night Repair')])
+		self.assertEqual(self._suggest(''), [])
+
+	def test_lookup_does_not_query_database(self):
+		with patch('store.suggest.get_catalog_version', return_value=self.index._version):
+			with self.assertNumQueries(0):
+				self.assertEqual(len(self.index.suggest('vit')), 1)
+
+	@override_settings(STORE_SUGGEST_CHECK_SECONDS=0)
+	def test_catalog_changes_sync_incrementally(self):
+		from .catalog_cache import bump_catalog_version
+
+		with patch.object(self.index, 'rebuild', wraps=self.index.rebuild) as rebuild:
+			with self.captureOnCommitCallbacks(execute=True):
+				Product.objects.create(name='Vitamin E Oil', slug='vitamin-e-oil', price='12.00', stock=5)
+				Product.objects.filter(pk=self.serum.pk).update(is_active=False, updated_at=timezone.now())
+				bump_catalog_version()
+			self.assertEqual(self._suggest('vitamin'), [('product', 'Vitamin E Oil')])
+			rebuild.assert_not_called()
+
+	@override_settings(STORE_SUGGEST_CHECK_SECONDS=0)
+	def test_sync_drops_deleted_rows(self):
+		from .catalog_cache import bump_catalog_version
+
+		with patch.object(self.index, 'rebuild', wraps=self.index.rebuild) as rebuild:
+			with self.captureOnCommitCallbacks(execute=True):
+				Product.objects.filter(pk=self.serum.pk).delete()
+				self.category.delete()
+				bump_catalog_version()
+			self.assertEqual(self._suggest('ser'), [('product', 'Sérum Night Repair')])
+			rebuild.assert_not_called()
+
+	def test_lookups_are_not_blocked_by_a_rebuild(self):
+		import threading
+		from .product_attributes import tag_cloud
+
+		seen = []
+
+		def tag_cloud_during_rebuild(limit):
+			# Runs while the rebuild reads the database; a lookup from another thread must not wait.
+			worker = threading.Thread(target=lambda: seen.append(self.index.suggest('vit')))
+			worker.start()
+			worker.join(timeout=2)
+			seen.append(worker.is_alive())
+			return tag_cloud(limit)
+
+		with patch('store.suggest.tag_cloud', side_effect=tag_cloud_during_rebuild):
+			self.index.rebuild()
+		self.assertEqual(seen, [[{'type': 'product', 'text': 'Vitamin C Serum', 'slug': 'vitamin-c-serum'}], False])
+
+
+class SearchSpellingTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		category = Category.objects.create(name='Moisturizers', slug='moisturizers')
+		self.serum = Product.objects.create(name='Vitamin C Serum', slug='vitamin-c-serum', price='20.00', stock=5, tags=['brightening'])
+		self.serum.categories.add(category)
+		Product.objects.create(name='Retinol Serum', slug='retinol-serum', price='25.00', stock=5)
+
+	def test_dictionary_corrects_edits_and_transpositions(self):
+		from .spelling import SpellingDictionary
+
+		dictionary = SpellingDictionary({'serum': 5, 'sebum': 1, 'vitamin': 2})
+		self.assertEqual(dictionary.lookup('serum'), ('serum', 0, 5))
+		self.assertEqual(dictionary.lookup('sreum'), ('serum', 1, 5))
+		self.assertEqual(dictionary.lookup('seaum'), ('serum', 1, 5))
+		self.assertIsNone(dictionary.lookup('vtmn'))
+		self.assertEqual(dictionary.correct('vitamn c serm'), 'vitamin c serum')
+		self.assertIsNone(dictionary.correct('vitamin serum'))
+
+	@override_settings(STORE_SEARCH_AUTOCORRECT=False)
+	def test_zero_result_search_suggests_correction(self):
+		body = self.client.get('/api/products/', {'q': 'vitamn serm'}).json()
+		self.assertEqual(body['results'], [])
+		self.assertEqual(body['did_you_mean'], 'vitamin serum')
+		self.assertIsNone(body['corrected_query'])
+
+		body = self.client.get('/api/products/', {'q': 'retinol'}).json()
+		self.assertEqual([p['slug'] for p in body['results']], ['retinol-serum'])
+		self.assertIsNone(body['did_you_mean'])
+		self.assertNotIn('did_you_mean', self.client.get('/api/products/').json())
+
+	def test_autocorrect_reruns_search(self):
+		body = self.client.get('/api/products/', {'search': 'moisturizrs', 'autocorrect': '1', 'page_size': '1'}).json()
+		self.assertEqual(body['corrected_query'], 'moisturizers')
+		self.assertEqual([p['slug'] for p in body['results']], ['vitamin-c-serum'])
+		self.assertIsNone(body['next'])
+
+		body = self.client.get('/api/products/', {'q': 'serm', 'autocorrect': '1', 'page_size': '1'}).json()
+		self.assertEqual(len(body['results']), 1)
+		self.assertIn('q=serum', body['next'])
+
+	@override_settings(STORE_METADATA_ASYNC=False)
+	def test_vocabulary_follows_catalog_changes(self):
+		self.assertEqual(self.client.get('/api/products/', {'q': 'ceramde'}).json()['did_you_mean'], None)
+		Product.objects.create(name='Ceramide Cream', slug='ceramide-cream', price='15.00', stock=5)
+		self.assertEqual(self.client.get('/api/products/', {'q': 'ceramde'}).json()['did_you_mean'], 'ceramide')
+
+
+class SearchExpansionTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		Product.objects.create(name='Daily Moisturizer', slug='daily-moisturizer', price='18.00', stock=5)
+		Product.objects.create(name='Graphic T-Shirt', slug='graphic-t-shirt', price='22.00', stock=5)
+		Product.objects.create(name='Berry Lip Balm', slug='berry-lip-balm', price='4.00', stock=5)
+		Product.objects.create(name='Scented Candle', slug='scented-candle', price='11.00', stock=5)
+		Product.objects.create(name='Oat Cookie Scrub', slug='oat-cookie-scrub', price='9.00', stock=5)
+
+	def _search(self, query):
+		return [row['slug'] for row in self.client.get('/api/products/', {'q': query}).json()['results']]
+
+	def test_expansion_table_groups_synonyms_and_stems(self):
+		from .search_expansion import expand_query_terms, stem_word
+
+		self.assertEqual([stem_word(w) for w in ('serums', 'berries', 'tees', 'scented', 'glass', 'brushes')],
+			['serum', 'berry', 'tee', 'scent', 'glass', 'brush'])
+		self.assertEqual(expand_query_terms('moisturisers'), [(('moisturiser',), ('moisturizer',))])
+		self.assertEqual(expand_query_terms('T-Shirts red')[0], (('tee',), ('tshirt',), ('t', 'shirt')))
+		self.assertEqual(expand_query_terms('T-Shirts red')[1], (('red',),))
+		self.assertEqual(expand_query_terms('cookies'), [(('cookie',), ('cooky',))])
+
+	def test_listing_search_matches_variants_and_synonyms(self):
+		self.assertEqual(self._search('moisturiser'), ['daily-moisturizer'])
+		self.assertEqual(self._search('tees'), ['graphic-t-shirt'])
+		self.assertEqual(self._search('berries'), ['berry-lip-balm'])
+		self.assertEqual(self._search('scented candles'), ['scented-candle'])
+		self.assertEqual(self._search('cookies'), ['oat-cookie-scrub'])
+
+	@override_settings(STORE_SEARCH_SYNONYMS=[('lip balm', 'chapstick'), 'candle,votive', 'cookie,biscuit'])
+	def test_configured_synonyms(self):
+		self.assertEqual(self._search('chapsticks'), ['berry-lip-balm'])
+		self.assertEqual(self._search('votive'), ['scented-candle'])
+		self.assertEqual(self._search('biscuits'), ['oat-cookie-scrub'])
+		self.assertEqual(self._search('cookies'), ['oat-cookie-scrub'])
+
+	def test_assistant_product_search_uses_expansion(self):
+		resp = self.client.post('/api/assistant/chat/', {'message': 'find tees'}, content_type='application/json')
+		self.assertEqual(resp.json().get('intent'), 'product_search')
+		self.assertIn('Graphic T-Shirt', resp.json().get('reply', ''))
+
+
+class SearchAnalyticsTests(TestCase):
+	def setUp(self):
+		from . import search_analytics
+
+		cache.clear()
+		search_analytics._buffer.drain()
+		self.client = Client()
+		Product.objects.create(name='Retinol Serum', slug='retinol-serum', price='25.00', stock=5)
+		Product.objects.create(name='Retinol Cream', slug='retinol-cream', price='21.00', stock=5)
+
+	def test_searches_are_buffered_then_bulk_written(self):
+		from .search_analytics import flush_search_events
+
+		first = self.client.get('/api/products/', {'q': ' Retinol ', 'page_size': '1'}).json()
+		second = self.client.get(first['next'])
+		self.assertEqual(second.status_code, 200)
+		self.client.get('/api/products/', {'q': 'zzqx'})
+		self.client.get('/api/products/')
+		self.client.post('/api/assistant/chat/', {'message': 'find retinol'}, content_type='application/json')
+		self.assertEqual(SearchEvent.objects.count(), 0)
+
+		with self.assertNumQueries(1):
+			self.assertEqual(flush_search_events(), 3)
+		self.assertEqual(
+			sorted(SearchEvent.objects.values_list('source', 'query', 'result_count')),
+			[('assistant', 'retinol', 2), ('catalog', 'retinol', 2), ('catalog', 'zzqx', 0)],
+		)
+		self.assertEqual(flush_search_events(), 0)
+
+	def test_cached_search_pages_record_the_count_without_queries(self):
+		from .search_analytics import flush_search_events
+
+		self.client.get('/api/products/', {'q': 'retinol', 'page_size': '1'})
+		with self.assertNumQueries(0):
+			resp = self.client.get('/api/products/', {'q': 'retinol', 'page_size': '1'})
+		self.assertEqual(resp['X-Catalog-Cache'], 'hit')
+		flush_search_events()
+		self.assertEqual(list(SearchEvent.objects.values_list('result_count', flat=True)), [2, 2])
+
+	@override_settings(STORAGES={
+		'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+		'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+	})
+	def test_report_lists_top_and_zero_result_queries_with_p95(self):
+		from .search_analytics import search_report
+
+		SearchEvent.objects.bulk_create(
+			[SearchEvent(query='serum', result_count=4, latency_ms=ms) for ms in range(1, 18)]
+			+ [SearchEvent(query='vegan spf', result_count=0, latency_ms=ms) for ms in (18, 19, 20)]
+			+ [SearchEvent(query='old', result_count=0, latency_ms=1, created_at=timezone.now() - timedelta(days=60))]
+		)
+		report = search_report(days=7)
+		self.assertEqual((report['searches'], report['zero_results'], report['p95_latency_ms']), (20, 3, 19))
+		self.assertEqual([row['query'] for row in report['top_queries']], ['serum', 'vegan spf'])
+		self.assertEqual([(row['query'], row['searches']) for row in report['zero_result_queries']], [('vegan spf', 3)])
+
+		admin_user = User.objects.create_superuser(username='searchadmin', email='searchadmin@example.com', password='pass12345')
+		self.client.force_login(admin_user)
+		resp = self.client.get(reverse('admin:store_searchevent_report'), {'days': '90'})
+		self.assertEqual(resp.status_code, 200)
+		self.assertContains(resp, 'vegan spf')
+		self.assertEqual(resp.context['report']['searches'], 21)
+
+
+@override_settings(STORE_CART_CACHE_ANONYMOUS=True)
+class SessionCartStoreTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.serum = Product.objects.create(name='Night Serum', slug='night-serum', price='12.50', stock=5)
+		self.mask = Product.objects.create(name='Clay Mask', slug='clay-mask', price='8.00', stock=2)
+
+	def tearDown(self):
+		cache.clear()
+
+	def _add(self, product, quantity=1):
+		return self.client.post('/api/cart/add/', {'product_id': product.id, 'quantity': quantity}, content_type='application/json')
+
+	@override_settings(STORE_CART_CACHE_ANONYMOUS=False)
+	def test_empty_cart_view_creates_no_cart_or_session(self):
+		resp = self.client.get('/api/cart/')
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual(resp.json(), {'id': None, 'user': None, 'session_key': None, 'items': [], 'total': 0})
+		self.assertFalse(Cart.objects.exists())
+		self.assertNotIn(settings.SESSION_COOKIE_NAME, resp.cookies)
+
+		user = User.objects.create_user(username='cartless', password='pass12345')
+		self.client.force_login(user)
+		resp = self.client.get('/api/cart/')
+		self.assertEqual((resp.json()['id'], resp.json()['user'], resp.json()['items']), (None, user.id, []))
+		self.assertFalse(Cart.objects.exists())
+
+	def test_anonymous_cart_lives_in_cache_until_checkout(self):
+		self.assertEqual(self._add(self.serum, 2).status_code, 200)
+		self.assertEqual(self._add(self.mask).status_code, 200)
+		self.assertEqual(self._add(self.mask, 2).json()['error'], 'insufficient_stock')
+		self.assertFalse(Cart.objects.exists())
+
+		cart = self.client.get('/api/cart/').json()
+		self.assertIsNone(cart['id'])
+		self.assertEqual([(item['id'], item['quantity']) for item in cart['items']], [(self.serum.id, 2), (self.mask.id, 1)])
+		self.assertAlmostEqual(float(cart['total']), 33.0)
+
+		update = lambda item_id, quantity: self.client.post(
+			'/api/cart/update/', {'item_id': item_id, 'quantity': quantity}, content_type='application/json'
+		)
+		self.assertEqual(update(self.serum.id, 3).status_code, 200)
+		self.assertEqual(update(self.serum.id, 9).status_code, 400)
+		self.assertEqual(update(999999, 1).status_code, 404)
+		self.assertEqual(self.client.post('/api/cart/remove/', {'item_id': self.mask.id}, content_type='application/json').status_code, 200)
+		self.assertEqual(self.client.post('/api/cart/remove/', {'item_id': self.mask.id}, content_type='application/json').status_code, 404)
+		self.assertEqual([(item['id'], item['quantity']) for item in self.client.get('/api/cart/').json()['items']], [(self.serum.id, 3)])
+		self.assertFalse(Cart.objects.exists())
+
+		address = {'full_name': 'Guest', 'line1': 'A', 'city': 'C', 'postal_code': '000', 'country': 'US'}
+		resp = self.client.post('/api/checkout/', {'shipping_address': address}, content_type='application/json')
+		self.assertEqual(resp.status_code, 200)
+		cart = Cart.objects.get()
+		self.assertEqual(self.client.session['cart_id'], cart.id)
+		self.assertEqual(list(cart.items.values_list('product_id', 'quantity')), [(self.serum.id, 3)])
+		self.assertEqual(list(Order.objects.get().items.values_list('product_id', 'quantity')), [(self.serum.id, 3)])
+		# The materialized cart is now the session's cart.
+		self.assertEqual(self.client.get('/api/cart/').json()['id'], cart.id)
+
+	def test_inactive_products_are_hidden_and_not_materialized(self):
+		self._add(self.serum, 2)
+		self._add(self.mask)
+		Product.objects.filter(pk=self.mask.pk).update(is_active=False)
+
+		cart = self.client.get('/api/cart/').json()
+		self.assertEqual([item['id'] for item in cart['items']], [self.serum.id])
+		self.assertAlmostEqual(float(cart['total']), 25.0)
+
+		address = {'full_name': 'Guest', 'line1': 'A', 'city': 'C', 'postal_code': '000', 'country': 'US'}
+		self.assertEqual(self.client.post('/api/checkout/', {'shipping_address': address}, content_type='application/json').status_code, 200)
+		self.assertEqual(list(Cart.objects.get().items.values_list('product_id', flat=True)), [self.serum.id])
+
+	def test_login_merges_cached_cart_into_user_cart(self):
+		user = User.objects.create_user(username='returning', password='pass12345', email='returning@example.com')
+		existing = Cart.objects.create(user=user)
+		CartItem.objects.create(cart=existing, product=self.mask, quantity=1)
+		self._add(self.serum, 2)
+		self._add(self.mask, 2)
+
+		resp = self.client.post('/api/auth/login/', {'username': 'returning', 'password': 'pass12345'}, content_type='application/json')
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual(Cart.objects.count(), 1)
+		# Quantities add up, capped at stock.
+		self.assertEqual(
+			sorted(existing.items.values_list('product_id', 'quantity')),
+			sorted([(self.serum.id, 2), (self.mask.id, 2)]),
+		)
+		self.assertNotIn('cart_token', self.client.session)
+		cart = self.client.get('/api/cart/').json()
+		self.assertEqual(cart['id'], existing.id)
+		self.assertEqual(len(cart['items']), 2)
+
+
+class CartDetailQueryTests(TestCase):
+	def setUp(self):
+		self.client = Client()
+		self.user = User.objects.create_user(username='cart_queries', password='pass12345')
+		self.client.force_login(self.user)
+		self.category = Category.objects.create(name='Skincare', slug='skincare')
+		self.cart = Cart.objects.create(user=self.user)
+
+	def _add_products(self, count):
+		for _ in range(count):
+			index = Product.objects.count()
+			product = Product.objects.create(name=f'Cart item {index}', slug=f'cart-item-{index}', price='2.50', stock=10)
+			product.categories.add(self.category)
+			CartItem.objects.create(cart=self.cart, product=product, quantity=2)
+
+	def _cart_queries(self):
+		from django.db import connection
+		from django.test.utils import CaptureQueriesContext
+
+		with CaptureQueriesContext(connection) as ctx:
+			resp = self.client.get('/api/cart/')
+		self.assertEqual(resp.status_code, 200)
+		return resp.json(), len(ctx.captured_queries)
+
+	def test_query_count_does_not_grow_with_items(self):
+		self._add_products(1)
+		self._cart_queries()  # settle the session's cart_id
+		small, small_queries = self._cart_queries()
+		self._add_products(6)
+		large, large_queries = self._cart_queries()
+
+		self.assertEqual(small_queries, large_queries)
+		self.assertEqual(len(large['items']), 7)
+		self.assertAlmostEqual(float(large['total']), 35.0)
+		self.assertAlmostEqual(float(small['total']), 5.0)
+		product = large['items'][0]['product']
+		self.assertEqual(product['category'], 'Skincare')
+		self.assertNotIn('images', product)
+		self.assertNotIn('description', product)
+
+	def test_total_property_is_an_aggregate(self):
+		from decimal import Decimal
+
+		self._add_products(3)
+		with self.assertNumQueries(1):
+			self.assertEqual(self.cart.total, Decimal('15.00'))
+
+
+class CartBatchTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = Client()
+		self.user = User.objects.create_user(username='batch_user', password='pass12345')
+		self.serum = Product.objects.create(name='Batch Serum', slug='batch-serum', price='10.00', stock=5)
+		self.mask = Product.objects.create(name='Batch Mask', slug='batch-mask', price='4.00', stock=1)
+		self.ebook = Product.objects.create(name='Batch Guide', slug='batch-guide', price='3.00', stock=0, is_digital=True)
+
+	def tearDown(self):
+		cache.clear()
+
+	def _batch(self, operations):
+		return self.client.post('/api/cart/batch/', {'operations': operations}, content_type='application/json')
+
+	def _lines(self, cart):
+		return [(item['product']['id'], item['quantity']) for item in cart['items']]
+
+	def test_applies_operations_and_returns_cart(self):
+		self.client.force_login(self.user)
+		cart = Cart.objects.create(user=self.user)
+		CartItem.objects.create(cart=cart, product=self.mask, quantity=1)
+
+		resp = self._batch([
+			{'op': 'add', 'product_id': self.serum.id, 'quantity': 2},
+			{'op': 'add', 'product_id': self.serum.id},
+			{'op': 'set', 'product_id': self.ebook.id, 'quantity': 4},
+			{'op': 'remove', 'product_id': self.mask.id},
+		])
+		self.assertEqual(resp.status_code, 200)
+		data = resp.json()
+		self.assertEqual(data['id'], cart.id)
+		self.assertEqual(self._lines(data), [(self.serum.id, 3), (self.ebook.id, 4)])
+		self.assertAlmostEqual(float(data['total']), 42.0)
+		self.assertEqual(
+			sorted(cart.items.values_list('product_id', 'quantity')),
+			sorted([(self.serum.id, 3), (self.ebook.id, 4)]),
+		)
+
+		resp = self._batch([{'op': 'clear'}, {'op': 'add', 'product_id': self.mask.id}])
+		self.assertEqual(self._lines(resp.json()), [(self.mask.id, 1)])
+
+	def test_rejects_whole_batch_on_any_invalid_operation(self):
+		self.client.force_login(self.user)
+		cart = Cart.objects.create(user=self.user)
+		CartItem.objects.create(cart=cart, product=self.serum, quantity=1)
+
+		resp = self._batch([
+			{'op': 'set', 'product_id': self.serum.id, 'quantity': 2},
+			{'op': 'add', 'product_id': self.mask.id, 'quantity': 2},
+		])
+		self.assertEqual(resp.status_code, 400)
+		self.assertEqual((resp.json()['error'], resp.json()['index']), ('insufficient_stock', 1))
+		self.assertEqual(list(cart.items.values_list('product_id', 'quantity')), [(self.serum.id, 1)])
+
+		self.assertEqual(self._batch([{'op': 'explode'}]).json()['error'], 'invalid_operation')
+		self.assertEqual(self._batch([{'op': 'add', 'product_id': 999999}]).json()['error'], 'product_not_found')
+		self.assertEqual(self._batch([]).json()['error'], 'operations_required')
+		with override_settings(STORE_CART_BATCH_MAX_OPERATIONS=1):
+			self.assertEqual(self._batch([{'op': 'clear'}, {'op': 'clear'}]).json()['error'], 'too_many_operations')
+
+	def test_anonymous_batches_without_a_cart_write_nothing(self):
+		resp = self._batch([{'op': 'remove', 'product_id': self.serum.id}])
+		self.assertEqual((resp.status_code, resp.json()['items']), (200, []))
+		self.assertFalse(Cart.objects.exists())
+
+		with override_settings(STORE_CART_CACHE_ANONYMOUS=True):
+			resp = self._batch([
+				{'op': 'add', 'product_id': self.serum.id, 'quantity': 2},
+				{'op': 'set', 'product_id': self.mask.id, 'quantity': 1},
+			])
+			self.assertEqual(self._lines(resp.json()), [(self.serum.id, 2), (self.mask.id, 1)])
+			self.assertEqual(self._lines(self.client.get('/api/cart/').json()), [(self.serum.id, 2), (self.mask.id, 1)])
+		self.assertFalse(Cart.objects.exists())
+
+
+class CartAddUpsertTests(TestCase):
+	def setUp(self):
+		self.cart = Cart.objects.create(session_key='upsert')
+		self.product = Product.objects.create(name='Upsert Balm', slug='upsert-balm', price='6.00', stock=3)
+		self.digital = Product.objects.create(name='Upsert Guide', slug='upsert-guide', price='2.00', stock=0, is_digital=True)
+
+	def test_add_is_one_statement_with_stock_check(self):
+		from .cart_store import add_cart_quantity
+
+		with self.assertNumQueries(1):
+			self.assertEqual(add_cart_quantity(self.cart.id, self.product.id, 2), 2)
+		with self.assertNumQueries(1):
+			self.assertEqual(add_cart_quantity(self.cart.id, self.product.id, 1), 3)
+		self.assertIsNone(add_cart_quantity(self.cart.id, self.product.id, 1))
+		self.assertEqual(list(self.cart.items.values_list('product_id', 'quantity')), [(self.product.id, 3)])
+
+		other = Cart.objects.create(session_key='upsert-other')
+		self.assertIsNone(add_cart_quantity(other.id, self.product.id, 4))
+		self.assertFalse(other.items.exists())
+		self.assertEqual(add_cart_quantity(other.id, self.digital.id, 5), 5)
+		self.assertEqual(add_cart_quantity(other.id, self.digital.id, 5), 10)
+
+	def test_cart_lines_are_unique_per_product(self):
+		from django.db import IntegrityError, transaction
+
+		CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+		with self.assertRaises(IntegrityError), transaction.atomic():
+			CartItem.objects.create(cart=self.cart, product=self.product, quantity=1)
+
+	def test_cart_add_endpoint_uses_upsert(self):
+		session = self.client.session
+		session['cart_id'] = self.cart.id
+		session.save()
+		add = lambda quantity: self.client.post(
+			'/api/cart/add/', {'product_id': self.product.id, 'quantity': quantity}, content_type='application/json'
+		)
+		self.assertEqual(add(2).status_code, 200)
+		resp = add(2)
+		self.assertEqual((resp.status_code, resp.json()['available_stock']), (400, 3))
+		self.assertEqual(add(1).status_code, 200)
+		self.assertEqual(self.cart.items.get().quantity, 3)
@@ -7,6 +7,7 @@ from .views import (
     cart_update,
     cart_remove,
     cart_clear,
+    cart_batch,
     checkout_create,
     stripe_create_payment_intent,
     stripe_confirm_checkout_session,
@@ -56,6 +57,8 @@ from .views import (
     contact_submit,
     newsletter_subscribe,
     product_reviews,
+    product_related,
+    search_suggest,
 )
 
 router = DefaultRouter()
@@ -78,6 +81,7 @@ urlpatterns = [
     path('cart/update/', cart_update, name='cart-update'),
     path('cart/remove/', cart_remove, name='cart-remove'),
     path('cart/clear/', cart_clear, name='cart-clear'),
+    path('cart/batch/', cart_batch, name='cart-batch'),
     # Wishlist endpoints
     path('wishlist/', wishlist_detail, name='wishlist-detail'),
     path('wishlist/add/', wishlist_add, name='wishlist-add'),
@@ -120,6 +124,8 @@ urlpatterns = [
     # Product by slug helper
     path('products/slug/<slug:slug>/', product_by_slug, name='product-by-slug'),
     path('products/slug/<slug:slug>/reviews/', product_reviews, name='product-reviews'),
+    path('products/slug/<slug:slug>/related/', product_related, name='product-related'),
+    path('search/suggest/', search_suggest, name='search-suggest'),
     # Pages (static content: About, Contact, FAQ, etc.)
     path('pages/', pages_list, name='pages-list'),
     path('pages/<slug:slug>/', page_detail, name='page-detail'),
@@ -3,16 +3,18 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from .models import (
     Product, Cart, CartItem, Order, OrderItem, ShippingMethod, Address, Category,
-    ContactMessage, NewsletterSubscription, PaymentTransaction, HomeHeroSlide, Wishlist, ProductReview, AssistantPolicy,
-    UserNotification, UserMailboxMessage, Page,
+    ContactMessage, NewsletterSubscription, PaymentTransaction, Wishlist, ProductReview, AssistantPolicy,
+    UserNotification, UserMailboxMessage, Page, RelatedProduct, ProductRanking, SearchEvent,
 )
-from django.db.models import Count, Q, Avg, Case, When, Value, IntegerField
+from django.db.models import Count, F, Q, Max, OuterRef, Prefetch, Subquery
 from .serializers import (
     ProductSerializer, CartSerializer, CartItemSerializer, OrderSerializer,
-    ShippingMethodSerializer, AddressSerializer, CategorySerializer, HomeHeroSlideSerializer, ProductReviewSerializer,
-    UserNotificationSerializer, UserMailboxMessageSerializer, ProductImageSerializer, _resolve_image_url,
+    ShippingMethodSerializer, AddressSerializer, CategorySerializer, ProductReviewSerializer,
+    UserNotificationSerializer, UserMailboxMessageSerializer, ProductImageSerializer,
+    ProductCardSerializer, parse_fieldsets,
 )
 from django.db import transaction
 from decimal import Decimal, InvalidOperation
@@ -39,10 +41,30 @@ import hmac
 import hashlib
 import logging
 import re
+import time
 from uuid import uuid4
 from django.views.decorators.csrf import csrf_exempt
 from ipaddress import ip_address
 from .email_react import get_public_site_url, render_react_email_html
+from .search import SEARCH_QUERY_MAX_LENGTH, search_products
+from .image_urls import resolve_image_url
+from .home_payload import home_payload_response
+from .recommendations import related_products_limit
+from .rankings import ranking_kind_for_sort
+from .pagination import KeysetPagination
+from .catalog_cache import (
+    CatalogCacheMixin, cached_catalog_response, cached_catalog_value, catalog_cache, conditional_get, content_etag,
+)
+from .facets import IN_STOCK_Q, TRUTHY_VALUES, facet_filter_key, parse_decimal, product_facets
+from .product_attributes import ATTRIBUTE_FIELDS, filter_products_by_attribute, tag_cloud
+from .suggest import search_suggestions
+from .spelling import suggest_query_correction
+from .search_analytics import record_search
+from .review_stats import RATING_VALUES, rating_histogram
+from .cart_store import (
+    CartBatchError, SessionCart, add_cart_quantity, cart_display_queryset, materialize_session_cart,
+    parse_cart_operations, plan_cart_lines, session_cart_enabled, virtual_cart_payload,
+)
 
 logger = logging.getLogger(__name__)
 STOREFRONT_THEME_PAGE_SLUG = 'storefront-theme-preset'
@@ -325,7 +347,7 @@ def _send_order_created_notifications(order, contact_email=None, request=None):
                                 ProductImageSerializer(first_image, context=serializer_context).data.get('image_url') or ''
                             ).strip()
                         except Exception:
-                            image_url = _resolve_image_url(getattr(first_image, 'image', None), request=request) or ''
+                            image_url = resolve_image_url(getattr(first_image, 'image', None), request=request) or ''
                         image_url = str(image_url).strip()
                         if image_url.startswith('res.cloudinary.com/'):
                             image_url = f'https://{image_url}'
@@ -501,63 +523,252 @@ def _send_order_paid_notifications(order, provider='unknown'):
         )
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+def _filter_products_by_category_subtree(qs, category_slug):
+    """Products assigned to the category or any of its descendants (one indexed prefix scan)."""
+    path = Category.objects.filter(slug=category_slug).values_list('path', flat=True).first()
+    if not path:
+        return qs.none()
+    memberships = Product.categories.through.objects.filter(category__path__startswith=path)
+    return qs.filter(id__in=memberships.values('product_id'))
+
+
+def _annotate_sales_rank(qs, kind, category_slug=None):
+    """Attach the materialized rank for the category (or whole catalog) as `sales_rank`."""
+    rankings = ProductRanking.objects.filter(kind=kind, product=OuterRef('pk'))
+    if category_slug:
+        category_id = Category.objects.filter(slug=category_slug).values_list('id', flat=True).first()
+        rankings = rankings.filter(category_id=category_id)
+    else:
+        rankings = rankings.filter(category__isnull=True)
+    return qs.annotate(sales_rank=Subquery(rankings.order_by().values('rank')[:1]))
+
+
+def _apply_product_filters(qs, params):
+    """Price, stock, rating and tag filters shared by listings and facet counts."""
+    min_price = parse_decimal(params.get('min_price')) if params.get('min_price') else None
+    max_price = parse_decimal(params.get('max_price')) if params.get('max_price') else None
+    rating_gte = parse_decimal(params.get('rating_gte')) if params.get('rating_gte') else None
+    in_stock = params.get('in_stock')
+    if min_price is not None:
+        qs = qs.filter(price__gte=min_price)
+    if max_price is not None:
+        qs = qs.filter(price__lte=max_price)
+    if rating_gte is not None:
+        qs = qs.filter(rating__gte=rating_gte)
+    if in_stock is not None and str(in_stock).strip():
+        if str(in_stock).strip().lower() in TRUTHY_VALUES:
+            qs = qs.filter(IN_STOCK_Q)
+        else:
+            qs = qs.exclude(IN_STOCK_Q)
+    for field in ATTRIBUTE_FIELDS:
+        values = _split_list_params(params.getlist(field))
+        if values:
+            match_all = str(params.get(f'{field}_mode') or '').strip().lower() == 'all'
+            qs = filter_products_by_attribute(qs, field, values, match_all=match_all)
+    return qs
+
+
+def _split_list_params(values):
+    """Comma-separated (or repeated) query values, trimmed and de-duplicated in order."""
+    keys = []
+    for value in values:
+        for part in str(value or '').split(','):
+            part = part.strip()
+            if part and part not in keys:
+                keys.append(part)
+    return keys
+
+
+class ProductViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = ProductSerializer
+    catalog_cache_namespace = 'products'
+    pagination_class = KeysetPagination
+
+    def _search_query(self):
+        corrected = getattr(self, '_corrected_query', None)
+        if corrected:
+            return corrected
+        params = self.request.query_params
+        return str(params.get('q') or params.get('search') or '').strip()
+
+    def list(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        response = super().list(request, *args, **kwargs)
+        raw_query = str(request.query_params.get('q') or request.query_params.get('search') or '').strip()
+        data = getattr(response, 'data', None)
+        if raw_query and isinstance(data, dict) and not request.query_params.get(self.paginator.cursor_query_param):
+            if data.get('corrected_query'):
+                # An autocorrected search found nothing for what was actually typed.
+                result_count = 0
+            elif data.get('next'):
+                # More pages: count every match, not just the rows on this one.
+                result_count = self._match_count()
+            else:
+                result_count = len(data.get('results') or [])
+            record_search(raw_query, result_count, (time.perf_counter() - started) * 1000)
+        return response
+
+    def _ranking_kind(self):
+        params = self.request.query_params
+        return ranking_kind_for_sort(params.get('sort'), params.get('window'))
+
+    def get_keyset_ordering(self):
+        if self._ranking_kind():
+            # Unranked products (NULL rank: no recent sales) sort last, by id.
+            return ['sales_rank', 'id']
+        if self._search_query():
+            return ['search_rank', '-is_featured', '-created_at', 'id']
+        return ['-is_featured', '-created_at', 'id']
+
+    def get_serializer_class(self):
+        if str(self.request.query_params.get('view') or '').strip().lower() == 'card':
+            return ProductCardSerializer
+        return ProductSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldsets'] = parse_fieldsets(self.request.query_params)
+        return context
+
+    def _base_queryset(self):
+        serializer_class = self.get_serializer_class()
+        fields, expand = parse_fieldsets(self.request.query_params)
+        field_names = set(serializer_class.resolve_field_names(fields, expand))
+        prefetch = []
+        if 'images' in field_names:
+            prefetch.append('images')
+        if 'categories' in field_names:
+            prefetch.append('categories')
+        qs = Product.objects.filter(is_active=True).prefetch_related(*prefetch)
+        if fields or serializer_class is not ProductSerializer:
+            # Sparse payloads only load the columns they render (plus the keyset columns).
+            keyset_columns = {name.lstrip('-') for name in self.get_keyset_ordering()} - {'search_rank', 'sales_rank'}
+            qs = qs.only(*(serializer_class.required_columns(field_names) | keyset_columns))
+        return qs
 
     def get_queryset(self):
-        qs = Product.objects.filter(is_active=True).prefetch_related('images', 'categories')
+        qs = self._base_queryset()
         params = self.request.query_params
         category_slug = params.get('category')
         featured = params.get('featured')
-        raw_query = str(params.get('q') or params.get('search') or '').strip()
-        limit_raw = params.get('limit')
+        raw_query = self._search_query()
         if category_slug:
-            qs = qs.filter(categories__slug=category_slug)
+            qs = _filter_products_by_category_subtree(qs, category_slug)
         if featured is not None:
             if str(featured).lower() in ['1', 'true', 'yes']:
                 qs = qs.filter(is_featured=True)
             else:
                 qs = qs.filter(is_featured=False)
+        qs = _apply_product_filters(qs, params)
         if raw_query:
-            normalized_query = re.sub(r'\s+', ' ', raw_query).strip()[:100]
-            terms = [term for term in normalized_query.split(' ') if term][:6]
-            for term in terms:
-                qs = qs.filter(
-                    Q(name__icontains=term)
-                    | Q(slug__icontains=term)
-                    | Q(description__icontains=term)
-                    | Q(categories__name__icontains=term)
-                    | Q(categories__slug__icontains=term)
-                )
-            qs = qs.annotate(
-                search_rank=Case(
-                    When(slug__iexact=normalized_query, then=Value(0)),
-                    When(name__iexact=normalized_query, then=Value(1)),
-                    When(name__istartswith=normalized_query, then=Value(2)),
-                    When(slug__istartswith=normalized_query, then=Value(3)),
-                    When(categories__name__iexact=normalized_query, then=Value(4)),
-                    When(categories__slug__iexact=normalized_query, then=Value(5)),
-                    When(name__icontains=normalized_query, then=Value(6)),
-                    When(categories__name__icontains=normalized_query, then=Value(7)),
-                    default=Value(8),
-                    output_field=IntegerField(),
-                )
-            ).order_by('search_rank', '-is_featured', '-created_at', 'id')
-        else:
-            qs = qs.order_by('-is_featured', '-created_at', 'id')
-        qs = qs.distinct()
-        if limit_raw not in (None, ''):
+            qs = search_products(qs, raw_query)
+        ranking_kind = self._ranking_kind()
+        if ranking_kind:
+            qs = _annotate_sales_rank(qs, ranking_kind, category_slug)
+        return qs.order_by(*self.get_keyset_ordering()).distinct()
+
+    def _wants_facets(self):
+        return str(self.request.query_params.get('facets') or '').strip().lower() in TRUTHY_VALUES
+
+    def _match_count(self):
+        # Cached like the facets, so a search page served from cache records without a query.
+        return cached_catalog_value(
+            'products:count',
+            facet_filter_key(self.request.query_params),
+            lambda: self.filter_queryset(self.get_queryset()).order_by().count(),
+        )
+
+    def _facets(self):
+        return cached_catalog_value(
+            'products:facets',
+            facet_filter_key(self.request.query_params),
+            lambda: product_facets(self.get_queryset()),
+        )
+
+    def _wants_autocorrect(self):
+        raw = self.request.query_params.get('autocorrect')
+        if raw is None:
+            return bool(getattr(settings, 'STORE_SEARCH_AUTOCORRECT', False))
+        return str(raw).strip().lower() in TRUTHY_VALUES
+
+    def _rerun_search(self, corrected_query):
+        """First page for the corrected query; page links carry it as `q`."""
+        self._corrected_query = corrected_query
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        base_url = remove_query_param(self.paginator.base_url, 'search')
+        self.paginator.base_url = replace_query_param(base_url, 'q', corrected_query)
+        return self.get_serializer(page, many=True).data
+
+    def get_paginated_response(self, data):
+        raw_query = self._search_query()
+        did_you_mean = None
+        corrected_query = None
+        if raw_query and not data and not self.request.query_params.get(self.paginator.cursor_query_param):
+            did_you_mean = suggest_query_correction(raw_query)
+            if did_you_mean and self._wants_autocorrect():
+                corrected_query = did_you_mean
+                data = self._rerun_search(corrected_query)
+        response = super().get_paginated_response(data)
+        if raw_query:
+            response.data['did_you_mean'] = did_you_mean
+            response.data['corrected_query'] = corrected_query
+        if self._wants_facets():
+            response.data['facets'] = self._facets()
+        return response
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Facet counts for the same filter params as the listing."""
+        return cached_catalog_response(request, 'products:facets', lambda: Response(self._facets()))
+
+    @action(detail=False, methods=['get'])
+    def tags(self, request):
+        """Tag cloud: most used tags with active-product counts."""
+        try:
+            limit = max(1, min(int(request.query_params.get('limit') or 50), 200))
+        except (TypeError, ValueError):
+            limit = 50
+        return cached_catalog_response(request, 'products:tags', lambda: Response({'results': tag_cloud(limit)}))
+
+    @action(detail=False, methods=['get'])
+    def bulk(self, request):
+        """Active products by `?ids=` or `?slugs=` (comma-separated), in request order."""
+        return cached_catalog_response(request, 'products:bulk', lambda: self._bulk_response(request))
+
+    def _bulk_response(self, request):
+        raw_ids = _split_list_params(request.query_params.getlist('ids'))
+        raw_slugs = _split_list_params(request.query_params.getlist('slugs'))
+        if bool(raw_ids) == bool(raw_slugs):
+            return Response({'error': 'ids_or_slugs_required', 'detail': 'Provide either ids or slugs.'}, status=400)
+        max_items = int(getattr(settings, 'STORE_PRODUCT_BULK_MAX_ITEMS', 50))
+        keys = raw_ids or raw_slugs
+        if len(keys) > max_items:
+            return Response(
+                {'error': 'too_many_products', 'detail': f'At most {max_items} products can be fetched at once.'},
+                status=400,
+            )
+        if raw_ids:
             try:
-                limit = max(1, min(int(limit_raw), 24))
-            except Exception:
-                limit = 0
-            if limit:
-                return qs[:limit]
-        return qs
+                keys = [int(value) for value in raw_ids]
+            except ValueError:
+                return Response({'error': 'invalid_ids', 'detail': 'ids must be integers.'}, status=400)
+            lookup = 'id'
+        else:
+            lookup = 'slug'
+
+        # Annotated so the key is loaded even when sparse fieldsets defer the column.
+        matches = self._base_queryset().filter(**{f'{lookup}__in': keys}).annotate(bulk_key=F(lookup))
+        found = {product.bulk_key: product for product in matches}
+        products = [found[key] for key in keys if key in found]
+        return Response({
+            'results': self.get_serializer(products, many=True).data,
+            'missing': [key for key in keys if key not in found],
+        })
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalog_cache('product-slug')
 def product_by_slug(request, slug):
     """Return product by slug."""
     product = get_object_or_404(Product, slug=slug, is_active=True)
@@ -565,31 +776,121 @@ def product_by_slug(request, slug):
     return Response(serializer.data)
 
 
-def _refresh_product_review_stats(product):
-    stats = ProductReview.objects.filter(product=product, is_approved=True).aggregate(
-        avg_rating=Avg('rating'),
-        review_total=Count('id'),
+def _product_card_columns(prefix=''):
+    columns = ProductCardSerializer.required_columns(ProductCardSerializer.resolve_field_names())
+    return [f'{prefix}{column}' for column in columns]
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@catalog_cache('product-related')
+def product_related(request, slug):
+    """
+    Related product cards from the precomputed neighbour table.
+
+    Frequently-bought-together neighbours come first, topped up with content-similar
+    products (which also cover new products without sales); `?kind=` picks one list.
+    """
+    product = get_object_or_404(Product.objects.only('id'), slug=slug, is_active=True)
+    limit = related_products_limit()
+    try:
+        limit = max(1, min(int(request.query_params.get('limit') or limit), limit))
+    except (TypeError, ValueError):
+        pass
+    kinds = [RelatedProduct.KIND_CO_PURCHASE, RelatedProduct.KIND_CONTENT]
+    requested_kind = (request.query_params.get('kind') or '').strip()
+    if requested_kind in kinds:
+        kinds = [requested_kind]
+    related_ids = []
+    rows = (
+        RelatedProduct.objects.filter(product=product, kind__in=kinds, related__is_active=True)
+        .order_by('kind', 'rank')  # 'co_purchase' sorts before 'content'
+        .values_list('related_id', flat=True)
     )
-    total = int(stats.get('review_total') or 0)
-    avg_value = stats.get('avg_rating')
-    product.review_count = total
-    if avg_value is None:
-        product.rating = Decimal('0.00')
-    else:
-        product.rating = Decimal(str(avg_value)).quantize(Decimal('0.01'))
-    product.save(update_fields=['review_count', 'rating'])
+    for related_id in rows:
+        if related_id not in related_ids:
+            related_ids.append(related_id)
+        if len(related_ids) >= limit:
+            break
+    by_id = Product.objects.only(*_product_card_columns()).in_bulk(related_ids)
+    cards = [by_id[pk] for pk in related_ids if pk in by_id]
+    return Response({'results': ProductCardSerializer(cards, many=True, context={'request': request}).data})
+
+
+SEARCH_SUGGEST_DEFAULT_LIMIT = 8
+SEARCH_SUGGEST_MAX_LIMIT = 20
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_suggest(request):
+    """Typeahead suggestions (products, categories, tags) from the in-process prefix index."""
+    query = str(request.query_params.get('q') or '').strip()[:SEARCH_QUERY_MAX_LENGTH]
+    try:
+        limit = int(request.query_params.get('limit') or SEARCH_SUGGEST_DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        limit = SEARCH_SUGGEST_DEFAULT_LIMIT
+    limit = max(1, min(limit, SEARCH_SUGGEST_MAX_LIMIT))
+    results = search_suggestions(query, limit) if query else []
+    return Response({'query': query, 'results': results})
+
+
+REVIEW_SORT_ORDERINGS = {
+    'newest': ['-created_at', '-id'],
+    'oldest': ['created_at', 'id'],
+    'highest': ['-rating', '-created_at', '-id'],
+    'lowest': ['rating', '-created_at', '-id'],
+}
+
+
+def _review_summary(product):
+    return {
+        'average': str(product.rating),
+        'count': product.review_count,
+        'histogram': rating_histogram(product),
+    }
+
+
+def _list_product_reviews(request, product):
+    params = request.query_params
+    sort = str(params.get('sort') or 'newest').strip().lower()
+    if sort not in REVIEW_SORT_ORDERINGS:
+        return Response(
+            {'error': 'invalid_sort', 'detail': f"sort must be one of: {', '.join(REVIEW_SORT_ORDERINGS)}."},
+            status=400,
+        )
+    reviews = ProductReview.objects.filter(product=product, is_approved=True).select_related('user')
+    raw_ratings = _split_list_params(params.getlist('rating'))
+    if raw_ratings:
+        try:
+            ratings = {int(value) for value in raw_ratings}
+        except ValueError:
+            ratings = set()
+        if not ratings or not ratings <= set(RATING_VALUES):
+            return Response({'error': 'invalid_rating', 'detail': 'rating must be integers between 1 and 5.'}, status=400)
+        reviews = reviews.filter(rating__in=ratings)
+    paginator = KeysetPagination(
+        page_size=getattr(settings, 'STORE_REVIEWS_PAGE_SIZE', 10),
+        max_page_size=getattr(settings, 'STORE_REVIEWS_MAX_PAGE_SIZE', 50),
+    )
+    page = paginator.paginate_queryset(reviews, request, ordering=REVIEW_SORT_ORDERINGS[sort])
+    response = paginator.get_paginated_response(ProductReviewSerializer(page, many=True).data)
+    response.data['summary'] = _review_summary(product)
+    return response
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
 def product_reviews(request, slug):
-    """List approved reviews or create a new review for a product."""
+    """
+    GET: approved reviews, cursor-paginated, with `?rating=` (comma-separated stars) and
+    `?sort=newest|oldest|highest|lowest`, plus the product's rating summary.
+    POST: create a review; the product's histogram and average follow via signals.
+    """
     product = get_object_or_404(Product, slug=slug, is_active=True)
 
     if request.method == 'GET':
-        reviews = ProductReview.objects.filter(product=product, is_approved=True).select_related('user').order_by('-created_at')
-        serializer = ProductReviewSerializer(reviews, many=True)
-        return Response(serializer.data)
+        return _list_product_reviews(request, product)
 
     reviewer_name = (request.data.get('reviewer_name') or request.data.get('name') or '').strip()
     reviewer_email = (request.data.get('reviewer_email') or request.data.get('email') or '').strip().lower()
@@ -622,43 +923,63 @@ def product_reviews(request, slug):
         is_approved=True,
     )
 
-    _refresh_product_review_stats(product)
     serializer = ProductReviewSerializer(review)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
-    # annotate product_count with only active products
-    queryset = Category.objects.filter(is_active=True).annotate(
-        product_count=Count('products', filter=Q(products__is_active=True))
-    )
+class CategoryViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
+    # product_count comes from the denormalized Category.active_product_count
+    queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     lookup_field = 'slug'
+    catalog_cache_namespace = 'categories'
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Whole active category tree, nested via `children`, from a single query."""
+        return cached_catalog_response(request, 'categories:tree', lambda: Response(self._build_tree()))
+
+    def _build_tree(self):
+        categories = list(self.get_queryset().order_by('depth', 'name', 'id'))
+        rows = self.get_serializer(categories, many=True).data
+        nodes = {}
+        roots = []
+        for category, row in zip(categories, rows):
+            node = dict(row)
+            node['children'] = []
+            nodes[category.id] = node
+            if category.parent_id is None:
+                roots.append(node)
+            elif category.parent_id in nodes:
+                nodes[category.parent_id]['children'].append(node)
+            # Children of inactive parents are hidden along with their parent.
+        return roots
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def home_content(request):
-    hero_slides = HomeHeroSlide.objects.filter(is_active=True).order_by('sort_order', 'id')
-    categories = (
-        Category.objects
-        .filter(is_active=True)
-        .annotate(product_count=Count('products', filter=Q(products__is_active=True)))
-        .order_by('name')
+    """Prebuilt landing payload; see store/home_payload.py."""
+    return home_payload_response(request)
+
+
+def _shipping_methods_validators(request):
+    rows = list(
+        ShippingMethod.objects.filter(active=True)
+        .order_by('id')
+        .values_list('id', 'name', 'price', 'delivery_days')
     )
-    return Response({
-        'hero_slides': HomeHeroSlideSerializer(hero_slides, many=True, context={'request': request}).data,
-        'categories': CategorySerializer(categories, many=True, context={'request': request}).data,
-    })
+    return content_etag(rows), None
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(_shipping_methods_validators)
 def get_shipping_methods(request):
     methods = ShippingMethod.objects.filter(active=True)
     serializer = ShippingMethodSerializer(methods, many=True)
@@ -843,20 +1164,13 @@ def _assistant_product_search_reply(message):
     if not search_query:
         return "Please tell me what product name or category you want to find."
 
-    matches = (
-        Product.objects
-        .filter(
-            is_active=True,
-        )
-        .filter(
-            Q(name__icontains=search_query)
-            | Q(slug__icontains=search_query)
-            | Q(categories__name__icontains=search_query)
-            | Q(categories__slug__icontains=search_query)
-        )
+    started = time.perf_counter()
+    matches = list(
+        search_products(Product.objects.filter(is_active=True), search_query)
         .distinct()
-        .order_by('-is_featured', 'name')[:5]
+        .order_by('search_rank', '-is_featured', 'name')[:5]
     )
+    record_search(search_query, len(matches), (time.perf_counter() - started) * 1000, source=SearchEvent.SOURCE_ASSISTANT)
     if not matches:
         return f"I could not find products matching '{search_query}'. Try another keyword or category."
 
@@ -1079,11 +1393,13 @@ def newsletter_subscribe(request):
     return Response({'ok': True, 'already_subscribed': already_subscribed})
 
 
-def _get_or_create_cart(request):
+def _find_cart(request, queryset=None):
+    """The session's or user's existing cart, or None; never creates one."""
+    carts = Cart.objects.all() if queryset is None else queryset
     session = request.session
     cart_id = session.get('cart_id')
     if cart_id:
-        cart = Cart.objects.filter(id=cart_id).first()
+        cart = carts.filter(id=cart_id).first()
         if cart:
             updated_fields = []
             if request.user.is_authenticated and cart.user_id != request.user.id:
@@ -1097,7 +1413,7 @@ def _get_or_create_cart(request):
             return cart
 
     if request.user.is_authenticated:
-        existing_user_cart = Cart.objects.filter(user=request.user).order_by('-updated_at').first()
+        existing_user_cart = carts.filter(user=request.user).order_by('-updated_at').first()
         if existing_user_cart:
             if not existing_user_cart.session_key and session.session_key:
                 existing_user_cart.session_key = session.session_key
@@ -1105,7 +1421,16 @@ def _get_or_create_cart(request):
             session['cart_id'] = existing_user_cart.id
             session.save()
             return existing_user_cart
+    return None
 
+
+def _get_or_create_cart(request):
+    cart = _find_cart(request)
+    if cart:
+        return cart
+    session = request.session
+    if not session.session_key:
+        session.save()
     cart = Cart.objects.create(
         session_key=session.session_key,
         user=request.user if request.user.is_authenticated else None,
@@ -1117,11 +1442,27 @@ def _get_or_create_cart(request):
 
 @api_view(['GET'])
 def cart_detail(request):
-    cart = _get_or_create_cart(request)
+    # Viewing a cart never creates one: visitors without a cart get a virtual empty one.
+    if session_cart_enabled(request):
+        return Response(virtual_cart_payload(request, SessionCart(request.session).items()))
+    cart = _find_cart(request, queryset=cart_display_queryset())
+    if cart is None:
+        return Response(virtual_cart_payload(request))
     serializer = CartSerializer(cart, context={'request': request})
     return Response(serializer.data)
 
 
+def _insufficient_stock_response(product):
+    return Response(
+        {
+            'error': 'insufficient_stock',
+            'detail': f'Only {product.stock} item(s) available.',
+            'available_stock': product.stock,
+        },
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
 @api_view(['POST'])
 def cart_add(request):
     product_id = request.data.get('product_id')
@@ -1135,21 +1476,20 @@ def cart_add(request):
     product = get_object_or_404(Product, id=product_id)
     if not product.is_active:
         return Response({'error': 'product_inactive'}, status=status.HTTP_400_BAD_REQUEST)
+    if session_cart_enabled(request):
+        session_cart = SessionCart(request.session)
+        next_qty = session_cart.quantity(product.id) + quantity
+        if not product.is_digital and next_qty > product.stock:
+            return _insufficient_stock_response(product)
+        session_cart.set_quantity(product.id, next_qty)
+        logger.info('cart.add success cart=session product_id=%s quantity=%s', product.id, next_qty)
+        return Response({'ok': True}, status=status.HTTP_200_OK)
+
     cart = _get_or_create_cart(request)
-    item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-    next_qty = quantity if created else item.quantity + quantity
-    if not product.is_digital and next_qty > product.stock:
-        return Response(
-            {
-                'error': 'insufficient_stock',
-                'detail': f'Only {product.stock} item(s) available.',
-                'available_stock': product.stock,
-            },
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    item.quantity = next_qty
-    item.save()
-    logger.info('cart.add success cart_id=%s product_id=%s quantity=%s', cart.id, product.id, item.quantity)
+    next_qty = add_cart_quantity(cart.id, product.id, quantity)
+    if next_qty is None:
+        return _insufficient_stock_response(product)
+    logger.info('cart.add success cart_id=%s product_id=%s quantity=%s', cart.id, product.id, next_qty)
     return Response({'ok': True}, status=status.HTTP_200_OK)
 
 
@@ -1160,23 +1500,28 @@ def cart_update(request):
         quantity = int(request.data.get('quantity', 1))
     except Exception:
         return Response({'error': 'invalid_quantity'}, status=status.HTTP_400_BAD_REQUEST)
+    if session_cart_enabled(request):
+        # Cached cart items are keyed by product id.
+        session_cart = SessionCart(request.session)
+        if not str(item_id or '').isdigit() or not session_cart.quantity(item_id):
+            return Response({'error': 'not found'}, status=status.HTTP_404_NOT_FOUND)
+        product = get_object_or_404(Product, id=item_id)
+        if quantity > 0 and not product.is_digital and quantity > product.stock:
+            return _insufficient_stock_response(product)
+        session_cart.set_quantity(product.id, quantity)
+        logger.info('cart.update success cart=session product_id=%s quantity=%s', product.id, quantity)
+        return Response({'ok': True})
+
     item = get_object_or_404(CartItem, id=item_id)
     # ensure the item belongs to the current session/user cart
-    cart = _get_or_create_cart(request)
-    if item.cart_id != cart.id:
+    cart = _find_cart(request)
+    if cart is None or item.cart_id != cart.id:
         return Response({'error': 'not found'}, status=status.HTTP_404_NOT_FOUND)
     if quantity <= 0:
         item.delete()
     else:
         if not item.product.is_digital and quantity > item.product.stock:
-            return Response(
-                {
-                    'error': 'insufficient_stock',
-                    'detail': f'Only {item.product.stock} item(s) available.',
-                    'available_stock': item.product.stock,
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return _insufficient_stock_response(item.product)
         item.quantity = quantity
         item.save()
     logger.info('cart.update success cart_id=%s item_id=%s quantity=%s', cart.id, item_id, quantity)
@@ -1186,9 +1531,15 @@ def cart_update(request):
 @api_view(['POST'])
 def cart_remove(request):
     item_id = request.data.get('item_id')
+    if session_cart_enabled(request):
+        if not str(item_id or '').isdigit() or not SessionCart(request.session).remove(item_id):
+            return Response({'error': 'not found'}, status=status.HTTP_404_NOT_FOUND)
+        logger.info('cart.remove success cart=session product_id=%s', item_id)
+        return Response({'ok': True})
+
     item = get_object_or_404(CartItem, id=item_id)
-    cart = _get_or_create_cart(request)
-    if item.cart_id != cart.id:
+    cart = _find_cart(request)
+    if cart is None or item.cart_id != cart.id:
         return Response({'error': 'not found'}, status=status.HTTP_404_NOT_FOUND)
     item.delete()
     logger.info('cart.remove success cart_id=%s item_id=%s', cart.id, item_id)
@@ -1197,19 +1548,94 @@ def cart_remove(request):
 
 @api_view(['POST'])
 def cart_clear(request):
-    cart = _get_or_create_cart(request)
+    if session_cart_enabled(request):
+        deleted_count = SessionCart(request.session).clear()
+        logger.info('cart.clear success cart=session deleted_items=%s', deleted_count)
+        return Response({'ok': True, 'deleted_items': deleted_count})
+
+    cart = _find_cart(request)
+    if cart is None:
+        return Response({'ok': True, 'deleted_items': 0})
     deleted_count, _ = cart.items.all().delete()
     logger.info('cart.clear success cart_id=%s deleted_items=%s', cart.id, deleted_count)
     return Response({'ok': True, 'deleted_items': deleted_count})
 
 
+@api_view(['POST'])
+def cart_batch(request):
+    """
+    Apply `operations` ([{op: add|set|remove|clear, product_id, quantity}], by
+    product id) in one transaction and return the updated cart. Products are
+    fetched (and locked) once; any invalid operation rejects the whole batch.
+    """
+    max_operations = int(getattr(settings, 'STORE_CART_BATCH_MAX_OPERATIONS', 100))
+    try:
+        operations = parse_cart_operations(request.data.get('operations'), max_operations)
+    except CartBatchError as exc:
+        return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
+    product_ids = {product_id for _op, product_id, _quantity in operations if product_id is not None}
+    product_columns = ('id', 'is_active', 'is_digital', 'stock')
+
+    if session_cart_enabled(request):
+        session_cart = SessionCart(request.session)
+        try:
+            session_cart.lines = plan_cart_lines(
+                session_cart.lines, operations, Product.objects.only(*product_columns).in_bulk(product_ids)
+            )
+        except CartBatchError as exc:
+            return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
+        session_cart.save()
+        logger.info('cart.batch success cart=session operations=%s', len(operations))
+        return Response(virtual_cart_payload(request, session_cart.items()))
+
+    cart = _find_cart(request)
+    with transaction.atomic():
+        products = Product.objects.select_for_update().only(*product_columns).in_bulk(product_ids)
+        items = {item.product_id: item for item in (cart.items.select_for_update() if cart else ())}
+        try:
+            lines = plan_cart_lines(
+                {product_id: item.quantity for product_id, item in items.items()}, operations, products
+            )
+        except CartBatchError as exc:
+            return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
+        if cart is None:
+            if not lines:
+                return Response(virtual_cart_payload(request))
+            cart = _get_or_create_cart(request)
+        removed = [item.id for product_id, item in items.items() if product_id not in lines]
+        if removed:
+            CartItem.objects.filter(id__in=removed).delete()
+        changed = []
+        for product_id, quantity in lines.items():
+            item = items.get(product_id)
+            if item and item.quantity != quantity:
+                item.quantity = quantity
+                changed.append(item)
+        CartItem.objects.bulk_update(changed, ['quantity'])
+        # Upsert, in case a concurrent add created one of the lines first.
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_id=product_id, quantity=quantity)
+                for product_id, quantity in lines.items() if product_id not in items
+            ],
+            update_conflicts=True,
+            unique_fields=['cart', 'product'],
+            update_fields=['quantity'],
+        )
+    logger.info('cart.batch success cart_id=%s operations=%s', cart.id, len(operations))
+    cart = cart_display_queryset().get(pk=cart.pk)
+    return Response(CartSerializer(cart, context={'request': request}).data)
+
+
 @api_view(['POST'])
 def checkout_create(request):
     """Create an Order from the current cart and return order summary."""
-    cart = _get_or_create_cart(request)
-    logger.info('checkout.create started cart_id=%s user=%s', cart.id, request.user.id if request.user.is_authenticated else 'anonymous')
-    if not cart.items.exists():
-        logger.warning('checkout.create failed cart_id=%s reason=empty_cart', cart.id)
+    # Checkout is where a cached anonymous cart becomes Cart/CartItem rows.
+    cart = materialize_session_cart(request) if session_cart_enabled(request) else _find_cart(request)
+    cart_id = cart.id if cart else None
+    logger.info('checkout.create started cart_id=%s user=%s', cart_id, request.user.id if request.user.is_authenticated else 'anonymous')
+    if cart is None or not cart.items.exists():
+        logger.warning('checkout.create failed cart_id=%s reason=empty_cart', cart_id)
         return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
 
     data = request.data
@@ -1362,7 +1788,7 @@ def checkout_create(request):
 
     logger.info('checkout.create success order_id=%s order_number=%s cart_id=%s', order.id, order.order_number, cart.id)
     _send_order_created_notifications(order, contact_email=contact_email, request=request)
-    serializer = OrderSerializer(order, context={'request': request})
+    serializer = OrderSerializer(_order_detail_queryset().get(pk=order.pk), context={'request': request})
     return Response(serializer.data)
 
 
@@ -3356,41 +3782,54 @@ def logout_view(request):
     return Response({'ok': True})
 
 
+def _order_detail_queryset():
+    """Orders with addresses, transactions and item product cards loaded for `OrderSerializer`."""
+    items = (
+        OrderItem.objects.select_related('product')
+        .only('id', 'order', 'quantity', 'price', *_product_card_columns('product__'))
+        .order_by('id')
+    )
+    return Order.objects.select_related('shipping_address', 'billing_address').prefetch_related(
+        Prefetch('items', queryset=items), 'transactions'
+    )
+
+
+def _wishlist_payload(user):
+    from .serializers import WishlistSerializer
+
+    products = Product.objects.only(*_product_card_columns())
+    wishlist = Wishlist.objects.prefetch_related(Prefetch('products', queryset=products)).get(user=user)
+    return WishlistSerializer(wishlist).data
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def wishlist_detail(request):
     """Get user's wishlist."""
-    from .models import Wishlist
-    from .serializers import WishlistSerializer
-    wishlist, _ = Wishlist.objects.get_or_create(user=request.user)
-    serializer = WishlistSerializer(wishlist)
-    return Response(serializer.data)
+    Wishlist.objects.get_or_create(user=request.user)
+    return Response(_wishlist_payload(request.user))
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def wishlist_add(request):
     """Add product to wishlist."""
-    from .models import Wishlist
     product_id = request.data.get('product_id')
     product = get_object_or_404(Product, id=product_id)
     wishlist, _ = Wishlist.objects.get_or_create(user=request.user)
     wishlist.products.add(product)
-    from .serializers import WishlistSerializer
-    return Response(WishlistSerializer(wishlist).data, status=status.HTTP_201_CREATED)
+    return Response(_wishlist_payload(request.user), status=status.HTTP_201_CREATED)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def wishlist_remove(request):
     """Remove product from wishlist."""
-    from .models import Wishlist
     product_id = request.data.get('product_id')
     product = get_object_or_404(Product, id=product_id)
     wishlist = get_object_or_404(Wishlist, user=request.user)
     wishlist.products.remove(product)
-    from .serializers import WishlistSerializer
-    return Response(WishlistSerializer(wishlist).data)
+    return Response(_wishlist_payload(request.user))
 
 
 @api_view(['POST'])
@@ -3412,13 +3851,13 @@ def order_tracking(request):
     
     if order_id:
         order = get_object_or_404(
-            Order.objects.select_related('shipping_address', 'billing_address').prefetch_related('items__product__images', 'transactions'),
+            _order_detail_queryset(),
             id=order_id
         )
     elif order_number:
         # If you have an order number field, use it
         order = get_object_or_404(
-            Order.objects.select_related('shipping_address', 'billing_address').prefetch_related('items__product__images', 'transactions'),
+            _order_detail_queryset(),
             order_number=order_number
         )
     else:
@@ -3438,19 +3877,27 @@ def order_tracking(request):
 @permission_classes([IsAuthenticated])
 def user_orders(request):
     """Get all orders for authenticated user."""
-    orders = (
-        Order.objects
-        .filter(user=request.user)
-        .select_related('shipping_address', 'billing_address')
-        .prefetch_related('items__product__images', 'transactions')
-        .order_by('-created_at')
-    )
+    orders = _order_detail_queryset().filter(user=request.user).order_by('-created_at')
     serializer = OrderSerializer(orders, many=True, context={'request': request})
     return Response(serializer.data)
 
 
+def _page_detail_validators(request, slug):
+    row = Page.objects.filter(slug=slug).values_list('id', 'updated_at').first()
+    if row is None:
+        return None, None
+    return content_etag(row), int(row[1].timestamp())
+
+
+def _pages_list_validators(request):
+    stats = Page.objects.aggregate(total=Count('id'), latest=Max('updated_at'))
+    latest = stats.get('latest')
+    return content_etag(stats.get('total'), latest), int(latest.timestamp()) if latest else None
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(_page_detail_validators)
 def page_detail(request, slug):
     """Get static page by slug (About, Contact, FAQ, etc.)."""
     from .models import Page
@@ -3462,6 +3909,7 @@ def page_detail(request, slug):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(_pages_list_validators)
 def pages_list(request):
     """List all pages."""
     from .models import Page